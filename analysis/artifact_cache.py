@@ -0,0 +1,156 @@
+"""
+Content-Addressed Artifact Cache
+Stores stage outputs (DataFrames, result dicts, figure specs) on disk under a
+key derived from everything the stage depends on, so re-running a notebook or
+script with unchanged inputs loads results instead of recomputing them.
+
+A key is the SHA-256 of the stage name plus its inputs: file paths hash their
+contents, DataFrames, arrays and SciPy sparse matrices hash their values,
+and other values hash their repr. Source-code hashes are passed in as inputs too, so editing a
+stage's code invalidates its cached output. Nothing is ever overwritten in
+place - a changed input simply produces a different key.
+"""
+import hashlib
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+
+# Bytes read at a time when hashing input files
+HASH_BLOCK = 1 << 20
+
+# (path, size, mtime) -> content digest, so large inputs are hashed once per process
+_file_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents (memoized on path, size and mtime)."""
+    path = Path(path)
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_digests:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                h.update(block)
+        _file_digests[memo_key] = h.hexdigest()
+    return _file_digests[memo_key]
+
+
+def _update(h, value):
+    """Feed a type-tagged encoding of `value` into hash `h`."""
+    if isinstance(value, Path):
+        h.update(b'file:' + (file_digest(value) if value.exists() else 'missing').encode())
+    elif isinstance(value, pd.DataFrame):
+        h.update(b'frame:' + repr(list(value.columns)).encode() + repr(list(value.dtypes)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(b'series:' + repr(value.name).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif hasattr(value, 'tocsr') and hasattr(value, 'nnz'):
+        # SciPy sparse matrix: hash its CSR arrays, never a dense copy
+        csr = value.tocsr()
+        h.update(b'sparse:' + repr((csr.dtype.str, csr.shape)).encode())
+        for part in (csr.data, csr.indices, csr.indptr):
+            h.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(b'array:' + repr((value.dtype.str, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(b'dict:')
+        for key in sorted(value, key=repr):
+            _update(h, key)
+            _update(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(f'seq{len(value)}:'.encode())
+        for item in value:
+            _update(h, item)
+    else:
+        h.update(b'value:' + repr(value).encode())
+    h.update(b';')
+
+
+def fingerprint(*values):
+    """Hex SHA-256 over the given values."""
+    h = hashlib.sha256()
+    for value in values:
+        _update(h, value)
+    return h.hexdigest()
+
+
+def source_hash(text):
+    """Hash of a piece of source code, for use as a cache input."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ArtifactCache:
+    """Pickled stage outputs keyed by the fingerprint of their inputs."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def path(self, stage, inputs):
+        return self.cache_dir / f"{stage}-{fingerprint(stage, inputs)[:32]}.pkl"
+
+    def get_or_compute(self, stage, compute, inputs=()):
+        """
+        Return the cached output of `stage` for these inputs, or run
+        `compute()` and store its result.
+        """
+        path = self.path(stage, inputs)
+        if path.exists():
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            print(f"[cache] {stage}: loaded {path.name}")
+            return result
+
+        start = time.perf_counter()
+        result = compute()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a partial artifact
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        print(f"[cache] {stage}: computed in {time.perf_counter() - start:.1f} s, stored {path.name}")
+        return result
+
+
+# Worker processes are started by a clean server process (or spawned) rather
+# than forked: forking while run_parallel's other threads hold locks can deadlock
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+# Imported once by the fork server, so each new worker starts in ~0.1 s instead of re-importing them
+POOL_PRELOAD = ['numpy', 'pandas']
+
+
+def process_pool(max_workers, **kwargs):
+    """ProcessPoolExecutor that is safe to start from any thread (see POOL_START_METHOD)."""
+    context = multiprocessing.get_context(POOL_START_METHOD)
+    if POOL_START_METHOD == 'forkserver':
+        context.set_forkserver_preload(POOL_PRELOAD)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, **kwargs)
+
+
+def run_parallel(sections, jobs=None):
+    """
+    Run independent sections ({name: zero-argument callable}) concurrently and
+    return {name: result}. Threads are used so sections can share in-memory
+    inputs; the heavy work inside them (numpy, scikit-learn, process pools)
+    does not hold the GIL. Sections must start their pools with process_pool
+    and draw random numbers from their own seeded generators, never the
+    global np.random, so results do not depend on thread scheduling.
+    """
+    jobs = max(1, min(jobs or len(sections), len(sections)))
+    if jobs == 1:
+        return {name: func() for name, func in sections.items()}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {name: pool.submit(func) for name, func in sections.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,147 @@
+"""
+Sparse Champion-Pick Features
+One-hot champion-by-role picks and ban indicators for every team-game, kept
+as a SciPy CSR matrix from construction through caching and model training.
+
+Columns come in blocks of one column per champion:
+    pick:<ROLE>:<champion>       the team's own pick in each of the 5 roles
+    opp_pick:<ROLE>:<champion>   the opponent's pick in each role
+    ban:<champion>               banned by the team
+    opp_ban:<champion>           banned by the opponent
+
+With ~170 champions that is 12 x 170 = 2,040 columns, but each row has at
+most 20 non-zeros (10 picks, 10 bans). The matrix is assembled straight from
+(row, column) coordinates, so no dense rows x columns array is ever built:
+a row costs about 20 x (4 + 4) bytes instead of 2,040 x 8.
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+ROLES = ('TOP', 'JNG', 'MID', 'ADC', 'SUP')
+BAN_COLUMNS = ('ban1', 'ban2', 'ban3', 'ban4', 'ban5')
+# Column blocks, in matrix order: (prefix, role or None)
+BLOCKS = ([('pick', role) for role in ROLES] + [('opp_pick', role) for role in ROLES]
+          + [('ban', None), ('opp_ban', None)])
+BLOCK_INDEX = {block: i for i, block in enumerate(BLOCKS)}
+
+
+def _opponents(keys):
+    """Position in `keys` of each team-game's opponent (-1 unless the game has exactly two teams)."""
+    frame = pd.DataFrame({'gameid': keys.get_level_values(0), 'teamid': keys.get_level_values(1)})
+    per_game = frame.groupby('gameid')['teamid']
+    first, last = per_game.transform('first'), per_game.transform('last')
+    other = np.where(frame['teamid'] == first, last, first)
+    opponent = keys.get_indexer(pd.MultiIndex.from_arrays([frame['gameid'], other]))
+    return np.where(per_game.transform('size').to_numpy() == 2, opponent, -1)
+
+
+def champion_entries(raw_df, keys):
+    """
+    Picks and bans of every team-game in `keys`, in long form.
+
+    Args:
+        raw_df: cleaned player/team rows (position, champion, ban1..ban5)
+        keys: unique (gameid, teamid) MultiIndex, one matrix row per key
+
+    Returns:
+        DataFrame of row (position in keys), block (index into BLOCKS) and
+        champion; each pick and ban appears once for its team and once, in
+        the opp_ block, for the opponent
+    """
+    opponent = _opponents(keys)
+
+    def add(rows, champions, own_blocks, opp_blocks):
+        found = rows >= 0
+        rows, champions = rows[found], champions[found]
+        own_blocks, opp_blocks = own_blocks[found], opp_blocks[found]
+        opp_rows = opponent[rows]
+        has_opp = opp_rows >= 0
+        return [
+            pd.DataFrame({'row': rows, 'block': own_blocks, 'champion': champions}),
+            pd.DataFrame({'row': opp_rows[has_opp], 'block': opp_blocks[has_opp], 'champion': champions[has_opp]}),
+        ]
+
+    parts = []
+    # Picks: the first player row per (gameid, teamid, role)
+    players = raw_df[raw_df['position'].isin(ROLES) & raw_df['champion'].notna()]
+    players = players[~players.duplicated(['gameid', 'teamid', 'position'], keep='first').to_numpy()]
+    rows = keys.get_indexer(pd.MultiIndex.from_arrays([players['gameid'].to_numpy(), players['teamid'].to_numpy()]))
+    role = pd.Categorical(players['position'], categories=list(ROLES)).codes
+    parts += add(rows, players['champion'].to_numpy(dtype=object),
+                 np.asarray([BLOCK_INDEX[('pick', r)] for r in ROLES])[role],
+                 np.asarray([BLOCK_INDEX[('opp_pick', r)] for r in ROLES])[role])
+
+    # Bans: the first recorded value of each ban slot over the team's rows
+    ban_columns = [c for c in BAN_COLUMNS if c in raw_df.columns]
+    if ban_columns:
+        bans = raw_df.groupby(['gameid', 'teamid'], sort=False)[ban_columns].first()
+        bans = bans.melt(ignore_index=False, value_name='champion').dropna(subset=['champion'])
+        rows = keys.get_indexer(bans.index)
+        n = len(bans)
+        parts += add(rows, bans['champion'].to_numpy(dtype=object),
+                     np.full(n, BLOCK_INDEX[('ban', None)]), np.full(n, BLOCK_INDEX[('opp_ban', None)]))
+
+    return pd.concat(parts, ignore_index=True)
+
+
+class ChampionEncoder:
+    """
+    Champion vocabulary plus the entries -> CSR transform.
+
+    Attributes:
+        champions: sorted champion names, one column per block each
+    """
+
+    def __init__(self, min_count=1):
+        self.min_count = min_count
+        self.champions = None
+
+    def fit(self, entries):
+        """Learn the champions seen at least min_count times (uses no labels)."""
+        counts = entries['champion'].value_counts()
+        self.champions = np.sort(counts.index[counts >= self.min_count].to_numpy(dtype=object))
+        return self
+
+    @property
+    def n_features(self):
+        return len(BLOCKS) * len(self.champions)
+
+    @property
+    def feature_names(self):
+        return [f"{prefix}:{role}:{champ}" if role else f"{prefix}:{champ}"
+                for prefix, role in BLOCKS for champ in self.champions]
+
+    def transform(self, entries, n_rows):
+        """CSR matrix (n_rows x n_features) of 0/1 indicators; unseen champions are dropped."""
+        code = pd.Categorical(entries['champion'], categories=self.champions).codes.astype(np.int64)
+        known = code >= 0
+        rows = entries['row'].to_numpy()[known]
+        cols = entries['block'].to_numpy()[known] * len(self.champions) + code[known]
+        data = np.ones(len(rows), dtype=np.float32)
+        matrix = sp.csr_matrix((data, (rows, cols)), shape=(n_rows, self.n_features))
+        # A champion listed twice in one slot (e.g. a repeated ban) still counts once
+        matrix.data[:] = 1.0
+        return matrix
+
+
+def champion_matrix(raw_df, keys, min_count=1):
+    """
+    Champion pick/ban matrix for `keys` with the vocabulary fitted on them.
+
+    Returns:
+        (CSR matrix, feature names)
+    """
+    entries = champion_entries(raw_df, keys)
+    encoder = ChampionEncoder(min_count).fit(entries)
+    return encoder.transform(entries, len(keys)), encoder.feature_names
+
+
+def with_dense(X_dense, champions):
+    """Dense feature columns stacked in front of a sparse champion matrix, as CSR."""
+    return sp.hstack([sp.csr_matrix(np.asarray(X_dense, dtype=np.float64)), champions], format='csr')
+
+
+def sparse_nbytes(matrix):
+    """Bytes held by a CSR/CSC matrix's arrays."""
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
@@ -0,0 +1,177 @@
+"""
+Command-line entry point for the analysis pipeline.
+
+Each subcommand imports only the stage module it runs, so quick commands such
+as `summary` never pay for plotly or scikit-learn imports.
+
+All stages share the same options (see config.py for the profiles):
+    --data PATH          Oracle's Elixir CSV to read, or a quoted glob of
+                         (optionally compressed) season files
+    --out DIR            directory the JSON outputs are written to
+    --jobs N             worker processes for parallel stages
+    --permutations N     override every permutation-test count
+    --profile fast|full  run-size preset (default: full)
+    --timelines DIR      match-v5 timeline JSON for gank detection (process stage)
+    --all-lanes          score gank focus over top/mid/bot instead of bot vs top
+                         (process stage)
+    --model forest|hist_gb
+                         final model family (model stage, default: forest)
+    --champions          also train models on sparse champion picks and bans
+                         (model stage)
+
+Usage (from the repository root):
+    python analysis/cli.py process       # load CSV, detect trades, export processed data
+    python analysis/cli.py summary       # rebuild summary_stats.json from processed data
+    python analysis/cli.py eda           # EDA plots and hypothesis tests
+    python analysis/cli.py trends        # rolling patch/week trends with bootstrap bands
+    python analysis/cli.py stratified    # per-league tests with max-T adjustment
+    python analysis/cli.py matching      # propensity-matched bot vs top comparison
+    python analysis/cli.py missingness   # missingness permutation tests
+    python analysis/cli.py model         # baseline/final models and fairness analysis
+    python analysis/cli.py series        # Monte Carlo Bo3/Bo5 series and bracket odds
+    python analysis/cli.py incremental   # out-of-core partial_fit training on streamed batches
+    python analysis/cli.py drift         # score new patches' games and flag model drift
+    python analysis/cli.py notebook      # regenerate project04.ipynb
+    python analysis/cli.py serve         # local query API over the processed data
+    python analysis/cli.py all --profile fast --data sample.csv --out /tmp/out
+"""
+import argparse
+from pathlib import Path
+
+from config import MODEL_FAMILIES, PROFILES, get_config
+
+
+def cmd_process(config):
+    import data_processing
+    data_processing.main(config)
+
+
+def cmd_summary(config):
+    import data_processing
+    data_processing.regenerate_summary(config.output_dir)
+
+
+def cmd_eda(config):
+    import eda_and_tests
+    eda_and_tests.main(config)
+
+
+def cmd_trends(config):
+    import trends
+    trends.main(config)
+
+
+def cmd_stratified(config):
+    import stratified_tests
+    stratified_tests.main(config)
+
+
+def cmd_matching(config):
+    import matching
+    matching.main(config)
+
+
+def cmd_missingness(config):
+    import missingness_analysis
+    missingness_analysis.analyze_missingness(config)
+
+
+def cmd_model(config):
+    import modeling
+    modeling.main(config)
+
+
+def cmd_series(config):
+    import series_simulation
+    series_simulation.main(config)
+
+
+def cmd_incremental(config):
+    import incremental_training
+    incremental_training.main(config)
+
+
+def cmd_drift(config):
+    import drift_monitor
+    drift_monitor.main(config)
+
+
+def cmd_notebook(config):
+    import create_notebook
+    create_notebook.main()
+
+
+def cmd_serve(config):
+    import query_server
+    query_server.serve(config.processed_data)
+
+
+def cmd_all(config):
+    for stage in (cmd_process, cmd_eda, cmd_trends, cmd_stratified, cmd_matching, cmd_missingness, cmd_model, cmd_series):
+        stage(config)
+
+
+COMMANDS = {
+    'process': (cmd_process, "Load the CSV, identify trade games and export processed data"),
+    'summary': (cmd_summary, "Rebuild summary_stats.json from processed_data.json"),
+    'eda': (cmd_eda, "Create EDA plots and run the hypothesis tests"),
+    'trends': (cmd_trends, "Rolling win/objective/LII trends over patches and weeks"),
+    'stratified': (cmd_stratified, "Per-league/split hypothesis tests with Westfall-Young adjustment"),
+    'matching': (cmd_matching, "Propensity-matched bot vs top comparison with a sign-flip permutation test"),
+    'missingness': (cmd_missingness, "Run the missingness permutation tests"),
+    'model': (cmd_model, "Train the baseline/final models and run the fairness analysis"),
+    'series': (cmd_series, "Simulate Bo3/Bo5 series and a seeded bracket from the final model's win probabilities"),
+    'incremental': (cmd_incremental, "Train partial_fit models on batches streamed from processed_data.json"),
+    'drift': (cmd_drift, "Score games added since the last run with the reference model and flag drift per patch"),
+    'notebook': (cmd_notebook, "Regenerate project04.ipynb from the analysis scripts"),
+    'serve': (cmd_serve, "Serve filtered statistics over HTTP (see query_server.py)"),
+    'all': (cmd_all, "Run process, eda, trends, stratified, matching, missingness, model and series in order"),
+}
+
+
+def build_parser():
+    # Shared options, accepted after any subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data', type=Path,
+                        help="Oracle's Elixir CSV to read, or a quoted glob of season files (.csv, .csv.gz, .csv.zst)")
+    common.add_argument('--out', type=Path, help="Directory for JSON outputs (default: frontend/public/data)")
+    common.add_argument('--jobs', type=int, help="Worker processes for parallel stages (default: all cores)")
+    common.add_argument('--permutations', type=int, help="Override every permutation-test count")
+    common.add_argument('--profile', choices=sorted(PROFILES), default='full', help="Run-size preset")
+    common.add_argument('--timelines', type=Path,
+                        help="Directory of match-v5 timeline JSON used to detect ganks (process stage)")
+    common.add_argument('--all-lanes', action='store_true', default=None,
+                        help="Score gank focus over top/mid/bot instead of bot vs top (process stage)")
+    common.add_argument('--model', choices=MODEL_FAMILIES, help="Final model family (model stage)")
+    common.add_argument('--champions', action='store_true', default=None,
+                        help="Also train models on sparse champion pick/ban features (model stage)")
+
+    parser = argparse.ArgumentParser(
+        prog='leagueresearch',
+        description="Bot vs Top jungle gank analysis pipeline."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, (func, help_text) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text, parents=[common])
+        sub.set_defaults(func=func)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = get_config(
+        args.profile,
+        data_path=args.data,
+        output_dir=args.out,
+        jobs=args.jobs,
+        permutations=args.permutations,
+        timeline_dir=args.timelines,
+        model_family=args.model,
+        champion_features=args.champions,
+        all_lane_focus=args.all_lanes,
+    )
+    args.func(config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Run Configuration
+Data paths, output directory and run-size settings shared by every stage.
+
+Two profiles are provided:
+    full  - publication settings (10,000 test permutations, full model grid)
+    fast  - smoke-test settings for CI-sized data
+"""
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+# Default locations
+DATA_PATH = Path(__file__).parent.parent.parent / "2025_LoL_esports_match_data_from_OraclesElixir.csv"
+OUTPUT_DIR = Path(__file__).parent.parent / "frontend" / "public" / "data"
+# Content-addressed stage outputs reused by the notebook (see artifact_cache.py)
+CACHE_DIR = Path(__file__).parent.parent / ".cache" / "artifacts"
+
+# Time window for "early game" ganks (minutes)
+EARLY_WINDOW_MIN = 10
+
+# Random forest grid searched by modeling.build_final_model
+FULL_PARAM_GRID = {
+    'n_estimators': [100, 300],
+    'max_depth': [5, 10, None],
+    'min_samples_leaf': [1, 5],
+    'random_state': [42]
+}
+FAST_PARAM_GRID = {
+    'n_estimators': [50],
+    'max_depth': [5, None],
+    'min_samples_leaf': [5],
+    'random_state': [42]
+}
+
+# Histogram gradient boosting grid (model_family='hist_gb'). max_iter is an
+# upper bound: early stopping on a validation split picks the tree count.
+FULL_HGB_PARAM_GRID = {
+    'learning_rate': [0.05, 0.1],
+    'max_leaf_nodes': [15, 31],
+    'l2_regularization': [0.0, 1.0],
+    'max_iter': [500],
+    'early_stopping': [True],
+    'random_state': [42]
+}
+FAST_HGB_PARAM_GRID = {
+    'learning_rate': [0.1],
+    'max_leaf_nodes': [15, 31],
+    'max_iter': [200],
+    'early_stopping': [True],
+    'random_state': [42]
+}
+
+# Final model families accepted by modeling.build_final_model
+MODEL_FAMILIES = ('forest', 'hist_gb')
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    """Settings for one pipeline run."""
+    data_path: Path = DATA_PATH
+    output_dir: Path = OUTPUT_DIR
+    # Directory of match-v5 timeline JSON used for gank focus (None = use the
+    # killsat10/assistsat10 heuristic only)
+    timeline_dir: Path = None
+    # Score gank focus over top/mid/bot instead of the bot (ADC) vs top classification
+    all_lane_focus: bool = False
+    cache_dir: Path = CACHE_DIR
+    # Worker processes for parallel stages (None = all cores)
+    jobs: int = None
+    # Permutations for the bot vs top hypothesis tests
+    permutations: int = 10000
+    # Permutations for the missingness and fairness tests
+    missingness_permutations: int = 1000
+    fairness_permutations: int = 1000
+    # Final model: 'forest' (random forest) or 'hist_gb' (histogram gradient boosting)
+    model_family: str = 'forest'
+    param_grid: dict = field(default_factory=lambda: dict(FULL_PARAM_GRID))
+    hgb_param_grid: dict = field(default_factory=lambda: dict(FULL_HGB_PARAM_GRID))
+    cv_folds: int = 5
+    # Shuffles per feature for the permutation importance confidence intervals
+    importance_repeats: int = 30
+    # Poisson bootstrap replicates for the rolling trend bands
+    trend_bootstrap: int = 1000
+    # Also train sparse champion pick/ban models in the model stage
+    champion_features: bool = False
+    # Monte Carlo series/bracket simulations
+    series_simulations: int = 1_000_000
+
+    @property
+    def processed_data(self):
+        return Path(self.output_dir) / "processed_data.json"
+
+
+PROFILES = {
+    'full': RunConfig(),
+    'fast': RunConfig(
+        permutations=1000,
+        missingness_permutations=200,
+        fairness_permutations=200,
+        param_grid=FAST_PARAM_GRID,
+        hgb_param_grid=FAST_HGB_PARAM_GRID,
+        cv_folds=3,
+        importance_repeats=10,
+        trend_bootstrap=200,
+        series_simulations=100_000,
+    ),
+}
+
+
+def get_config(profile='full', data_path=None, output_dir=None, jobs=None, permutations=None,
+               timeline_dir=None, model_family=None, champion_features=None, all_lane_focus=None):
+    """
+    Build a RunConfig from a named profile plus command-line overrides.
+
+    `permutations` overrides every permutation count (hypothesis, missingness
+    and fairness tests); None leaves the profile's values in place.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}; choose from {sorted(PROFILES)}")
+
+    overrides = {}
+    if data_path is not None:
+        overrides['data_path'] = Path(data_path)
+    if output_dir is not None:
+        overrides['output_dir'] = Path(output_dir)
+    if model_family is not None:
+        if model_family not in MODEL_FAMILIES:
+            raise ValueError(f"Unknown model family {model_family!r}; choose from {list(MODEL_FAMILIES)}")
+        overrides['model_family'] = model_family
+    if timeline_dir is not None:
+        overrides['timeline_dir'] = Path(timeline_dir)
+    if jobs is not None:
+        overrides['jobs'] = jobs
+    if champion_features is not None:
+        overrides['champion_features'] = champion_features
+    if all_lane_focus is not None:
+        overrides['all_lane_focus'] = all_lane_focus
+    if permutations is not None:
+        overrides.update(
+            permutations=permutations,
+            missingness_permutations=permutations,
+            fairness_permutations=permutations,
+        )
+    return replace(PROFILES[profile], **overrides)
@@ -1,35 +1,106 @@
 
+import ast
 import json
-import re
 from pathlib import Path
 
 # Paths to source scripts
 BASE_DIR = Path(__file__).parent
 SCRIPTS = {
+    "config": BASE_DIR / "config.py",
+    "records": BASE_DIR / "records.py",
+    "game_index": BASE_DIR / "game_index.py",
+    "artifact_cache": BASE_DIR / "artifact_cache.py",
+    "elo": BASE_DIR / "elo.py",
+    "jungle_focus": BASE_DIR / "jungle_focus.py",
+    "season_ingest": BASE_DIR / "season_ingest.py",
     "data_processing": BASE_DIR / "data_processing.py",
+    "figure_export": BASE_DIR / "figure_export.py",
+    "exact_tests": BASE_DIR / "exact_tests.py",
+    "streaming_histogram": BASE_DIR / "streaming_histogram.py",
+    "quantile_sketch": BASE_DIR / "quantile_sketch.py",
     "eda": BASE_DIR / "eda_and_tests.py",
     "missingness": BASE_DIR / "missingness_analysis.py",
+    "feature_importance": BASE_DIR / "feature_importance.py",
     "modeling": BASE_DIR / "modeling.py"
 }
 
-OUTPUT_NB = Path(__file__).parent.parent.parent / "project04.ipynb"
+# The committed notebook at the repository root
+OUTPUT_NB = BASE_DIR.parent / "project04.ipynb"
 
-def read_script(path):
+def script_title(path):
+    """First line of a script's module docstring (its title)."""
     with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    lines = content.split('\n')
-    filtered = []
-    imports = []
-    
-    for line in lines:
-        if line.startswith("import ") or line.startswith("from "):
-            imports.append(line)
-        elif line.strip() == 'if __name__ == "__main__":' or 'def main():' in line:
-            filtered.append(line)
-        else:
-            filtered.append(line)
-            
-    return "\n".join(imports), "\n".join(filtered)
+        docstring = ast.get_docstring(ast.parse(f.read()))
+    return docstring.strip().split('\n')[0] if docstring else ''
+
+
+# The notebook imports the analysis modules rather than pasting their code:
+# process pools start clean worker processes (see artifact_cache.process_pool),
+# which can only run functions defined in an importable module, not in the
+# notebook's __main__.
+SETUP = """import sys
+import warnings
+from pathlib import Path
+
+warnings.filterwarnings('ignore')
+ANALYSIS_DIR = Path('analysis').resolve()
+sys.path.insert(0, str(ANALYSIS_DIR))
+
+from artifact_cache import ArtifactCache, run_parallel
+from config import get_config
+from data_processing import engineer_features, export_for_frontend, identify_gank_trades, load_dataset
+from eda_and_tests import (create_bivariate_plot_1, create_bivariate_plot_2, create_lii_scatter,
+                           hypothesis_test_1_objectives, hypothesis_test_2_winrate)
+from missingness_analysis import analyze_missingness
+from modeling import main as modeling_main
+from season_ingest import expand_paths
+
+# Source files, passed to the stage cache so editing a module reruns the stages that use it
+SOURCES = {sources}"""
+
+
+# Runs every stage through the artifact cache. The hypothesis tests,
+# missingness tests and models only depend on the features stage, so they run
+# side by side.
+STAGE_RUNNER = """# Run the analysis stages (cached)
+# Each stage's output is stored under a hash of its inputs and code; unchanged
+# stages load in milliseconds. Delete .cache/artifacts to force a full rerun.
+config = get_config()
+cache = ArtifactCache(config.cache_dir)
+STAGE_JOBS = 3  # independent sections run concurrently; 1 = one after another
+
+def run_features():
+    dfs, index = load_dataset(config.data_path, cache)
+    features = engineer_features(identify_gank_trades(dfs, index=index), dfs, index).to_frame()
+    export_for_frontend(features, config.output_dir)
+    return features
+
+full_df = cache.get_or_compute('features', run_features, inputs=[
+    expand_paths(config.data_path), SOURCES['config'], SOURCES['records'],
+    SOURCES['game_index'], SOURCES['elo'], SOURCES['jungle_focus'],
+    SOURCES['season_ingest'], SOURCES['data_processing'],
+])
+
+def run_hypothesis_tests():
+    test1_result, test1_fig = hypothesis_test_1_objectives(full_df, config.permutations)
+    test2_result, test2_fig = hypothesis_test_2_winrate(full_df, config.permutations)
+    return test1_result, test1_fig, test2_result, test2_fig
+
+stage_results = run_parallel({
+    'hypothesis_tests': lambda: cache.get_or_compute('hypothesis_tests', run_hypothesis_tests, inputs=[
+        full_df, config.permutations, SOURCES['eda'], SOURCES['exact_tests'],
+        SOURCES['streaming_histogram'], SOURCES['quantile_sketch'],
+    ]),
+    'missingness': lambda: cache.get_or_compute('missingness', lambda: analyze_missingness(config), inputs=[
+        expand_paths(config.data_path), config.missingness_permutations, SOURCES['missingness'],
+        SOURCES['season_ingest'], SOURCES['streaming_histogram'],
+    ]),
+    'modeling': lambda: cache.get_or_compute('modeling', lambda: modeling_main(config), inputs=[
+        config.processed_data, config.model_family, config.param_grid, config.hgb_param_grid,
+        config.cv_folds, config.fairness_permutations, config.importance_repeats,
+        SOURCES['modeling'], SOURCES['feature_importance'], SOURCES['streaming_histogram'],
+    ]),
+}, jobs=STAGE_JOBS)"""
 
 def create_cell(source, cell_type="code"):
     return {
@@ -46,17 +117,10 @@ def main():
     # 1. Header
     cells.append(create_cell("# Project 04: Bot or Top? Quantifying the Value of Jungle Gank Priority\n\n**DSC 80 Final Project**\n\n**Name:** [Your Name]\n**Date:** December 8, 2025", "markdown"))
     
-    # Imports
-    all_imports = set()
-    script_contents = {}
-    for name, path in SCRIPTS.items():
-        imps, content = read_script(path)
-        all_imports.update(imps.split('\n'))
-        script_contents[name] = content
-
-    # Add warning filter
-    cells.append(create_cell("import warnings\nwarnings.filterwarnings('ignore')\n" + "\n".join(sorted(list(all_imports))), "code"))
-    
+    # Setup: import the analysis modules
+    sources = ",\n".join(f"    '{name}': ANALYSIS_DIR / '{path.name}'" for name, path in SCRIPTS.items())
+    cells.append(create_cell(SETUP.replace('{sources}', "{\n" + sources + ",\n}"), "code"))
+
     # 2. Introduction
     intro_text = """
 ## 1. Introduction
@@ -87,12 +151,16 @@ We performed the following cleaning steps:
 4. **Feature Engineering:** Calculated `lii_diff` and defined `obj_conversion`.
 """
     cells.append(create_cell(cleaning_text, "markdown"))
-    cells.append(create_cell(script_contents["data_processing"], "code"))
+    modules = "\n".join(f"- `analysis/{path.name}`: {script_title(path)}" for path in SCRIPTS.values())
+    cells.append(create_cell("The pipeline code lives in the `analysis/` modules imported above:\n\n" + modules, "markdown"))
+    
+    # Stage runner
+    cells.append(create_cell("### Running the Pipeline\n\nThe cell below runs every stage once. Stage outputs are cached by the content of their inputs and code, so re-running the notebook only recomputes what changed.", "markdown"))
+    cells.append(create_cell(STAGE_RUNNER, "code"))
     
     # EDA
     cells.append(create_cell("### Exploratory Data Analysis\n\nUnivariate, Bivariate, and Aggregates.", "markdown"))
-    cells.append(create_cell(script_contents["eda"], "code"))
-    cells.append(create_cell("# Execute Cleaning and Generate Plots\ndfs = load_and_clean_data()\ntrade_df = identify_gank_trades(dfs)\nfull_df = engineer_features(trade_df, dfs)\n\n# Univariate\nimport plotly.express as px\npx.histogram(full_df, x='lii_diff', title='Distribution of LII Diff').show()\n\n# Bivariate\ncreate_bivariate_plot_1(full_df)\ncreate_bivariate_plot_2(full_df)\ncreate_lii_scatter(full_df)", "code"))
+    cells.append(create_cell("# Generate Plots\nimport plotly.express as px\nimport plotly.graph_objects as go\n\n# Univariate\npx.histogram(full_df, x='lii_diff', title='Distribution of LII Diff').show()\n\n# Bivariate\ngo.Figure(create_bivariate_plot_1(full_df)).show()\ngo.Figure(create_bivariate_plot_2(full_df)).show()\ngo.Figure(create_lii_scatter(full_df)).show()", "code"))
     
     # 4. Missingness
     missingness_text = """
@@ -106,15 +174,14 @@ We believe missingness in `ban` columns is **NMAR**. This is because the decisio
 2. **Test 2 (MCAR/Independent):** Check dependency on `monsterkills`. We expect this to be independent as in-game PvE stats shouldn't affect pre-game bans.
 """
     cells.append(create_cell(missingness_text, "markdown"))
-    cells.append(create_cell(script_contents["missingness"], "code"))
-    cells.append(create_cell("# Run Missingness Analysis\nanalyze_missingness()", "code"))
+    cells.append(create_cell("# Missingness Analysis results\nstage_results['missingness']", "code"))
     
     # Missingness Conclusion
     cells.append(create_cell("**Missingness Conclusion:**\nBecause missingness depends on `gamelength` (p < 0.05), we conclude the missingness is MAR with respect to game duration. However, we fail to reject independence with `monsterkills` (p > 0.05), supporting that it is not universally dependent on all variables.", "markdown"))
 
     # 5. Hypothesis Testing
     cells.append(create_cell("## 4. Hypothesis Testing", "markdown"))
-    cells.append(create_cell("# Run Hypothesis Tests\nhypothesis_test_1_objectives(full_df)\nhypothesis_test_2_winrate(full_df)", "code"))
+    cells.append(create_cell("# Hypothesis Test results\ntest1_result, test1_fig, test2_result, test2_fig = stage_results['hypothesis_tests']\ngo.Figure(test1_fig).show()\ngo.Figure(test2_fig).show()\ntest1_result, test2_result", "code"))
     
     # Hypothesis Conclusion
     cells.append(create_cell("**Hypothesis Conclusion:**\nObjective conversion differs significantly between bot and top focus (p < 0.05). Win rate differences are not significant (p > 0.05). Therefore, bot ganks convert to early advantages (Dragons), but not necessarily to guaranteed wins.", "markdown"))
@@ -135,19 +202,18 @@ We believe missingness in `ban` columns is **NMAR**. This is because the decisio
 ## 6. Baseline Model (Logistic Regression) vs 7. Final Model (Random Forest)
 
 **Baseline Features:** `gank_focus` (Nominal), `obj_conversion` (Quantitative).
-**Final Features:** `lii_diff`, `gold_diff10`, `xp_diff10` (Quantitative, Standardized), plus Baseline features.
+**Final Features:** `lii_diff`, `gold_diff10`, `xp_diff10` (Quantitative, Standardized), `elo_diff` (pre-game team Elo difference), plus Baseline features.
 **Split:** 80/20 train/test split.
 """
     cells.append(create_cell(baseline_text, "markdown"))
-    cells.append(create_cell(script_contents["modeling"], "code"))
-    cells.append(create_cell("# Run Modeling Pipeline\nmodel_results = main()", "code"))
+    cells.append(create_cell("# Modeling results\nmodel_results = stage_results['modeling']\nmodel_results", "code"))
     
     # Modeling Conclusion
     cells.append(create_cell("**Modeling Conclusion:**\nThe final model improved AUC significantly (from ~0.56 to ~0.86), meaning lane context (LII, Gold Diff) matters far more than just the gank location itself.", "markdown"))
 
     # 8. Fairness
     cells.append(create_cell("## 8. Fairness Analysis\n\n**Group X:** Bot Focus\n**Group Y:** Top Focus\n**Metric:** Accuracy Parity.", "markdown"))
-    cells.append(create_cell("# Fairness is executed within the main() modeling function above.", "markdown"))
+    cells.append(create_cell("# Fairness is computed by the modeling stage\nmodel_results['fairness']", "code"))
     
     # Fairness Conclusion
     cells.append(create_cell("**Fairness Conclusion:**\nThe model is fair with respect to gank focus (p > 0.05). We fail to reject the null hypothesis, finding no evidence of systematic bias against either strategy.", "markdown"))
@@ -7,34 +7,36 @@ import numpy as np
 import json
 from pathlib import Path
 
-# Constants
-DATA_PATH = Path(__file__).parent.parent.parent / "2025_LoL_esports_match_data_from_OraclesElixir.csv"
-OUTPUT_DIR = Path(__file__).parent.parent / "frontend" / "public" / "data"
-
-# Time window for "early game" ganks (minutes)
-EARLY_WINDOW_MIN = 10
-
-
-def load_and_clean_data():
-    """Load the Oracle's Elixir dataset and perform initial cleaning."""
-    print("Loading data...")
-    df = pd.read_csv(DATA_PATH)
-    
-    # Standardize position names
-    position_mapping = {
-        'top': 'TOP',
-        'jng': 'JNG',
-        'jungle': 'JNG',
-        'mid': 'MID',
-        'bot': 'ADC',
-        'adc': 'ADC',
-        'sup': 'SUP',
-        'support': 'SUP'
-    }
-    df['position'] = df['position'].str.lower().map(position_mapping).fillna(df['position'])
-    
-    # Filter to player-level rows (position is not null)
-    df = df[df['position'].notna()].copy()
+from artifact_cache import ArtifactCache
+from config import DATA_PATH, OUTPUT_DIR, get_config
+from elo import team_game_elo
+from game_index import GameIndex
+from jungle_focus import BASELINE_LANES, LANE_POSITIONS, POSITIONS, TRADES, score_focus, trade_mask
+from records import TeamGameRecords
+from season_ingest import POSITION_MAPPING, expand_paths, is_pattern, read_csv_files
+
+
+def load_and_clean_data(data_path=DATA_PATH, jobs=None):
+    """
+    Load the Oracle's Elixir dataset and perform initial cleaning.
+    `data_path` may also be a glob of season files, read concurrently (see
+    season_ingest.py).
+    """
+    if is_pattern(data_path):
+        paths = expand_paths(data_path)
+        print(f"Loading {len(paths)} files matching {data_path}...")
+        # Position normalization and filtering happen per file while reading
+        df = read_csv_files(data_path, jobs=jobs)
+    else:
+        print(f"Loading data from {data_path}...")
+        # Keep patch as text so that e.g. 25.10 is not read back as 25.1
+        df = pd.read_csv(data_path, dtype={'patch': str})
+        
+        # Standardize position names
+        df['position'] = df['position'].str.lower().map(POSITION_MAPPING).fillna(df['position'])
+        
+        # Filter to player-level rows (position is not null)
+        df = df[df['position'].notna()].copy()
     
     print(f"Loaded {len(df)} player-game rows")
     print(f"Unique games: {df['gameid'].nunique()}")
@@ -42,163 +44,205 @@ def load_and_clean_data():
     return df
 
 
-def identify_gank_trades(df):
+def load_dataset(data_path=DATA_PATH, cache=None, jobs=None):
+    """
+    Cleaned data plus its GameIndex.
+    
+    With an ArtifactCache, both are stored in the cache keyed on the CSV
+    contents (every matched file for a glob) and this module's code, so later
+    runs skip the CSV parse and the index build.
+    """
+    def build():
+        df = load_and_clean_data(data_path, jobs)
+        if not GameIndex.is_contiguous(df):
+            # The index needs each game's rows together
+            df = df.sort_values('gameid', kind='stable')
+        return df, GameIndex.build(df)
+    
+    if cache is None:
+        return build()
+    
+    return cache.get_or_compute('dataset', build, inputs=[
+        expand_paths(data_path), Path(__file__), Path(__file__).with_name('game_index.py'),
+        Path(__file__).with_name('season_ingest.py'),
+    ])
+
+
+def _column(rows, name, default=0):
+    """Column values as an array, or `default` everywhere if the CSV lacks it."""
+    if name in rows.columns:
+        return rows[name].to_numpy()
+    return np.full(len(rows), default)
+
+
+def _team_keys(rows):
+    return pd.MultiIndex.from_arrays([rows['gameid'].to_numpy(), rows['teamid'].to_numpy()])
+
+
+def _first_position_rows(df, position, index=None):
+    """First player row per (gameid, teamid) for one position."""
+    if index is not None:
+        return index.position_rows(df, position)
+    rows = df[df['position'] == position]
+    return rows.drop_duplicates(['gameid', 'teamid'], keep='first')
+
+
+def _lane_values(df, position, column, keys, index=None):
+    """
+    `column` from each team's first `position` row, aligned to `keys`.
+    Teams without a player at that position get 0 (missing stats stay NaN).
+    """
+    rows = _first_position_rows(df, position, index)
+    values = pd.Series(_column(rows, column), index=_team_keys(rows))
+    return values.reindex(keys, fill_value=0).to_numpy()
+
+
+def identify_gank_trades(df, timeline_focus=None, index=None, trades=TRADES, all_lanes=False):
     """
     Identify games where there's a cross-map gank trade:
     - One team's jungler gets kills/assists in bot lane early
     - The other team's jungler gets kills/assists in top lane early
     
-    We approximate this using killsat10 and assistsat10 for junglers.
+    We approximate this using killsat10 and assistsat10 for junglers and
+    laners (see jungle_focus): an active jungler's focus is bot if the ADC
+    had more early kills + assists than the top laner, top if the reverse.
+    With `all_lanes`, focus is scored over top/mid/bot instead, so a team
+    whose mid lane led gets no bot/top label. `trades` lists the lane pairs
+    that count as a trade (default bot vs top).
+    If `timeline_focus` (gameid, side, gank_focus rows from timeline_ingest)
+    is given, games covered by a timeline use its gank focus instead.
+    `index` (a GameIndex of `df`) replaces the position scans with row lookups.
+    
+    Returns a TeamGameRecords with one row per team in each trade game.
     """
-    # Focus on junglers only
-    junglers = df[df['position'] == 'JNG'].copy()
+    # One row per game-team, keyed on the team's jungler (teams without one are skipped)
+    jng = _first_position_rows(df, 'JNG', index).dropna(subset=['gameid', 'teamid'])
+    jng = jng.sort_values(['gameid', 'teamid'], kind='stable')
+    keys = _team_keys(jng)
     
-    # For each game, we need to track which lanes got jungler attention
-    # We'll use a heuristic: if the bot lane (ADC/SUP) on a team got kills/assists early,
-    # AND the jungler also got kills/assists, we infer a bot gank
-    # Similarly for top
+    # Heuristic: if jungler has killsat10 or assistsat10 > 0, they were active early
+    jng_ka10 = _column(jng, 'killsat10') + _column(jng, 'assistsat10')
     
-    # Create a game-team level summary
-    game_team_gank = []
+    # Determine gank focus: the lane with the most early laner kills +
+    # assists; ties and inactive junglers stay None
+    lanes = list(LANE_POSITIONS if all_lanes else BASELINE_LANES)
+    unknown = sorted({lane for pair in trades for lane in pair} - set(lanes))
+    if unknown:
+        raise ValueError(f"Trade lanes {unknown} are not focus lanes {lanes}; score all lanes to use them")
+    activity, shares, gank_focus = score_focus(df, keys, jng_ka10 > 0, all_lanes, index=index)
+    print("Jungle focus: " + ", ".join(
+        f"{lane} {np.count_nonzero(gank_focus == lane)}" for lane in lanes
+    ) + f", none {np.count_nonzero(pd.isna(gank_focus))}")
     
-    for (gameid, teamid), team_data in df.groupby(['gameid', 'teamid']):
-        jng_row = team_data[team_data['position'] == 'JNG']
-        top_row = team_data[team_data['position'] == 'TOP']
-        adc_row = team_data[team_data['position'] == 'ADC']
-        
-        if jng_row.empty:
-            continue
-            
-        jng_row = jng_row.iloc[0]
-        
-        # Heuristic: if jungler has killsat10 or assistsat10 > 0, they were active early
-        jng_ka10 = (jng_row.get('killsat10', 0) or 0) + (jng_row.get('assistsat10', 0) or 0)
-        
-        # Check if bot lane was involved (ADC got kills/deaths early)
-        bot_ka10 = 0
-        top_ka10 = 0
-        
-        if not adc_row.empty:
-            adc = adc_row.iloc[0]
-            bot_ka10 = (adc.get('killsat10', 0) or 0) + (adc.get('assistsat10', 0) or 0)
-        
-        if not top_row.empty:
-            top = top_row.iloc[0]
-            top_ka10 = (top.get('killsat10', 0) or 0) + (top.get('assistsat10', 0) or 0)
-        
-        # Determine gank focus: where did the jungler apply pressure?
-        # If bot lane has more early activity than top, we say "bot focus"
-        gank_focus = None
-        if jng_ka10 > 0:
-            if bot_ka10 > top_ka10:
-                gank_focus = 'bot'
-            elif top_ka10 > bot_ka10:
-                gank_focus = 'top'
-            # If equal or both 0, leave as None
-        
-        game_team_gank.append({
-            'gameid': gameid,
-            'teamid': teamid,
-            'side': jng_row.get('side'),
-            'gank_focus': gank_focus,
-            'result': jng_row.get('result'),
-            'jng_ka10': jng_ka10,
-            'bot_ka10': bot_ka10,
-            'top_ka10': top_ka10,
-        })
-    
-    gank_df = pd.DataFrame(game_team_gank)
-    
-    # Now find "trade games": games where one team focused bot and the other focused top
-    trade_games = []
-    for gameid, game_data in gank_df.groupby('gameid'):
-        if len(game_data) != 2:
-            continue
-        
-        focuses = game_data['gank_focus'].values
-        if set(focuses) == {'bot', 'top'}:
-            trade_games.append(gameid)
+    extra = {}
+    if timeline_focus is not None:
+        # Timeline-detected ganks replace the heuristic for every team they cover
+        side_keys = pd.MultiIndex.from_arrays([jng['gameid'].to_numpy(), _column(jng, 'side', None)])
+        override = timeline_focus.drop_duplicates(['gameid', 'side']).set_index(['gameid', 'side'])['gank_focus']
+        covered = side_keys.isin(override.index)
+        timeline_values = override.reindex(side_keys).to_numpy(dtype=object)
+        timeline_values[pd.isna(timeline_values)] = None
+        gank_focus = np.where(covered, timeline_values, gank_focus)
+        extra['focus_source'] = np.where(covered, 'timeline', 'stats')
+        print(f"Gank focus from timelines for {covered.sum()} of {len(covered)} team-games")
     
-    print(f"Found {len(trade_games)} cross-map trade games")
+    gank = TeamGameRecords.from_columns({
+        'gameid': jng['gameid'],
+        'teamid': jng['teamid'],
+        'league': _column(jng, 'league', None),
+        'split': _column(jng, 'split', None),
+        'patch': _column(jng, 'patch', None),
+        'date': _column(jng, 'date', None),
+        'side': _column(jng, 'side', None),
+        'gank_focus': gank_focus,
+        'result': jng['result'],
+        'jng_ka10': jng_ka10,
+        'bot_ka10': activity[:, POSITIONS.index('ADC')],
+        'top_ka10': activity[:, POSITIONS.index('TOP')],
+        'mid_ka10': activity[:, POSITIONS.index('MID')],
+        'focus_top': shares[:, 0],
+        'focus_mid': shares[:, 1],
+        'focus_bot': shares[:, 2],
+        **extra,
+    })
     
-    # Filter to only trade games
-    trade_df = gank_df[gank_df['gameid'].isin(trade_games)].copy()
+    # Now find "trade games": games where the two teams focused the lanes of a trade pair
+    is_trade = trade_mask(gank.codes['gameid'], gank['gank_focus'], trades)
+    print(f"Found {is_trade.sum() // 2} cross-map trade games")
     
-    return trade_df
+    # Filter to only trade games
+    return gank.take(is_trade)
 
 
-def engineer_features(trade_df, full_df):
+def engineer_features(trade_records, full_df, index=None):
     """
     Add engineered features for analysis and modeling.
+    `index` (a GameIndex of `full_df`) is used for the lane row lookups.
+    
+    Returns a new TeamGameRecords with objective and lane columns added.
     """
-    # Merge with full player data to get objectives and lane stats
     # For each game-team, collect:
-    # - Objective conversion (got dragon or herald within 4 mins of gank)
+    # - Objective conversion (got dragon or herald)
     # - Lane impact index (LII)
+    keys = pd.MultiIndex.from_arrays([trade_records['gameid'], trade_records['teamid']])
     
-    enriched = []
+    # Objectives - take max across rows as it's usually on the 'team' row or backfilled
+    objectives = full_df.groupby(['gameid', 'teamid'])[['dragons', 'heralds']].max().reindex(keys)
+    dragons = objectives['dragons'].fillna(0).to_numpy()
+    heralds = objectives['heralds'].fillna(0).to_numpy()
     
-    for idx, row in trade_df.iterrows():
-        gameid = row['gameid']
-        teamid = row['teamid']
-        
-        team_players = full_df[(full_df['gameid'] == gameid) & (full_df['teamid'] == teamid)]
-        
-        # Get objectives (use any player row, objectives are team-level)
-        if not team_players.empty:
-            # Objectives - take max across rows as it's usually on the 'team' row or backfilled
-            dragons = team_players['dragons'].max()
-            if np.isnan(dragons): dragons = 0
-            
-            heralds = team_players['heralds'].max()
-            if np.isnan(heralds): heralds = 0
-            
-            # Simplified: did they get dragon OR herald? (obj_conversion proxy)
-            obj_conversion = 1 if (dragons > 0 or heralds > 0) else 0
-            
-            # Lane stats
-            top_player = team_players[team_players['position'] == 'TOP']
-            bot_player = team_players[team_players['position'] == 'ADC']
-            
-            top_xpdiff10 = top_player.iloc[0].get('xpdiffat10', 0) if not top_player.empty else 0
-            bot_xpdiff10 = bot_player.iloc[0].get('xpdiffat10', 0) if not bot_player.empty else 0
-            
-            top_csdiff10 = top_player.iloc[0].get('csdiffat10', 0) if not top_player.empty else 0
-            bot_csdiff10 = bot_player.iloc[0].get('csdiffat10', 0) if not bot_player.empty else 0
-            
-            # Lane Impact Index (simple version: just the diff)
-            # More complex: weight XP and CS
-            lii_top = (top_xpdiff10 or 0) * 0.5 + (top_csdiff10 or 0) * 0.5
-            lii_bot = (bot_xpdiff10 or 0) * 0.5 + (bot_csdiff10 or 0) * 0.5
-            
-            row['dragons'] = dragons
-            row['heralds'] = heralds
-            row['obj_conversion'] = obj_conversion
-            row['top_xpdiff10'] = top_xpdiff10
-            row['bot_xpdiff10'] = bot_xpdiff10
-            row['top_csdiff10'] = top_csdiff10
-            row['bot_csdiff10'] = bot_csdiff10
-            row['lii_top'] = lii_top
-            row['lii_bot'] = lii_bot
-            row['lii_diff'] = lii_bot - lii_top
-        
-        enriched.append(row)
+    # Simplified: did they get dragon OR herald? (obj_conversion proxy)
+    obj_conversion = (dragons > 0) | (heralds > 0)
     
-    enriched_df = pd.DataFrame(enriched)
+    # Lane stats
+    top_xpdiff10 = _lane_values(full_df, 'TOP', 'xpdiffat10', keys, index)
+    bot_xpdiff10 = _lane_values(full_df, 'ADC', 'xpdiffat10', keys, index)
+    top_csdiff10 = _lane_values(full_df, 'TOP', 'csdiffat10', keys, index)
+    bot_csdiff10 = _lane_values(full_df, 'ADC', 'csdiffat10', keys, index)
     
-    return enriched_df
+    # Lane Impact Index (simple version: equal weight on XP and CS diff)
+    lii_top = top_xpdiff10 * 0.5 + top_csdiff10 * 0.5
+    lii_bot = bot_xpdiff10 * 0.5 + bot_csdiff10 * 0.5
+    
+    # Team strength: pre-game Elo over every game in the data, not just trades
+    ratings = team_game_elo(full_df).reindex(keys)
+    elo = ratings['elo'].to_numpy()
+    opp_elo = ratings['opp_elo'].to_numpy()
+    
+    return trade_records.with_columns({
+        'dragons': dragons,
+        'heralds': heralds,
+        'obj_conversion': obj_conversion,
+        'top_xpdiff10': top_xpdiff10,
+        'bot_xpdiff10': bot_xpdiff10,
+        'top_csdiff10': top_csdiff10,
+        'bot_csdiff10': bot_csdiff10,
+        'lii_top': lii_top,
+        'lii_bot': lii_bot,
+        'lii_diff': lii_bot - lii_top,
+        'elo': elo,
+        'opp_elo': opp_elo,
+        'elo_diff': elo - opp_elo,
+    })
 
 
-def export_for_frontend(df):
+def export_for_frontend(df, output_dir=OUTPUT_DIR):
     """Export processed data as JSON for the React frontend."""
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # Export full processed data
-    output_path = OUTPUT_DIR / "processed_data.json"
+    output_path = output_dir / "processed_data.json"
     df.to_json(output_path, orient='records', indent=2)
     print(f"Exported processed data to {output_path}")
     
-    # Export summary stats
+    export_summary(df, output_dir)
+    
+    return df
+
+
+def export_summary(df, output_dir=OUTPUT_DIR):
+    """Export headline summary stats for the frontend."""
     summary = {
         'total_trade_games': len(df) // 2,  # Each game has 2 rows (teams)
         'bot_focus_count': len(df[df['gank_focus'] == 'bot']),
@@ -209,27 +253,46 @@ def export_for_frontend(df):
         'top_focus_obj_rate': df[df['gank_focus'] == 'top']['obj_conversion'].mean(),
     }
     
-    summary_path = OUTPUT_DIR / "summary_stats.json"
+    summary_path = Path(output_dir) / "summary_stats.json"
     with open(summary_path, 'w') as f:
         json.dump(summary, f, indent=2)
     print(f"Exported summary stats to {summary_path}")
     
-    return df
+    return summary
+
+
+def regenerate_summary(output_dir=OUTPUT_DIR):
+    """Rebuild summary_stats.json from the existing processed data (no CSV load)."""
+    df = pd.read_json(Path(output_dir) / "processed_data.json", dtype={'patch': str})
+    return export_summary(df, output_dir)
 
 
-def main():
+def main(config=None):
     """Main data processing pipeline."""
-    # Load and clean
-    df = load_and_clean_data()
+    config = config or get_config()
+    
+    # Load and clean (cached together with the game row index)
+    df, index = load_dataset(config.data_path, ArtifactCache(config.cache_dir), config.jobs)
+    print(f"Indexed {len(index)} games")
+    
+    # Timeline-based gank focus, when timeline dumps are available
+    timeline_focus = None
+    if config.timeline_dir is not None:
+        import timeline_ingest
+        timeline_focus = timeline_ingest.load_timeline_focus(config.timeline_dir, config.jobs)
     
     # Identify gank trades
-    trade_df = identify_gank_trades(df)
+    trade_records = identify_gank_trades(df, timeline_focus, index, all_lanes=config.all_lane_focus)
     
     # Engineer features
-    enriched_df = engineer_features(trade_df, df)
+    enriched = engineer_features(trade_records, df, index)
+    print(f"Team-game records: {enriched.nbytes() / max(len(enriched), 1):.0f} bytes/row")
+    
+    # The compact records are only expanded to a DataFrame for export
+    enriched_df = enriched.to_frame()
     
     # Export for frontend
-    export_for_frontend(enriched_df)
+    export_for_frontend(enriched_df, config.output_dir)
     
     print("\nData processing complete!")
     print(f"Final dataset: {len(enriched_df)} team-game rows")
@@ -0,0 +1,388 @@
+"""
+Incremental Model Drift Monitoring
+Scores the games of each new patch with a frozen reference model as they
+arrive, one incremental run at a time, and flags performance drift.
+
+- Reference model: on the first run, build_final_model is fitted on the
+  earliest patches holding REFERENCE_FRACTION of the team-games; those
+  patches are its baseline and are not monitored. HOLDOUT_FRACTION of their
+  games (both teams of a game on the same side of the split) is held out to
+  measure the model's own Brier score per group. The model and every
+  accumulator are pickled to a state file kept per processed-data file, so
+  later runs only score rows dated after the previous run's watermark and
+  never rescore history.
+- Accumulators per patch and per gank_focus group (plus 'all') update in
+  O(1) per row: accuracy, log loss and binned ROC-AUC (StreamingMetrics from
+  incremental_training) plus Brier score, mean predicted vs observed win
+  rate and a CALIBRATION_BINS reliability table (expected calibration error).
+- Fairness per patch extends modeling.fairness_analysis: the bot vs top
+  accuracy difference and its exact test, from the accumulated counts.
+- Drift test: a Page-Hinkley test per group on the per-game Brier score, in
+  date order, against the reference model's held-out Brier score for that
+  group. It keeps the cumulative deviation from that baseline and the
+  deviation's minimum (O(1) state), alarms when the deviation rises more
+  than PH_THRESHOLD above its minimum, and restarts after each alarm. Drift
+  present from the first monitored patch therefore still alarms.
+
+Output: drift.json, one compact entry per monitored patch plus the alarms,
+for the Modeling page.
+
+Usage:
+    python analysis/cli.py drift --out /tmp/out   # after `process` has added new games
+Delete the state file (printed on every run) to start over with a new
+reference model.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import get_config
+from exact_tests import exact_diff_in_means_test
+from incremental_training import StreamingMetrics, iter_batches
+from modeling import build_final_model, load_data, prepare_features
+from trends import patch_order
+
+# Share of team-games (earliest patches first) used to fit the reference model
+REFERENCE_FRACTION = 0.5
+# Share of the reference games held out to measure the reference Brier score
+HOLDOUT_FRACTION = 0.25
+# Groups monitored separately ('all' covers every row)
+GROUPS = ('all', 'bot', 'top')
+# Reliability-table bins for the calibration error
+CALIBRATION_BINS = 10
+# Page-Hinkley tolerance and alarm threshold on the per-game Brier score
+PH_DELTA = 0.005
+PH_THRESHOLD = 10.0
+# Decimals kept in drift.json
+DECIMALS = 4
+
+
+class CalibratedMetrics(StreamingMetrics):
+    """StreamingMetrics plus Brier score and a reliability table."""
+
+    def __init__(self, calibration_bins=CALIBRATION_BINS):
+        super().__init__()
+        self.brier_sum = 0.0
+        self.bin_n = np.zeros(calibration_bins, dtype=np.int64)
+        self.bin_pred = np.zeros(calibration_bins)
+        self.bin_obs = np.zeros(calibration_bins)
+
+    def update(self, y_true, proba):
+        super().update(y_true, proba)
+        y_true = np.asarray(y_true, dtype=np.float64)
+        self.brier_sum += float(((proba - y_true) ** 2).sum())
+        bins = len(self.bin_n)
+        idx = np.minimum((proba * bins).astype(int), bins - 1)
+        self.bin_n += np.bincount(idx, minlength=bins)
+        self.bin_pred += np.bincount(idx, weights=proba, minlength=bins)
+        self.bin_obs += np.bincount(idx, weights=y_true, minlength=bins)
+
+    def ece(self):
+        """Expected calibration error: bin-size-weighted |mean predicted - observed|."""
+        if self.n == 0:
+            return None
+        filled = self.bin_n > 0
+        gaps = np.abs(self.bin_pred[filled] - self.bin_obs[filled]) / self.bin_n[filled]
+        return float((gaps * self.bin_n[filled]).sum() / self.n)
+
+    def result(self):
+        n = self.n or None
+        return {
+            **super().result(),
+            'brier': self.brier_sum / n if n else None,
+            'mean_pred': self.bin_pred.sum() / n if n else None,
+            'win_rate': self.bin_obs.sum() / n if n else None,
+            'ece': self.ece(),
+        }
+
+
+class PageHinkley:
+    """
+    Page-Hinkley test for an increase in the mean of a stream.
+
+    With a `reference` mean the deviation is measured from it; without one,
+    from the running mean of the stream (which absorbs a shift that is
+    present from the start).
+    """
+
+    def __init__(self, delta=PH_DELTA, threshold=PH_THRESHOLD, reference=None):
+        self.delta = delta
+        self.threshold = threshold
+        self.reference = reference
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0 if self.reference is None else self.reference
+        self.cumulative = 0.0
+        self.minimum = 0.0
+
+    @property
+    def statistic(self):
+        return self.cumulative - self.minimum
+
+    def update(self, x):
+        """Add one value; True (and a restart) when the test alarms."""
+        self.n += 1
+        if self.reference is None:
+            self.mean += (x - self.mean) / self.n
+        self.cumulative += x - self.mean - self.delta
+        self.minimum = min(self.minimum, self.cumulative)
+        if self.statistic > self.threshold:
+            self.reset()
+            return True
+        return False
+
+
+def state_source(config):
+    """The processed-data file a monitor state belongs to."""
+    return str(Path(config.processed_data).resolve())
+
+
+def state_path(config):
+    """Where the monitor state (reference model and accumulators) of this processed-data file is kept."""
+    key = hashlib.sha256(state_source(config).encode('utf-8')).hexdigest()[:16]
+    return Path(config.cache_dir).parent / "drift" / f"monitor-{key}.pkl"
+
+
+def load_state(path):
+    if not Path(path).exists():
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_state(state, path):
+    """Pickle the state atomically (a crash never leaves a partial file)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def reference_patches(df, fraction=REFERENCE_FRACTION):
+    """Earliest patches (release order) covering at least `fraction` of the rows."""
+    counts = df['patch'].astype(str).value_counts()
+    ordered = sorted(counts.index, key=patch_order)
+    cumulative = counts.reindex(ordered).cumsum().to_numpy()
+    n_reference = int(np.searchsorted(cumulative, fraction * len(df))) + 1
+    return ordered[:n_reference]
+
+
+def reference_baseline(model, holdout, fill_missing):
+    """Held-out Brier score of the reference model per group (None for an empty group)."""
+    X, y, _ = prepare_features(holdout, 'advanced', fill_missing)
+    brier = (model.predict_proba(X)[:, 1] - y) ** 2
+    focus = holdout['gank_focus'].to_numpy()
+    baseline = {}
+    for group in GROUPS:
+        mask = np.ones(len(holdout), dtype=bool) if group == 'all' else focus == group
+        baseline[group] = {'brier': float(brier[mask].mean()) if mask.any() else None, 'rows': int(mask.sum())}
+    return baseline
+
+
+def init_state(df, config):
+    """
+    Fit the reference model on the earliest patches, measure its held-out
+    Brier score, and start empty accumulators and drift tests.
+    """
+    from sklearn.model_selection import GroupShuffleSplit
+
+    patches = reference_patches(df)
+    reference = df[df['patch'].astype(str).isin(patches)].reset_index(drop=True)
+    # Split by game: the two teams of a game have mirrored features and complementary results
+    split = GroupShuffleSplit(n_splits=1, test_size=HOLDOUT_FRACTION, random_state=42)
+    train_idx, holdout_idx = next(split.split(reference, groups=reference['gameid']))
+    train, holdout = reference.iloc[train_idx], reference.iloc[holdout_idx]
+
+    fill_missing = config.model_family != 'hist_gb'
+    X, y, _ = prepare_features(train, 'advanced', fill_missing)
+    print(f"Fitting reference model on {len(train)} team-games from patches {', '.join(patches)}")
+    model = build_final_model(
+        X, y,
+        param_grid=config.hgb_param_grid if config.model_family == 'hist_gb' else config.param_grid,
+        cv=config.cv_folds,
+        n_jobs=config.jobs or -1,
+        family=config.model_family,
+    )
+    baseline = reference_baseline(model, holdout, fill_missing)
+    print(f"Reference Brier score on {len(holdout)} held-out team-games: {baseline['all']['brier']:.4f}")
+    return {
+        'source': state_source(config),
+        'model': model,
+        'model_family': config.model_family,
+        'fill_missing': fill_missing,
+        'reference': {'patches': patches, 'rows': len(reference), 'baseline': baseline},
+        # Latest date seen, and the games at that date (everything up to it is scored)
+        'watermark': None,
+        'watermark_games': set(),
+        'metrics': {},
+        'dates': {},
+        'ph': {group: PageHinkley(reference=baseline[group]['brier']) for group in GROUPS},
+        'alarms': [],
+        'runs': 0,
+        'rows_scored': 0,
+    }
+
+
+def new_rows(batches, state):
+    """
+    Rows not scored yet, in date order, plus the new watermark (latest date
+    streamed and the games at it). Before the first run everything outside
+    the reference patches is new; afterwards, rows after the watermark.
+    Games are assumed to arrive in date order.
+
+    Returns:
+        rows (None if there are none), watermark, watermark_games
+    """
+    parts = []
+    watermark, watermark_games = state['watermark'], set(state['watermark_games'])
+    for batch in batches:
+        date = batch['date'].astype(str)
+        if state['watermark'] is None:
+            seen = batch['patch'].astype(str).isin(state['reference']['patches'])
+        else:
+            seen = (date < state['watermark']) | (
+                (date == state['watermark']) & batch['gameid'].isin(state['watermark_games']))
+        if (~seen).any():
+            parts.append(batch[~seen.to_numpy()])
+
+        latest = date.max()
+        if watermark is None or latest > watermark:
+            watermark, watermark_games = latest, set()
+        if latest == watermark:
+            watermark_games |= set(batch.loc[(date == latest).to_numpy(), 'gameid'])
+
+    rows = None
+    if parts:
+        rows = pd.concat(parts, ignore_index=True).sort_values(['date', 'gameid'], kind='stable')
+        rows = rows.reset_index(drop=True)
+    return rows, watermark, watermark_games
+
+
+def score(state, rows):
+    """Update every accumulator and drift test with newly arrived rows."""
+    X, y, _ = prepare_features(rows, 'advanced', state['fill_missing'])
+    proba = state['model'].predict_proba(X)[:, 1]
+    patch = rows['patch'].astype(str).to_numpy()
+    focus = rows['gank_focus'].to_numpy()
+    dates = rows['date'].astype(str).to_numpy()
+
+    for p in pd.unique(patch):
+        in_patch = patch == p
+        first, last = dates[in_patch].min(), dates[in_patch].max()
+        known = state['dates'].get(p, (first, last))
+        state['dates'][p] = (min(known[0], first), max(known[1], last))
+        metrics = state['metrics'].setdefault(p, {group: CalibratedMetrics() for group in GROUPS})
+        for group in GROUPS:
+            mask = in_patch if group == 'all' else in_patch & (focus == group)
+            if mask.any():
+                metrics[group].update(y[mask], proba[mask])
+
+    brier = (proba - y) ** 2
+    for group in GROUPS:
+        test = state['ph'][group]
+        for i in (np.arange(len(rows)) if group == 'all' else np.flatnonzero(focus == group)):
+            if test.update(brier[i]):
+                state['alarms'].append({'group': group, 'patch': patch[i], 'date': dates[i],
+                                        'gameid': rows['gameid'].iloc[i]})
+
+    state['rows_scored'] += len(rows)
+
+
+def _rounded(values):
+    return {k: (round(float(v), DECIMALS) if isinstance(v, float) else v) for k, v in values.items()}
+
+
+def patch_fairness(metrics):
+    """Bot minus top accuracy for one patch, with the exact test on the 0/1 correctness counts."""
+    bot, top = metrics['bot'], metrics['top']
+    if bot.n == 0 or top.n == 0:
+        return None
+    correct_bot = np.r_[np.ones(bot.correct), np.zeros(bot.n - bot.correct)]
+    correct_top = np.r_[np.ones(top.correct), np.zeros(top.n - top.correct)]
+    diff, p_value, _, _ = exact_diff_in_means_test(correct_bot, correct_top)
+    return {'diff': round(float(diff), DECIMALS), 'p_value': round(float(p_value), DECIMALS)}
+
+
+def export(state):
+    """Compact per-patch time series and alarm list."""
+    alarms_per_patch = pd.Series([a['patch'] for a in state['alarms']], dtype=object).value_counts()
+    patches = []
+    for p in sorted(state['metrics'], key=patch_order):
+        metrics = state['metrics'][p]
+        patches.append({
+            'patch': p,
+            'first_date': state['dates'][p][0],
+            'last_date': state['dates'][p][1],
+            **{group: _rounded(metrics[group].result()) for group in GROUPS},
+            'fairness': patch_fairness(metrics),
+            'alarms': int(alarms_per_patch.get(p, 0)),
+        })
+    return {
+        'model_family': state['model_family'],
+        'reference': state['reference'],
+        'runs': state['runs'],
+        'rows_scored': state['rows_scored'],
+        'watermark': state['watermark'],
+        'page_hinkley': {'statistic': 'brier', 'delta': PH_DELTA, 'threshold': PH_THRESHOLD,
+                         'baseline': 'reference model held-out Brier score'},
+        'patches': patches,
+        'alarms': state['alarms'],
+    }
+
+
+def main(config=None):
+    """Score games added since the last run, update drift state and export drift.json."""
+    config = config or get_config()
+    path = state_path(config)
+    state = load_state(path)
+
+    if state is None:
+        print("No drift monitor state; starting one")
+        state = init_state(load_data(config.processed_data), config)
+    elif state.get('source') != state_source(config):
+        raise ValueError(
+            f"Drift state {path} belongs to {state.get('source')}, not {state_source(config)}; "
+            "delete it to start over"
+        )
+
+    rows, watermark, watermark_games = new_rows(iter_batches(config.processed_data), state)
+    if rows is None:
+        print("No new games since the last run")
+    else:
+        alarms_before = len(state['alarms'])
+        score(state, rows)
+        patches = sorted(rows['patch'].astype(str).unique(), key=patch_order)
+        print(f"Scored {len(rows)} new team-games from patches {', '.join(patches)}")
+        for alarm in state['alarms'][alarms_before:]:
+            print(f"  Drift alarm ({alarm['group']}): patch {alarm['patch']}, {alarm['date']}")
+    state['watermark'], state['watermark_games'] = watermark, watermark_games
+    state['runs'] += 1
+    save_state(state, path)
+    print(f"Monitor state saved to {path} (delete it to refit the reference model)")
+
+    results = export(state)
+    for entry in results['patches'][-5:]:
+        auc = entry['all']['auc']
+        print(f"  {entry['patch']}: n={entry['all']['rows']}, AUC {auc if auc is not None else 'n/a'}, "
+              f"Brier {entry['all']['brier']}, alarms {entry['alarms']}")
+
+    output_path = Path(config.output_dir) / "drift.json"
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nExported drift monitoring to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -4,46 +4,74 @@ For the Bot vs Top Jungle Gank Priority Analysis
 """
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import json
 from pathlib import Path
 
+from config import OUTPUT_DIR, get_config
+from exact_tests import exact_diff_in_means_test, is_binary
+from figure_export import add_vline, export_figures
+from quantile_sketch import LII_COLUMNS, pooled, sketch_columns
+from streaming_histogram import StreamingHistogram, diff_in_means_sd
+
+# Plotly's default qualitative colors, used where plotly express picked them before
+FOCUS_COLORS = {'bot': '#636efa', 'top': '#EF553B'}
+
+# Quantile bins in the binned LII chart
+LII_BINS = 10
+# Quantiles exported per LII column and gank focus
+EXPORT_QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+
+# Permuted statistics buffered before each histogram update
+STREAM_BATCH = 1000
+
 # Paths
-DATA_DIR = Path(__file__).parent.parent / "frontend" / "public" / "data"
-PROCESSED_DATA = DATA_DIR / "processed_data.json"
-OUTPUT_DIR = DATA_DIR
+PROCESSED_DATA = OUTPUT_DIR / "processed_data.json"
 
 
-def load_processed_data():
+def load_processed_data(path=PROCESSED_DATA):
     """Load the processed data from JSON."""
-    df = pd.read_json(PROCESSED_DATA)
+    df = pd.read_json(path, dtype={'patch': str})
     return df
 
 
-def export_eda_extras(df):
-    """Export additional EDA assets for rubric requirements."""
+def export_eda_extras(df, output_dir=OUTPUT_DIR):
+    """Export additional EDA assets for rubric requirements. Returns the univariate plot spec."""
     
     # 1. Head of cleaned dataframe (subset of cols)
     cols_to_show = ['gameid', 'teamid', 'gank_focus', 'result', 'obj_conversion', 'lii_diff']
     head_df = df[cols_to_show].head(5)
     head_json = head_df.to_dict(orient='records')
-    with open(OUTPUT_DIR / "head_data.json", 'w') as f:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / "head_data.json", 'w') as f:
         json.dump(head_json, f, indent=2)
         
     # 2. Univariate Plot: Distribution of Lane Impact Index Difference
-    fig_uni = px.histogram(df, x='lii_diff', nbins=30, title='Distribution of Lane Impact Index Difference')
-    fig_uni.update_layout(template='plotly_white', bargap=0.02)
-    fig_uni.write_json(OUTPUT_DIR / "plot_univariate.json")
+    fig_uni = {
+        'data': [{
+            'type': 'histogram',
+            'x': df['lii_diff'].to_numpy(),
+            'nbinsx': 30,
+            'marker': {'color': '#636efa'},
+        }],
+        'layout': {
+            'title': {'text': 'Distribution of Lane Impact Index Difference'},
+            'xaxis': {'title': {'text': 'lii_diff'}},
+            'yaxis': {'title': {'text': 'count'}},
+            'template': 'plotly_white',
+            'bargap': 0.02,
+        },
+    }
     
     # 3. Aggregate Table (Pivot): Win Rate by Side & Gank Focus
     pivot = df.groupby(['side', 'gank_focus'])['result'].mean().reset_index()
     pivot_json = pivot.to_dict(orient='records')
-    with open(OUTPUT_DIR / "pivot_table.json", 'w') as f:
+    with open(output_dir / "pivot_table.json", 'w') as f:
         json.dump(pivot_json, f, indent=2)
     
-    print("Exported EDA extras: Head, Univariate Plot, Pivot Table")
+    print("Exported EDA extras: Head, Pivot Table")
+    
+    return fig_uni
 
 
 def create_bivariate_plot_1(df):
@@ -58,31 +86,31 @@ def create_bivariate_plot_1(df):
     
     summary['result_label'] = summary['result'].map({1: 'Win', 0: 'Loss'})
     
-    fig = px.bar(
-        summary,
-        x='gank_focus',
-        y='obj_conversion',
-        color='result_label',
-        barmode='group',
-        title='Objective Conversion Rate by Gank Focus',
-        labels={
-            'gank_focus': 'Gank Focus (Lane)',
-            'obj_conversion': 'Objective Conversion Rate',
-            'result_label': 'Game Result'
+    colors = {'Win': '#4CAF50', 'Loss': '#F44336'}
+    
+    fig = {
+        'data': [
+            {
+                'type': 'bar',
+                'name': label,
+                'legendgroup': label,
+                'x': group['gank_focus'].to_numpy(),
+                'y': group['obj_conversion'].to_numpy(),
+                'marker': {'color': colors[label]},
+            }
+            for label, group in summary.groupby('result_label', sort=False)
+        ],
+        'layout': {
+            'title': {'text': 'Objective Conversion Rate by Gank Focus'},
+            'barmode': 'group',
+            'legend': {'title': {'text': 'Game Result'}},
+            'xaxis': {'title': {'text': 'Gank Focus'}},
+            'yaxis': {'title': {'text': 'Objective Conversion Rate'}, 'tickformat': '.0%'},
+            'template': 'plotly_white',
+            'height': 500,
         },
-        color_discrete_map={'Win': '#4CAF50', 'Loss': '#F44336'}
-    )
-    
-    fig.update_layout(
-        xaxis_title='Gank Focus',
-        yaxis_title='Objective Conversion Rate',
-        yaxis_tickformat='.0%',
-        template='plotly_white',
-        height=500
-    )
-    
-    # Export as JSON for frontend
-    fig.write_json(OUTPUT_DIR / "plot_obj_conversion.json")
+    }
+    
     print("Created plot: Objective Conversion Rate")
     
     return fig
@@ -103,47 +131,55 @@ def create_bivariate_plot_2(df):
     winrate_summary['ci_lower'] = winrate_summary['winrate'] - 1.96 * winrate_summary['sem']
     winrate_summary['ci_upper'] = winrate_summary['winrate'] + 1.96 * winrate_summary['sem']
     
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=winrate_summary['gank_focus'],
-        y=winrate_summary['winrate'],
-        error_y=dict(
-            type='data',
-            symmetric=False,
-            array=winrate_summary['ci_upper'] - winrate_summary['winrate'],
-            arrayminus=winrate_summary['winrate'] - winrate_summary['ci_lower']
-        ),
-        marker_color=['#2196F3', '#FF9800'],
-        text=[f"{wr:.1%}" for wr in winrate_summary['winrate']],
-        textposition='outside'
-    ))
-    
-    fig.update_layout(
-        title='Win Rate by Gank Focus (with 95% CI)',
-        xaxis_title='Gank Focus',
-        yaxis_title='Win Rate',
-        yaxis_tickformat='.0%',
-        template='plotly_white',
-        height=500
-    )
-    
-    fig.write_json(OUTPUT_DIR / "plot_winrate.json")
+    fig = {
+        'data': [{
+            'type': 'bar',
+            'x': winrate_summary['gank_focus'].to_numpy(),
+            'y': winrate_summary['winrate'].to_numpy(),
+            'error_y': {
+                'type': 'data',
+                'symmetric': False,
+                'array': (winrate_summary['ci_upper'] - winrate_summary['winrate']).to_numpy(),
+                'arrayminus': (winrate_summary['winrate'] - winrate_summary['ci_lower']).to_numpy(),
+            },
+            'marker': {'color': ['#2196F3', '#FF9800']},
+            'text': [f"{wr:.1%}" for wr in winrate_summary['winrate']],
+            'textposition': 'outside',
+        }],
+        'layout': {
+            'title': {'text': 'Win Rate by Gank Focus (with 95% CI)'},
+            'xaxis': {'title': {'text': 'Gank Focus'}},
+            'yaxis': {'title': {'text': 'Win Rate'}, 'tickformat': '.0%'},
+            'template': 'plotly_white',
+            'height': 500,
+        },
+    }
+    
     print("Created plot: Win Rate by Gank Focus")
     
     return fig
 
 
-def create_lii_scatter(df):
+def create_lii_scatter(df, sketches=None):
     """
     Additional plot: Lane Impact Index difference vs Win Probability
     Shows how lane advantage (bot vs top) correlates with winning.
+    
+    Decile edges come from mergeable KLL quantile sketches of lii_diff
+    (per gank focus, merged), so the binning works on chunked or sharded
+    data with bounded memory; pass `sketches` from quantile_sketch.sketch_columns
+    to reuse ones already built.
     """
+    if sketches is None:
+        sketches = sketch_columns(df)
+    
     # Bin LII diff for smoothing
     # Create binned scatter plot for better readability
-    # Bin LII diff into 10 quantiles
-    df_copy = df.copy()
-    df_copy['lii_bin'] = pd.qcut(df_copy['lii_diff'], q=10, labels=False, duplicates='drop')
+    # Bin LII diff into 10 quantiles (edges from the sketch; duplicate edges dropped)
+    edges = np.unique(pooled(sketches, 'lii_diff').quantiles(np.linspace(0, 1, LII_BINS + 1)))
+    df_copy = df[df['lii_diff'].notna()].copy()
+    # Right-closed bins like pd.qcut; values beyond the sketched extremes fall in the end bins
+    df_copy['lii_bin'] = np.searchsorted(edges[1:-1], df_copy['lii_diff'].to_numpy(), side='left')
     
     # Calculate mean win rate and mean LII for each bin, split by gank focus
     binned = df_copy.groupby(['gank_focus', 'lii_bin']).agg({
@@ -154,47 +190,79 @@ def create_lii_scatter(df):
     
     binned = binned.rename(columns={'result': 'win_rate', 'gameid': 'count'})
     
-    fig = px.scatter(
-        binned,
-        x='lii_diff',
-        y='win_rate',
-        color='gank_focus',
-        size='count',
-        title='Win Probability vs Lane Impact Index (Binned)',
-        labels={
-            'lii_diff': 'Lane Impact Index Difference (Bot - Top)',
-            'win_rate': 'Win Probability',
-            'gank_focus': 'Gank Focus'
+    # Marker area proportional to bin count, largest marker 20px (plotly express default)
+    sizeref = 2.0 * binned['count'].max() / (20 ** 2)
+    
+    markers = []
+    trends = []
+    for focus, subset in binned.groupby('gank_focus'):
+        color = FOCUS_COLORS.get(focus)
+        markers.append({
+            'type': 'scatter',
+            'mode': 'markers',
+            'name': focus,
+            'legendgroup': focus,
+            'x': subset['lii_diff'].to_numpy(),
+            'y': subset['win_rate'].to_numpy(),
+            'marker': {
+                'color': color,
+                'size': subset['count'].to_numpy(),
+                'sizemode': 'area',
+                'sizeref': sizeref,
+            },
+        })
+        # Add lines connecting the dots
+        subset = subset.sort_values('lii_diff')
+        trends.append({
+            'type': 'scatter',
+            'mode': 'lines',
+            'name': f'{focus} trend',
+            'legendgroup': focus,
+            'x': subset['lii_diff'].to_numpy(),
+            'y': subset['win_rate'].to_numpy(),
+            'line': {'width': 2, 'dash': 'dot', 'color': color},
+            'showlegend': False,
+        })
+    
+    fig = {
+        'data': markers + trends,
+        'layout': {
+            'title': {'text': 'Win Probability vs Lane Impact Index (Binned)'},
+            'legend': {'title': {'text': 'Gank Focus'}},
+            'xaxis': {'title': {'text': 'Lane Impact Index Difference (Bot - Top)'}},
+            'yaxis': {'title': {'text': 'Win Probability'}, 'tickformat': '.0%'},
+            'template': 'plotly_white',
+            'height': 500,
         },
-        trendline=None # No trendline needed as points themselves show the trend
-    )
-    
-    # Add lines connecting the dots
-    for focus in binned['gank_focus'].unique():
-        subset = binned[binned['gank_focus'] == focus].sort_values('lii_diff')
-        fig.add_trace(go.Scatter(
-            x=subset['lii_diff'],
-            y=subset['win_rate'],
-            mode='lines',
-            name=f'{focus} trend',
-            line=dict(width=2, dash='dot'),
-            showlegend=False,
-            marker_color=fig.data[0].marker.color if focus == fig.data[0].name else fig.data[1].marker.color
-        ))
-
-    fig.update_layout(
-        template='plotly_white',
-        height=500,
-        yaxis_tickformat='.0%'
-    )
+    }
     
-    fig.write_json(OUTPUT_DIR / "plot_lii_scatter.json")
     print("Created plot: LII Scatter")
     
     return fig
 
 
-def permutation_test(group1, group2, test_stat_func, n_permutations=10000):
+def export_lii_quantiles(sketches, output_dir=OUTPUT_DIR):
+    """Export sketched quantiles of every LII column per gank focus."""
+    quantiles = {
+        'quantiles': list(EXPORT_QUANTILES),
+        'columns': {},
+    }
+    for column in LII_COLUMNS:
+        quantiles['columns'][column] = {
+            focus: {
+                'n': sketch.n,
+                'values': [None if np.isnan(v) else float(v) for v in sketch.quantiles(EXPORT_QUANTILES)],
+            }
+            for (col, focus), sketch in sorted(sketches.items()) if col == column
+        }
+    
+    with open(Path(output_dir) / "lii_quantiles.json", 'w') as f:
+        json.dump(quantiles, f, indent=2)
+    print(f"Exported LII quantiles for {len(sketches)} column/focus sketches")
+    return quantiles
+
+
+def permutation_test(group1, group2, test_stat_func, n_permutations=10000, histogram=None, rng=None):
     """
     Generic permutation test.
     
@@ -203,31 +271,64 @@ def permutation_test(group1, group2, test_stat_func, n_permutations=10000):
         group2: Data for group 2
         test_stat_func: Function to calculate test statistic (takes two groups)
         n_permutations: Number of permutations
+        histogram: StreamingHistogram the null statistics are streamed into
+            (default: bins centered on 0 spanning the permutation spread of a
+            difference in means; other statistics still get an exact p-value)
+        rng: numpy Generator or seed to shuffle with (never the global np.random)
     
     Returns:
-        observed_stat, p_value, null_distribution
+        observed_stat, p_value, null_histogram
     """
     observed_stat = test_stat_func(group1, group2)
     combined = np.concatenate([group1, group2])
     n1 = len(group1)
+    rng = np.random.default_rng(rng)
     
-    null_distribution = []
+    if histogram is None:
+        histogram = StreamingHistogram.around(0.0, diff_in_means_sd(combined, n1), observed_stat)
+    
+    # Null statistics are binned in batches, so memory stays constant
+    batch = []
     for _ in range(n_permutations):
-        shuffled = np.random.permutation(combined)
+        shuffled = rng.permutation(combined)
         perm_group1 = shuffled[:n1]
         perm_group2 = shuffled[n1:]
-        null_stat = test_stat_func(perm_group1, perm_group2)
-        null_distribution.append(null_stat)
+        batch.append(test_stat_func(perm_group1, perm_group2))
+        if len(batch) == STREAM_BATCH:
+            histogram.update(batch)
+            batch = []
+    histogram.update(batch)
+    
+    # Two-tailed p-value (exact tail count, not binned)
+    return observed_stat, histogram.p_value, histogram
+
+
+def diff_in_means_test(group1, group2, n_permutations=10000, exact='auto', seed=42):
+    """
+    Difference-in-means test shared by both hypothesis tests.
     
-    null_distribution = np.array(null_distribution)
+    With exact='auto' the exact hypergeometric null is used whenever both groups
+    are 0/1 data, otherwise a Monte Carlo permutation test is run, seeded with
+    `seed` so repeated runs give the same p-value.
     
-    # Two-tailed p-value
-    p_value = np.mean(np.abs(null_distribution) >= np.abs(observed_stat))
+    Returns:
+        observed_stat, p_value, method ('exact' or 'permutation'), null_trace
+        (an unstyled plotly trace showing the null distribution)
+    """
+    if exact is True or (exact == 'auto' and is_binary(group1, group2)):
+        observed, p_value, support, pmf = exact_diff_in_means_test(group1, group2)
+        trace = {'type': 'bar', 'x': support, 'y': pmf, 'name': 'Exact Null Distribution'}
+        return observed, p_value, 'exact', trace
     
-    return observed_stat, p_value, null_distribution
+    def diff_means(g1, g2):
+        return np.mean(g1) - np.mean(g2)
+    
+    observed, p_value, null_hist = permutation_test(group1, group2, diff_means, n_permutations, rng=seed)
+    trace = null_hist.trace()
+    return observed, p_value, 'permutation', trace
 
 
-def hypothesis_test_1_objectives(df):
+def hypothesis_test_1_objectives(df, n_permutations=10000, exact='auto', seed=42):
     """
     Hypothesis Test #1: Bot vs Top Gank Value (Objectives)
     H0: Average objective conversion rate is the same for bot and top gank focus
@@ -236,54 +337,40 @@ def hypothesis_test_1_objectives(df):
     bot_obj = df[df['gank_focus'] == 'bot']['obj_conversion'].values
     top_obj = df[df['gank_focus'] == 'top']['obj_conversion'].values
     
-    def diff_means(g1, g2):
-        return np.mean(g1) - np.mean(g2)
-    
-    observed, p_value, null_dist = permutation_test(bot_obj, top_obj, diff_means)
+    observed, p_value, method, null_trace = diff_in_means_test(bot_obj, top_obj, n_permutations, exact, seed)
     
     # Create visualization of null distribution
-    fig = go.Figure()
-    
-    fig.add_trace(go.Histogram(
-        x=null_dist,
-        name='Null Distribution',
-        marker_color='lightblue'
-    ))
-    
-    fig.add_vline(
-        x=observed,
-        line_dash='dash',
-        line_color='red',
-        annotation_text=f'Observed: {observed:.4f}',
-        annotation_position='top right'
-    )
-    
-    fig.update_layout(
-        title=f'Hypothesis Test 1: Objective Conversion Rate Difference<br>p-value = {p_value:.4f}',
-        xaxis_title='Difference in Mean Objective Conversion (Bot - Top)',
-        yaxis_title='Frequency',
-        template='plotly_white',
-        height=500,
-        bargap=0.02
-    )
-    
-    fig.write_json(OUTPUT_DIR / "test1_objectives.json")
+    fig = {
+        'data': [{**null_trace, 'marker': {'color': 'lightblue'}}],
+        'layout': {
+            'title': {'text': f'Hypothesis Test 1: Objective Conversion Rate Difference<br>p-value = {p_value:.4f}'},
+            'xaxis': {'title': {'text': 'Difference in Mean Objective Conversion (Bot - Top)'}},
+            'yaxis': {'title': {'text': 'Probability' if method == 'exact' else 'Frequency'}},
+            'template': 'plotly_white',
+            'height': 500,
+            'bargap': 0.02,
+        },
+    }
+    add_vline(fig, observed, text=f'Observed: {observed:.4f}')
     
     result = {
         'test_name': 'Objective Conversion Rate (Bot vs Top)',
         'observed_stat': float(observed),
         'p_value': float(p_value),
+        'method': method,
         'bot_mean': float(np.mean(bot_obj)),
         'top_mean': float(np.mean(top_obj)),
         'interpretation': 'Significant' if p_value < 0.05 else 'Not significant'
     }
+    if method == 'permutation':
+        result['n_permutations'] = n_permutations
     
     print(f"Test 1 - Objectives: p-value = {p_value:.4f}, observed = {observed:.4f}")
     
-    return result
+    return result, fig
 
 
-def hypothesis_test_2_winrate(df):
+def hypothesis_test_2_winrate(df, n_permutations=10000, exact='auto', seed=42):
     """
     Hypothesis Test #2: Bot vs Top Gank Impact on Win Rate
     H0: Win rate is the same for bot and top gank focus
@@ -292,71 +379,69 @@ def hypothesis_test_2_winrate(df):
     bot_wins = df[df['gank_focus'] == 'bot']['result'].values
     top_wins = df[df['gank_focus'] == 'top']['result'].values
     
-    def diff_means(g1, g2):
-        return np.mean(g1) - np.mean(g2)
-    
-    observed, p_value, null_dist = permutation_test(bot_wins, top_wins, diff_means)
+    observed, p_value, method, null_trace = diff_in_means_test(bot_wins, top_wins, n_permutations, exact, seed)
     
     # Create visualization
-    fig = go.Figure()
-    
-    fig.add_trace(go.Histogram(
-        x=null_dist,
-        name='Null Distribution',
-        marker_color='lightgreen'
-    ))
-    
-    fig.add_vline(
-        x=observed,
-        line_dash='dash',
-        line_color='red',
-        annotation_text=f'Observed: {observed:.4f}',
-        annotation_position='top right'
-    )
-    
-    fig.update_layout(
-        title=f'Hypothesis Test 2: Win Rate Difference<br>p-value = {p_value:.4f}',
-        xaxis_title='Difference in Win Rate (Bot - Top)',
-        yaxis_title='Frequency',
-        template='plotly_white',
-        height=500,
-        bargap=0.02
-    )
-    
-    fig.write_json(OUTPUT_DIR / "test2_winrate.json")
+    fig = {
+        'data': [{**null_trace, 'marker': {'color': 'lightgreen'}}],
+        'layout': {
+            'title': {'text': f'Hypothesis Test 2: Win Rate Difference<br>p-value = {p_value:.4f}'},
+            'xaxis': {'title': {'text': 'Difference in Win Rate (Bot - Top)'}},
+            'yaxis': {'title': {'text': 'Probability' if method == 'exact' else 'Frequency'}},
+            'template': 'plotly_white',
+            'height': 500,
+            'bargap': 0.02,
+        },
+    }
+    add_vline(fig, observed, text=f'Observed: {observed:.4f}')
     
     result = {
         'test_name': 'Win Rate (Bot vs Top)',
         'observed_stat': float(observed),
         'p_value': float(p_value),
+        'method': method,
         'bot_winrate': float(np.mean(bot_wins)),
         'top_winrate': float(np.mean(top_wins)),
         'interpretation': 'Significant' if p_value < 0.05 else 'Not significant'
     }
+    if method == 'permutation':
+        result['n_permutations'] = n_permutations
     
     print(f"Test 2 - Win Rate: p-value = {p_value:.4f}, observed = {observed:.4f}")
     
-    return result
+    return result, fig
 
 
-def main():
+def main(config=None):
     """Run all EDA and hypothesis tests."""
+    config = config or get_config()
+    output_dir = Path(config.output_dir)
+    
     print("Loading processed data...")
-    df = load_processed_data()
+    df = load_processed_data(config.processed_data)
     
     print(f"\nDataset: {len(df)} rows")
     print(f"Bot focus: {len(df[df['gank_focus'] == 'bot'])}")
     print(f"Top focus: {len(df[df['gank_focus'] == 'top'])}")
     
+    print("\n=== Sketching LII Quantiles ===")
+    sketches = sketch_columns(df, jobs=config.jobs)
+    export_lii_quantiles(sketches, output_dir)
+    
     print("\n=== Creating Visualizations ===")
-    export_eda_extras(df)
-    create_bivariate_plot_1(df)
-    create_bivariate_plot_2(df)
-    create_lii_scatter(df)
+    figures = {
+        "plot_univariate.json": export_eda_extras(df, output_dir),
+        "plot_obj_conversion.json": create_bivariate_plot_1(df),
+        "plot_winrate.json": create_bivariate_plot_2(df),
+        "plot_lii_scatter.json": create_lii_scatter(df, sketches),
+    }
     
     print("\n=== Running Hypothesis Tests ===")
-    test1_result = hypothesis_test_1_objectives(df)
-    test2_result = hypothesis_test_2_winrate(df)
+    test1_result, figures["test1_objectives.json"] = hypothesis_test_1_objectives(df, config.permutations)
+    test2_result, figures["test2_winrate.json"] = hypothesis_test_2_winrate(df, config.permutations)
+    
+    print("\n=== Exporting Figures ===")
+    export_figures(figures, output_dir, jobs=config.jobs)
     
     # Export test results
     test_results = {
@@ -364,11 +449,11 @@ def main():
         'test2': test2_result
     }
     
-    with open(OUTPUT_DIR / "hypothesis_tests.json", 'w') as f:
+    with open(output_dir / "hypothesis_tests.json", 'w') as f:
         json.dump(test_results, f, indent=2)
     
     print("\n=== Analysis Complete ===")
-    print(f"Results exported to {OUTPUT_DIR}")
+    print(f"Results exported to {output_dir}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""
+Team Elo Ratings
+Pre-game Elo rating of every team in every game, used as a team-strength
+covariate (`elo_diff`) so win-rate comparisons by gank focus are not simply
+picking up stronger teams.
+
+Games are rated in date order over the full dataset, not just trade games.
+The Elo update is sequential, but a game only reads and writes its own two
+teams' ratings, so:
+
+- Ratings live in a float array indexed by integer team code.
+- Games are scheduled into rounds in which no team plays twice: a game's
+  round is one after the latest round of either of its teams (a cheap
+  integer pass).
+- All games of a round are updated at once with numpy fancy indexing.
+
+This gives the same ratings as a game-by-game loop while the floating-point
+work is vectorized; a decade of pro games is rated in well under a second.
+
+Usage:
+    python analysis/elo.py   # prints the current top-rated teams
+"""
+import numpy as np
+import pandas as pd
+
+from config import get_config
+
+INITIAL_RATING = 1500.0
+# Rating points exchanged for a fully unexpected result
+K_FACTOR = 32.0
+# A difference of SCALE points means 10:1 expected odds
+SCALE = 400.0
+
+
+def game_pairs(df):
+    """
+    One row per two-team game in date order (ties keep file order), with
+    integer team codes.
+
+    Returns:
+        (games, teams): games has columns gameid, team_a, team_b, score_a
+        (1 if team_a won); teams maps each code back to its teamid
+    """
+    rows = df[['gameid', 'teamid', 'date', 'result']].dropna(subset=['teamid'])
+    rows = rows.drop_duplicates(['gameid', 'teamid'])
+    # Only games with exactly two known teams can be rated
+    rows = rows[rows.groupby('gameid', sort=False)['teamid'].transform('size') == 2]
+
+    slot = rows.groupby('gameid', sort=False).cumcount().to_numpy()
+    first = rows[slot == 0].reset_index(drop=True)
+    second = rows[slot == 1].set_index('gameid').reindex(first['gameid']).reset_index()
+    codes, teams = pd.factorize(pd.concat([first['teamid'], second['teamid']], ignore_index=True))
+
+    games = pd.DataFrame({
+        'gameid': first['gameid'],
+        'date': pd.to_datetime(first['date'], errors='coerce'),
+        'team_a': codes[:len(first)],
+        'team_b': codes[len(first):],
+        'score_a': first['result'].to_numpy(dtype=np.float64),
+    })
+    games = games.sort_values('date', kind='stable', na_position='last').reset_index(drop=True)
+    return games, teams
+
+
+def schedule_rounds(team_a, team_b, n_teams):
+    """Round of each game such that no team plays twice in a round and each team's games stay in order."""
+    last = [0] * n_teams
+    rounds = []
+    for a, b in zip(team_a.tolist(), team_b.tolist()):
+        r = max(last[a], last[b]) + 1
+        last[a] = last[b] = r
+        rounds.append(r)
+    return np.array(rounds, dtype=np.int64)
+
+
+def rate_games(team_a, team_b, score_a, n_teams, k=K_FACTOR, initial=INITIAL_RATING):
+    """
+    Sequential Elo over games in order.
+
+    Returns:
+        (pre_a, pre_b, ratings): each team's rating before every game, and
+        the final rating of every team code
+    """
+    team_a = np.asarray(team_a, dtype=np.int64)
+    team_b = np.asarray(team_b, dtype=np.int64)
+    score_a = np.asarray(score_a, dtype=np.float64)
+
+    ratings = np.full(n_teams, initial)
+    pre_a = np.empty(len(team_a))
+    pre_b = np.empty(len(team_a))
+    if len(team_a) == 0:
+        return pre_a, pre_b, ratings
+
+    rounds = schedule_rounds(team_a, team_b, n_teams)
+    order = np.argsort(rounds, kind='stable')
+    boundaries = np.flatnonzero(np.diff(rounds[order])) + 1
+    for games in np.split(order, boundaries):
+        a, b = team_a[games], team_b[games]
+        ra, rb = ratings[a], ratings[b]
+        expected_a = 1.0 / (1.0 + 10.0 ** ((rb - ra) / SCALE))
+        delta = k * (score_a[games] - expected_a)
+        ratings[a] = ra + delta
+        ratings[b] = rb - delta
+        pre_a[games] = ra
+        pre_b[games] = rb
+    return pre_a, pre_b, ratings
+
+
+def team_game_elo(df, k=K_FACTOR, initial=INITIAL_RATING):
+    """
+    Pre-game ratings for every (gameid, teamid) in `df`.
+
+    Returns:
+        DataFrame indexed by (gameid, teamid) with columns elo and opp_elo
+    """
+    games, teams = game_pairs(df)
+    pre_a, pre_b, _ = rate_games(games['team_a'], games['team_b'], games['score_a'], len(teams), k, initial)
+
+    index = pd.MultiIndex.from_arrays([
+        np.concatenate([games['gameid'].to_numpy(), games['gameid'].to_numpy()]),
+        np.concatenate([teams[games['team_a']], teams[games['team_b']]]),
+    ], names=['gameid', 'teamid'])
+    return pd.DataFrame({
+        'elo': np.concatenate([pre_a, pre_b]),
+        'opp_elo': np.concatenate([pre_b, pre_a]),
+    }, index=index)
+
+
+def main(config=None):
+    """Rate every game in the dataset and print the highest-rated teams."""
+    import time
+
+    from data_processing import load_and_clean_data
+
+    config = config or get_config()
+    df = load_and_clean_data(config.data_path)
+
+    start = time.perf_counter()
+    games, teams = game_pairs(df)
+    _, _, ratings = rate_games(games['team_a'], games['team_b'], games['score_a'], len(teams))
+    print(f"Rated {len(games)} games for {len(teams)} teams in {time.perf_counter() - start:.3f} s")
+
+    names = df.drop_duplicates('teamid').set_index('teamid')['teamname'] if 'teamname' in df.columns else None
+    print("\nTop 10 teams by current Elo:")
+    for code in np.argsort(ratings)[::-1][:10]:
+        label = names.get(teams[code], teams[code]) if names is not None else teams[code]
+        print(f"  {label}: {ratings[code]:.0f}")
+
+
+if __name__ == "__main__":
+    main()
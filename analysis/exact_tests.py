@@ -0,0 +1,88 @@
+"""
+Exact Permutation Tests for Binary Outcomes
+
+For 0/1 data the permutation distribution of the difference in group means is
+known in closed form: after pooling, the number of ones that land in group 1
+is hypergeometric. This gives the full null distribution and an exact p-value
+(no sampling error) in microseconds, instead of thousands of Monte Carlo
+shuffles.
+"""
+import numpy as np
+
+# Relative tolerance when comparing |null stat| against |observed stat|, so
+# that floating point noise doesn't drop the observed value from its own tail.
+TIE_TOLERANCE = 1e-9
+
+
+def is_binary(*arrays):
+    """True if every value in every array is 0 or 1 (booleans count)."""
+    for arr in arrays:
+        arr = np.asarray(arr)
+        if arr.dtype.kind not in 'biuf':
+            return False
+        if not np.isin(arr, (0, 1)).all():
+            return False
+    return True
+
+
+def exact_null_distribution(n1, n2, n_ones):
+    """
+    Exact null distribution of mean(group1) - mean(group2) when `n_ones` ones
+    are randomly split between groups of size n1 and n2.
+
+    Returns:
+        support: sorted possible values of the difference in means
+        pmf: probability of each support value
+    """
+    from scipy.stats import hypergeom
+
+    n = n1 + n2
+    ones_in_1 = np.arange(max(0, n_ones - n2), min(n1, n_ones) + 1)
+    pmf = hypergeom.pmf(ones_in_1, n, n_ones, n1)
+    support = ones_in_1 / n1 - (n_ones - ones_in_1) / n2
+    return support, pmf
+
+
+def exact_diff_in_means_test(group1, group2):
+    """
+    Two-tailed exact test for a difference in means of two 0/1 samples.
+    Equivalent to a permutation test with every possible relabeling.
+
+    Returns:
+        observed_stat, p_value, support, pmf
+    """
+    group1 = np.asarray(group1)
+    group2 = np.asarray(group2)
+    n1, n2 = len(group1), len(group2)
+    observed = np.mean(group1) - np.mean(group2)
+
+    support, pmf = exact_null_distribution(n1, n2, int(group1.sum() + group2.sum()))
+    threshold = abs(observed) * (1 - TIE_TOLERANCE) - TIE_TOLERANCE
+    p_value = min(1.0, float(pmf[np.abs(support) >= threshold].sum()))
+
+    return observed, p_value, support, pmf
+
+
+def exact_sign_flip_test(diffs):
+    """
+    Two-tailed exact sign-flip test for the mean of paired differences in
+    {-1, 0, 1} (paired 0/1 outcomes). Zero differences are unaffected by a
+    flip, and the number of positive non-zero differences is Binomial(m, 1/2).
+
+    Returns:
+        observed_stat, p_value
+    """
+    from scipy.stats import binom
+
+    diffs = np.asarray(diffs)
+    n = len(diffs)
+    observed = diffs.mean()
+    m = int(np.count_nonzero(diffs))
+
+    positives = np.arange(m + 1)
+    support = (2 * positives - m) / n
+    pmf = binom.pmf(positives, m, 0.5)
+    threshold = abs(observed) * (1 - TIE_TOLERANCE) - TIE_TOLERANCE
+    p_value = min(1.0, float(pmf[np.abs(support) >= threshold].sum()))
+
+    return observed, p_value
@@ -0,0 +1,158 @@
+"""
+Permutation Feature Importance
+Test-set permutation importance for the final model, with repeat-based
+confidence intervals and grouped importances for correlated features.
+
+Impurity importances (RandomForest.feature_importances_) favour continuous,
+high-cardinality features such as lii_diff. Permutation importance instead
+measures how much the test ROC-AUC drops when a feature's values are
+shuffled. Correlated features are also shuffled together as a group
+(e.g. every lii_* column), since shuffling one of them alone understates
+their shared contribution.
+
+- The unshuffled test predictions are computed once and reused as the
+  baseline for every feature and repeat.
+- Each feature (or group) is scored in a single predict_proba call over a
+  stacked batch of all its shuffled copies.
+- Features and groups are spread across worker processes.
+"""
+import fnmatch
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import process_pool
+
+# Correlated features that are also permuted together, as glob patterns
+FEATURE_GROUPS = {
+    'lii': ['lii_*'],
+    'xpdiff10': ['*_xpdiff10'],
+}
+# Repeats per feature (confidence intervals come from their spread)
+N_REPEATS = 30
+# Upper bound on rows scored in one predict_proba call
+BATCH_ROWS = 500_000
+# z value for the 95% confidence interval of the mean importance
+Z_95 = 1.96
+
+# Worker state, set once per process by _init_worker
+_state = {}
+
+
+def resolve_groups(feature_names, groups=FEATURE_GROUPS):
+    """Map each group name to the column indices its patterns match (empty groups dropped)."""
+    resolved = {}
+    for name, patterns in groups.items():
+        columns = [i for i, feature in enumerate(feature_names)
+                   if any(fnmatch.fnmatch(feature, p) for p in patterns)]
+        if columns:
+            resolved[name] = columns
+    return resolved
+
+
+def _roc_auc(y_true, scores):
+    from sklearn.metrics import roc_auc_score
+    return roc_auc_score(y_true, scores)
+
+
+def _predict_proba(model, X):
+    """
+    Positive-class probabilities for an ndarray, passed as a DataFrame with
+    the fitted column names when the model was fitted on one (as in modeling).
+    """
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        X = pd.DataFrame(X, columns=names)
+    return model.predict_proba(X)[:, 1]
+
+
+def _init_worker(model, X, y, baseline_score):
+    _state.update(model=model, X=X, y=y, baseline_score=baseline_score)
+
+
+def _score_columns(columns, seed, n_repeats):
+    """
+    Worker: AUC drop for each of `n_repeats` joint shuffles of `columns`.
+    The shuffled copies are stacked and scored in as few calls as possible.
+    """
+    model, X, y = _state['model'], _state['X'], _state['y']
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    per_batch = max(1, BATCH_ROWS // n)
+
+    drops = []
+    for start in range(0, n_repeats, per_batch):
+        repeats = min(per_batch, n_repeats - start)
+        stacked = np.tile(X, (repeats, 1))
+        for r in range(repeats):
+            # One permutation per repeat, shared by every column in a group
+            order = rng.permutation(n)
+            stacked[r * n:(r + 1) * n, columns] = X[order][:, columns]
+        proba = _predict_proba(model, stacked)
+        for r in range(repeats):
+            drops.append(_state['baseline_score'] - _roc_auc(y, proba[r * n:(r + 1) * n]))
+    return np.array(drops)
+
+
+def _summary(drops):
+    mean = float(drops.mean())
+    std = float(drops.std(ddof=1)) if len(drops) > 1 else 0.0
+    half_width = Z_95 * std / np.sqrt(len(drops))
+    return {
+        'mean': mean,
+        'std': std,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+    }
+
+
+def permutation_importance(model, X_test, y_test, feature_names, groups=FEATURE_GROUPS,
+                           n_repeats=N_REPEATS, jobs=None, seed=42):
+    """
+    ROC-AUC drop when each feature, and each correlated feature group, is shuffled.
+
+    Returns:
+        dict with the baseline test AUC, the repeat count, and per-feature and
+        per-group {mean, std, ci_low, ci_high} sorted by mean importance
+    """
+    X = np.asarray(X_test, dtype=np.float64)
+    y = np.asarray(y_test)
+
+    # Cached baseline: the unshuffled predictions are scored once
+    baseline_score = _roc_auc(y, _predict_proba(model, X))
+
+    tasks = [('feature', name, [i]) for i, name in enumerate(feature_names)]
+    tasks += [('group', name, columns) for name, columns in resolve_groups(feature_names, groups).items()]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    if jobs == 1:
+        _init_worker(model, X, y, baseline_score)
+        drops = [_score_columns(columns, s, n_repeats) for (_, _, columns), s in zip(tasks, seeds)]
+    else:
+        with process_pool(jobs, initializer=_init_worker,
+                          initargs=(model, X, y, baseline_score)) as pool:
+            drops = list(pool.map(
+                _score_columns,
+                [columns for _, _, columns in tasks], seeds, [n_repeats] * len(tasks)
+            ))
+
+    result = {
+        'scoring': 'roc_auc',
+        'baseline_score': float(baseline_score),
+        'n_repeats': n_repeats,
+        'features': {},
+        'groups': {},
+    }
+    for (kind, name, columns), task_drops in zip(tasks, drops):
+        summary = _summary(task_drops)
+        if kind == 'group':
+            summary['members'] = [feature_names[i] for i in columns]
+            result['groups'][name] = summary
+        else:
+            result['features'][name] = summary
+
+    for key in ('features', 'groups'):
+        result[key] = dict(sorted(result[key].items(), key=lambda item: item[1]['mean'], reverse=True))
+    return result
@@ -0,0 +1,161 @@
+"""
+Figure Export Stage
+Renders plotly figure specs (plain dicts) to JSON for the frontend in a
+worker pool, skipping figures whose data has not changed since the last run.
+"""
+import base64
+import hashlib
+import json
+import os
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import numpy as np
+
+from artifact_cache import process_pool
+
+try:
+    import orjson
+except ImportError:  # fall back to plotly's own (slower) encoder
+    orjson = None
+
+# Content hashes of the last exported specs, kept next to the figures
+MANIFEST_NAME = ".figure_hashes.json"
+
+
+def add_vline(spec, x, text=None, color='red', dash='dash'):
+    """Spec equivalent of plotly's `fig.add_vline` (full-height line plus label)."""
+    layout = spec.setdefault('layout', {})
+    layout.setdefault('shapes', []).append({
+        'type': 'line', 'xref': 'x', 'yref': 'paper',
+        'x0': x, 'x1': x, 'y0': 0, 'y1': 1,
+        'line': {'color': color, 'dash': dash},
+    })
+    if text is not None:
+        layout.setdefault('annotations', []).append({
+            'xref': 'x', 'yref': 'paper', 'x': x, 'y': 1,
+            'text': text, 'showarrow': False,
+            'xanchor': 'left', 'yanchor': 'bottom',
+        })
+    return spec
+
+
+def _update_hash(h, obj):
+    """Feed a spec (nested dicts/lists/arrays) into a hash in a stable order."""
+    if isinstance(obj, dict):
+        h.update(b'{')
+        for key in sorted(obj):
+            h.update(str(key).encode())
+            _update_hash(h, obj[key])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'[')
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b']')
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype.str}{obj.shape}".encode())
+        if obj.dtype.kind == 'O':
+            h.update(repr(obj.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    else:
+        h.update(repr(obj).encode())
+
+
+def spec_hash(spec):
+    """SHA-256 of a figure spec's contents."""
+    h = hashlib.sha256()
+    _update_hash(h, spec)
+    return h.hexdigest()
+
+
+def _typed_array(arr):
+    """Encode a numeric array the way plotly does ({'dtype', 'bdata'} base64)."""
+    if arr.dtype.kind == 'b':
+        arr, dtype = arr.astype('<u1'), 'u1'
+    elif arr.dtype.kind in 'iu' and arr.size and np.abs(arr).max() < 2**31:
+        arr, dtype = arr.astype('<i4'), 'i4'
+    else:
+        arr, dtype = arr.astype('<f8'), 'f8'
+    spec = {'dtype': dtype, 'bdata': base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode('ascii')}
+    if arr.ndim > 1:
+        spec['shape'] = ','.join(str(n) for n in arr.shape)
+    return spec
+
+
+def _orjson_default(obj):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in 'biuf' and obj.size:
+            return _typed_array(obj)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def render_figure(spec):
+    """Build a plotly figure from a spec and serialize it to JSON bytes."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(spec)
+    if orjson is None:
+        return fig.to_json().encode('utf-8')
+    return orjson.dumps(fig.to_plotly_json(), default=_orjson_default)
+
+
+def _render_to_file(spec, path):
+    Path(path).write_bytes(render_figure(spec))
+    return path
+
+
+def export_figures(specs, output_dir, jobs=None, force=False):
+    """
+    Render and write figure specs concurrently.
+
+    Args:
+        specs: Mapping of output filename -> figure spec dict
+        output_dir: Directory the JSON files are written to
+        jobs: Worker processes (None = all cores, 1 = render in-process)
+        force: Re-render even if the spec hash is unchanged
+
+    Returns:
+        List of filenames that were (re)written
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    pending = {}
+    for name, spec in specs.items():
+        digest = spec_hash(spec)
+        if not force and manifest.get(name) == digest and (output_dir / name).exists():
+            continue
+        pending[name] = (spec, digest)
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(pending))
+
+    written = []
+    if jobs <= 1:
+        for name, (spec, digest) in pending.items():
+            _render_to_file(spec, output_dir / name)
+            manifest[name] = digest
+            written.append(name)
+    elif pending:
+        with process_pool(jobs) as pool:
+            futures = {
+                pool.submit(_render_to_file, spec, output_dir / name): (name, digest)
+                for name, (spec, digest) in pending.items()
+            }
+            for future in as_completed(futures):
+                future.result()
+                name, digest = futures[future]
+                manifest[name] = digest
+                written.append(name)
+
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    print(f"Exported {len(written)} figure(s), {len(specs) - len(written)} unchanged")
+    return written
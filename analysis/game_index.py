@@ -0,0 +1,116 @@
+"""
+Game Row Index
+Positional index over the cleaned Oracle's Elixir rows, built once at load
+time.
+
+Rows of one game are contiguous in the source data (10 player rows followed
+by 2 team rows), so each game maps to a (start, stop) row range and each
+(gameid, teamid, position) to a single row offset. Lookups are then O(1)
+slices or `iloc` takes instead of boolean-mask scans over the whole frame.
+The offsets are kept as flat arrays (offset, team code, position code per
+slot), so the index stays small when it is cached with the dataset.
+"""
+import numpy as np
+import pandas as pd
+
+
+class GameIndex:
+    """
+    Row ranges per game and row offsets per (gameid, teamid, position).
+
+    Attributes:
+        gameids: game ids in row order
+        starts, stops: row range of each game (positional, stop exclusive)
+        slot_offsets: positional offset of the first row of every
+            (gameid, teamid, position), in row order
+        slot_teams, slot_positions: each slot's codes into `teams` and `positions`
+    """
+
+    def __init__(self, gameids, starts, stops, slot_offsets, slot_teams, slot_positions, teams, positions):
+        self.gameids = gameids
+        self.starts = starts
+        self.stops = stops
+        self.slot_offsets = slot_offsets
+        self.slot_teams = slot_teams
+        self.slot_positions = slot_positions
+        self.teams = teams
+        self.positions = positions
+        self._game_number = {g: i for i, g in enumerate(gameids)}
+        self._position_offsets = {}
+
+    @staticmethod
+    def is_contiguous(df):
+        """True if every game's rows form one contiguous block."""
+        codes, uniques = pd.factorize(df['gameid'], use_na_sentinel=False)
+        runs = 1 + int(np.count_nonzero(codes[1:] != codes[:-1])) if len(codes) else 0
+        return runs == len(uniques)
+
+    @classmethod
+    def build(cls, df):
+        """Index a DataFrame whose rows are grouped by game (see is_contiguous)."""
+        if not cls.is_contiguous(df):
+            raise ValueError("Rows of each game must be contiguous; sort by gameid first")
+
+        gameids = df['gameid'].to_numpy()
+        n = len(gameids)
+        codes = pd.factorize(gameids, use_na_sentinel=False)[0]
+        starts = np.flatnonzero(np.r_[n > 0, codes[1:] != codes[:-1]])
+        stops = np.r_[starts[1:], n if n else []].astype(np.int64)
+
+        keys = df[['gameid', 'teamid', 'position']]
+        offsets = np.flatnonzero(~keys.duplicated(keep='first').to_numpy())
+        slot_teams, teams = pd.factorize(keys['teamid'].to_numpy()[offsets], use_na_sentinel=False)
+        slot_positions, positions = pd.factorize(keys['position'].to_numpy()[offsets], use_na_sentinel=False)
+
+        return cls(gameids[starts], starts, stops, offsets.astype(np.int64),
+                   slot_teams.astype(np.int32), slot_positions.astype(np.int16),
+                   np.asarray(teams, dtype=object), np.asarray(positions, dtype=object))
+
+    def __len__(self):
+        return len(self.gameids)
+
+    def __contains__(self, gameid):
+        return gameid in self._game_number
+
+    def game_range(self, gameid):
+        """slice() of the game's rows (KeyError for unknown games)."""
+        i = self._game_number[gameid]
+        return slice(int(self.starts[i]), int(self.stops[i]))
+
+    def game_rows(self, df, gameid):
+        """All rows of one game."""
+        return df.iloc[self.game_range(gameid)]
+
+    def _code(self, values, value):
+        found = np.flatnonzero(values == value)
+        return found[0] if len(found) else -1
+
+    def offset(self, gameid, teamid, position):
+        """Row offset of a team's player at `position`, or None if absent."""
+        rows = self.game_range(gameid)
+        lo, hi = np.searchsorted(self.slot_offsets, [rows.start, rows.stop])
+        match = np.flatnonzero(
+            (self.slot_teams[lo:hi] == self._code(self.teams, teamid))
+            & (self.slot_positions[lo:hi] == self._code(self.positions, position))
+        )
+        return int(self.slot_offsets[lo + match[0]]) if len(match) else None
+
+    def team_rows(self, df, gameid, teamid):
+        """All rows of one team within a game (players and the team row)."""
+        rows = self.game_rows(df, gameid)
+        return rows[rows['teamid'].to_numpy() == teamid]
+
+    def position_offsets(self, positions):
+        """
+        Offsets of the first row of every (gameid, teamid) at `positions`
+        (one position or a collection of them), in row order.
+        """
+        key = (positions,) if isinstance(positions, str) else tuple(positions)
+        if key not in self._position_offsets:
+            codes = [self._code(self.positions, p) for p in key]
+            self._position_offsets[key] = self.slot_offsets[np.isin(self.slot_positions, codes)]
+        return self._position_offsets[key]
+
+    def position_rows(self, df, positions):
+        """First row per (gameid, teamid) for one or more positions, in row order."""
+        return df.iloc[self.position_offsets(positions)]
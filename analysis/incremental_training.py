@@ -0,0 +1,277 @@
+"""
+Out-of-Core Incremental Model Training
+Trains win-prediction models on the processed data in fixed-size batches read
+straight from processed_data.json, so memory use stays constant however many
+seasons the file holds.
+
+- Rows are streamed with json_stream.iter_json_array and grouped into
+  DataFrame batches of `batch_size` rows, then run through
+  modeling.prepare_features.
+- A stable hash of `gameid` sends each game (both team rows) to either the
+  training stream or the held-out evaluation stream, so the split is the same
+  on every pass and every run without storing row indices.
+- Models with `partial_fit` are updated batch by batch: SGD logistic
+  regression on the standardized advanced features and Gaussian naive Bayes
+  on the advanced features. The baseline features are two binary columns, so
+  the baseline logistic regression is fitted exactly from streamed counts of
+  each distinct (features, result) row and matches
+  modeling.build_baseline_model on the same training rows.
+- Held-out metrics (accuracy, log loss, binned ROC-AUC) are accumulated in
+  constant memory.
+
+Usage:
+    python analysis/incremental_training.py
+    python analysis/cli.py incremental --out /tmp/out   # reads /tmp/out/processed_data.json
+"""
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import get_config
+from json_stream import iter_json_array
+from modeling import prepare_features
+
+# Rows per partial_fit batch
+BATCH_SIZE = 5000
+# Fraction of games routed to the held-out evaluation stream
+HOLDOUT_FRACTION = 0.25
+# Passes over the training stream for the SGD models
+EPOCHS = 10
+# Inverse regularization strength matching LogisticRegression's default C
+C = 1.0
+# Score bins used for the streaming ROC-AUC
+AUC_BINS = 1000
+
+CLASSES = np.array([0, 1])
+
+
+class CountedLogisticRegression:
+    """
+    Logistic regression for discrete features, fitted from streamed counts.
+
+    partial_fit only tallies how often each distinct (feature row, label)
+    pair occurs; the model is then fitted once on those rows weighted by their
+    counts, which has the same objective as fitting every row. Memory grows
+    with the number of distinct feature rows, not with the number of rows.
+    """
+
+    def __init__(self, C=C, max_iter=1000, random_state=42):
+        self.C = C
+        self.max_iter = max_iter
+        self.random_state = random_state
+        self.counts = {}
+        self._model = None
+
+    def partial_fit(self, X, y, classes=None):
+        rows, counts = np.unique(np.column_stack([X, y]), axis=0, return_counts=True)
+        for row, count in zip(map(tuple, rows), counts):
+            self.counts[row] = self.counts.get(row, 0) + int(count)
+        self._model = None
+        return self
+
+    def _fitted(self):
+        if self._model is None:
+            from sklearn.linear_model import LogisticRegression
+
+            rows = np.array(list(self.counts))
+            weights = np.array(list(self.counts.values()), dtype=np.float64)
+            self._model = LogisticRegression(C=self.C, max_iter=self.max_iter, random_state=self.random_state)
+            self._model.fit(rows[:, :-1], rows[:, -1].astype(int), sample_weight=weights)
+        return self._model
+
+    def predict_proba(self, X):
+        return self._fitted().predict_proba(X)
+
+    @property
+    def coef_(self):
+        return self._fitted().coef_
+
+    @property
+    def intercept_(self):
+        return self._fitted().intercept_
+
+
+def is_holdout(gameids, fraction=HOLDOUT_FRACTION):
+    """Stable per-game split: CRC32 of the game id mapped onto [0, 1)."""
+    hashes = np.array([zlib.crc32(str(g).encode('utf-8')) for g in gameids], dtype=np.float64)
+    return hashes / 2 ** 32 < fraction
+
+
+def iter_batches(path, batch_size=BATCH_SIZE):
+    """Yield DataFrames of up to `batch_size` processed rows, in file order."""
+    rows = []
+    for row in iter_json_array(path):
+        rows.append(row)
+        if len(rows) == batch_size:
+            yield _to_frame(rows)
+            rows = []
+    if rows:
+        yield _to_frame(rows)
+
+
+def _to_frame(rows):
+    df = pd.DataFrame(rows)
+    # Match modeling.load_data: patch stays text
+    if 'patch' in df.columns:
+        df['patch'] = df['patch'].astype('string')
+    return df
+
+
+def iter_split_batches(path, holdout, batch_size=BATCH_SIZE, fraction=HOLDOUT_FRACTION):
+    """Stream batches restricted to the held-out (True) or training (False) games."""
+    for batch in iter_batches(path, batch_size):
+        mask = is_holdout(batch['gameid'], fraction) == holdout
+        if mask.any():
+            yield batch[mask].reset_index(drop=True)
+
+
+class StreamingMetrics:
+    """Accuracy, log loss and binned ROC-AUC accumulated batch by batch."""
+
+    def __init__(self, bins=AUC_BINS):
+        self.bins = bins
+        self.n = 0
+        self.correct = 0
+        self.log_loss_sum = 0.0
+        self.pos_hist = np.zeros(bins, dtype=np.int64)
+        self.neg_hist = np.zeros(bins, dtype=np.int64)
+
+    def update(self, y_true, proba):
+        y_true = np.asarray(y_true)
+        proba = np.clip(proba, 1e-15, 1 - 1e-15)
+        self.n += len(y_true)
+        self.correct += int(((proba >= 0.5) == (y_true == 1)).sum())
+        self.log_loss_sum += float(-(y_true * np.log(proba) + (1 - y_true) * np.log(1 - proba)).sum())
+        idx = np.minimum((proba * self.bins).astype(int), self.bins - 1)
+        self.pos_hist += np.bincount(idx[y_true == 1], minlength=self.bins)
+        self.neg_hist += np.bincount(idx[y_true == 0], minlength=self.bins)
+
+    def auc(self):
+        """ROC-AUC from the score histograms (ties within a bin count half)."""
+        n_pos, n_neg = self.pos_hist.sum(), self.neg_hist.sum()
+        if n_pos == 0 or n_neg == 0:
+            return None
+        neg_below = np.cumsum(self.neg_hist) - self.neg_hist
+        return float((self.pos_hist * (neg_below + 0.5 * self.neg_hist)).sum() / (n_pos * n_neg))
+
+    def result(self):
+        return {
+            'rows': self.n,
+            'auc': self.auc(),
+            'accuracy': self.correct / self.n if self.n else None,
+            'log_loss': self.log_loss_sum / self.n if self.n else None,
+        }
+
+
+def make_models(n_train):
+    """
+    Incremental models keyed by name, as (feature_set, model, scaled, epochs).
+    `scaled` models see standardized features. Only SGD needs several passes:
+    the counted baseline and naive Bayes accumulate exact sufficient statistics.
+    """
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import GaussianNB
+
+    # SGD minimizes mean loss + alpha/2 * ||w||^2, which equals
+    # LogisticRegression's objective scaled by 1 / (C * n) when alpha = 1 / (C * n)
+    alpha = 1.0 / (C * max(n_train, 1))
+
+    sgd = SGDClassifier(loss='log_loss', alpha=alpha, learning_rate='optimal',
+                        average=True, random_state=42)
+
+    return {
+        'baseline_logistic': ('baseline', CountedLogisticRegression(), False, 1),
+        'advanced_sgd_logistic': ('advanced', sgd, True, EPOCHS),
+        'advanced_gaussian_nb': ('advanced', GaussianNB(), False, 1),
+    }
+
+
+def _features(batch, feature_set, scaled, scaler):
+    X, y, names = prepare_features(batch, feature_set)
+    X = scaler.transform(X) if scaled else X.to_numpy()
+    return np.asarray(X, dtype=np.float64), y, names
+
+
+def train_incremental(path, batch_size=BATCH_SIZE, fraction=HOLDOUT_FRACTION):
+    """
+    Train every incremental model on the training stream and score it on the
+    held-out stream.
+
+    Returns:
+        dict with row counts, per-model held-out metrics and the baseline
+        model's coefficients
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    # Pass 1: row count and feature scaling statistics for the SGD models
+    scaler = StandardScaler()
+    n_train = 0
+    for batch in iter_split_batches(path, False, batch_size, fraction):
+        X, _, _ = prepare_features(batch, 'advanced')
+        scaler.partial_fit(X)
+        n_train += len(X)
+    print(f"Training stream: {n_train} rows")
+
+    models = make_models(n_train)
+
+    # Passes 2..: partial_fit, one batch at a time
+    epochs = max(spec[3] for spec in models.values())
+    feature_names = {}
+    for epoch in range(epochs):
+        for batch in iter_split_batches(path, False, batch_size, fraction):
+            for name, (feature_set, model, scaled, model_epochs) in models.items():
+                if epoch >= model_epochs:
+                    continue
+                X, y, feature_names[name] = _features(batch, feature_set, scaled, scaler)
+                model.partial_fit(X, y, classes=CLASSES)
+        print(f"  Epoch {epoch + 1}/{epochs} done")
+
+    # Held-out evaluation stream
+    metrics = {name: StreamingMetrics() for name in models}
+    for batch in iter_split_batches(path, True, batch_size, fraction):
+        for name, (feature_set, model, scaled, _) in models.items():
+            X, y, _ = _features(batch, feature_set, scaled, scaler)
+            metrics[name].update(y, model.predict_proba(X)[:, 1])
+
+    baseline = models['baseline_logistic'][1]
+    results = {
+        'batch_size': batch_size,
+        'epochs': epochs,
+        'holdout_fraction': fraction,
+        'train_rows': n_train,
+        'holdout_rows': metrics['baseline_logistic'].n,
+        'models': {name: m.result() for name, m in metrics.items()},
+        'baseline_coefficients': {
+            'intercept': float(baseline.intercept_[0]),
+            **{f: float(c) for f, c in zip(feature_names['baseline_logistic'], baseline.coef_[0])},
+        },
+    }
+    return results
+
+
+def main(config=None):
+    """Run incremental training over processed_data.json and export the metrics."""
+    config = config or get_config()
+
+    print(f"Streaming {config.processed_data} in batches of {BATCH_SIZE} rows...")
+    results = train_incremental(config.processed_data)
+
+    print("\nHeld-out performance:")
+    for name, m in results['models'].items():
+        auc = f"{m['auc']:.4f}" if m['auc'] is not None else "n/a"
+        acc = f"{m['accuracy']:.4f}" if m['accuracy'] is not None else "n/a"
+        print(f"  {name}: AUC {auc}, accuracy {acc}")
+
+    output_path = Path(config.output_dir) / "incremental_results.json"
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nIncremental training results exported to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
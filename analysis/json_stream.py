@@ -0,0 +1,102 @@
+"""
+Incremental JSON Array Reading
+Reads the items of a large JSON array one at a time without loading the
+whole file, for timeline dumps (timeline_ingest.py) and processed_data.json
+(incremental_training.py).
+
+The file is read in fixed-size chunks; each array item is decoded with
+JSONDecoder.raw_decode as soon as it is complete and the consumed text is
+dropped, so memory use is bounded by one chunk plus the largest item.
+"""
+import gzip
+import json
+import re
+from pathlib import Path
+
+# Characters read from disk per chunk
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = ' \t\r\n,'
+
+
+def open_text(path):
+    """Open a .json or .json.gz file for text reading."""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class ChunkReader:
+    """Text buffer over a file that is refilled chunk by chunk."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+
+    def fill(self):
+        """Drop consumed text and append the next chunk. False at end of file."""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_past(self, pattern):
+        """
+        Advance past the first match of the compiled regex `pattern`.
+        Returns the text skipped on the way (e.g. a metadata header).
+        """
+        skipped = []
+        while True:
+            match = pattern.search(self.buf, self.pos)
+            if match:
+                skipped.append(self.buf[self.pos:match.start()])
+                self.pos = match.end()
+                return ''.join(skipped)
+            # Keep a short tail in case the match straddles two chunks
+            keep = max(self.pos, len(self.buf) - 64)
+            skipped.append(self.buf[self.pos:keep])
+            self.pos = keep
+            if not self.fill():
+                raise ValueError(f"pattern {pattern.pattern!r} not found")
+
+    def iter_array(self):
+        """Yield decoded items until the current array closes."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _SEPARATORS:
+                self.pos += 1
+            if self.pos >= len(self.buf):
+                if not self.fill():
+                    raise ValueError("truncated JSON array")
+                continue
+            if self.buf[self.pos] == ']':
+                self.pos += 1
+                return
+            try:
+                item, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # The item continues in the next chunk
+                if not self.fill():
+                    raise ValueError("truncated JSON array item")
+                continue
+            if end == len(self.buf) and self.fill():
+                # A number that ends the buffer may continue in the next chunk
+                continue
+            self.pos = end
+            yield item
+
+
+_ARRAY_START = re.compile(r'\[')
+
+
+def iter_json_array(path):
+    """Yield the items of a file whose top-level value is a JSON array."""
+    with open_text(path) as f:
+        reader = ChunkReader(f)
+        reader.skip_past(_ARRAY_START)
+        yield from reader.iter_array()
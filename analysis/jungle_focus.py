@@ -0,0 +1,177 @@
+"""
+Jungle Focus Scoring
+Scores where each jungler applied early pressure, for every team-game at
+once, from the early kill participation of the team's laners.
+
+- Activity matrix: one row per team-game, one column per laner position
+  (TOP, MID, ADC, SUP) holding that player's killsatN + assistsatN. It is
+  filled with a single scatter over the player rows, so a multi-season
+  dataset is scored in one pass with no per-game Python code.
+- Lane activity: activity @ weights, where the (positions x lanes) weight
+  matrix comes from a lane -> positions mapping. A lane's activity is the
+  mean over its positions.
+- Focus shares: each team's activity over all of LANE_POSITIONS (top, mid,
+  and bot = (ADC + SUP) / 2, so a gank on the two bot laners does not count
+  double) divided by its total, i.e. the top/mid/bot share of early lane
+  activity (NaN without any activity). Shares are descriptive only.
+- Focus: the lane with the most activity, if the jungler itself was active
+  (killsatN + assistsatN > 0); ties leave the focus None. By default the
+  lanes are BASELINE_LANES, the original classification (ADC vs TOP
+  activity), so mid activity never overrides a bot/top label. Scoring over
+  LANE_POSITIONS is opt-in; there, lanes tied at N minutes are separated by
+  their activity at TIEBREAK_MINUTE.
+
+A trade game is one whose two teams focused the two lanes of one of the
+`trades` pairs (in either order), by default bot vs top.
+"""
+import numpy as np
+import pandas as pd
+
+# Laner positions scored, in activity matrix column order
+POSITIONS = ('TOP', 'MID', 'ADC', 'SUP')
+# Lanes and the positions whose activity counts for each (focus shares, all-lane focus)
+LANE_POSITIONS = {
+    'top': ('TOP',),
+    'mid': ('MID',),
+    'bot': ('ADC', 'SUP'),
+}
+# The original bot vs top classification: ADC against TOP activity
+BASELINE_LANES = {
+    'top': ('TOP',),
+    'bot': ('ADC',),
+}
+# Lane pairs that make a cross-map trade
+TRADES = (('bot', 'top'),)
+# Minute of the killsat/assistsat stats used for scoring
+MINUTE = 10
+# Minute of the stats used to break ties in all-lane focus (skipped if the data lacks them)
+TIEBREAK_MINUTE = 15
+
+
+def participation(rows, minute=MINUTE):
+    """killsatN + assistsatN per row (0 where the data has no such columns)."""
+    total = np.zeros(len(rows))
+    for stat in ('killsat', 'assistsat'):
+        column = f'{stat}{minute}'
+        if column in rows.columns:
+            total = total + rows[column].to_numpy(dtype=np.float64)
+    return total
+
+
+def lane_weights(lane_positions=None, positions=POSITIONS):
+    """(positions x lanes) matrix averaging position activity into lanes."""
+    lane_positions = lane_positions or LANE_POSITIONS
+    weights = np.zeros((len(positions), len(lane_positions)))
+    for j, members in enumerate(lane_positions.values()):
+        for position in members:
+            weights[positions.index(position), j] = 1.0 / len(members)
+    return weights
+
+
+def activity_matrix(df, keys, minutes=(MINUTE,), positions=POSITIONS, index=None):
+    """
+    Early kill participation of each team's laners.
+
+    Args:
+        keys: unique (gameid, teamid) MultiIndex, one matrix row per key
+        minutes: stat minutes to read; one matrix per minute
+        index: GameIndex of `df`, which replaces the position scan with a row take
+
+    Returns:
+        list of (len(keys) x len(positions)) arrays. Teams without a player
+        at a position get 0 there; missing stats stay NaN.
+    """
+    if index is not None:
+        rows = index.position_rows(df, positions)
+    else:
+        rows = df[df['position'].isin(positions)]
+        # First row per (gameid, teamid, position), as in the positional lookups
+        rows = rows[~rows.duplicated(['gameid', 'teamid', 'position'], keep='first').to_numpy()]
+    target = keys.get_indexer(pd.MultiIndex.from_arrays([rows['gameid'].to_numpy(), rows['teamid'].to_numpy()]))
+    column = pd.Categorical(rows['position'], categories=list(positions)).codes
+    found = target >= 0
+    target, column = target[found], column[found]
+
+    matrices = []
+    for minute in minutes:
+        matrix = np.zeros((len(keys), len(positions)))
+        matrix[target, column] = participation(rows, minute)[found]
+        matrices.append(matrix)
+    return matrices
+
+
+def focus_shares(lane_activity):
+    """Each row divided by its total (NaN where the total is 0 or missing)."""
+    total = lane_activity.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, lane_activity / total, np.nan)
+
+
+def assign_focus(lane_activity, jungler_active, lanes, tiebreak=None):
+    """
+    Lane with the most activity per row, or None (see the module docstring).
+
+    Args:
+        lane_activity: (rows x lanes) activity at the scoring minute
+        jungler_active: boolean per row
+        tiebreak: optional (rows x lanes) activity used only between tied lanes
+    """
+    best = lane_activity.max(axis=1, keepdims=True)
+    leaders = lane_activity == best
+    if tiebreak is not None:
+        key = np.where(leaders, np.nan_to_num(tiebreak, nan=-np.inf), -np.inf)
+        tied = leaders.sum(axis=1, keepdims=True) > 1
+        leaders = np.where(tied, leaders & (key == key.max(axis=1, keepdims=True)), leaders)
+
+    chosen = jungler_active & (best[:, 0] > 0) & (leaders.sum(axis=1) == 1)
+    focus = np.full(len(lane_activity), None, dtype=object)
+    focus[chosen] = np.asarray(lanes, dtype=object)[leaders[chosen].argmax(axis=1)]
+    return focus
+
+
+def score_focus(df, keys, jungler_active, all_lanes=False, minute=MINUTE, tiebreak_minute=TIEBREAK_MINUTE,
+                index=None):
+    """
+    Laner activity, focus shares and focus for every team-game in `keys`.
+
+    Args:
+        all_lanes: score focus over LANE_POSITIONS (top/mid/bot, with the
+            tiebreak) instead of BASELINE_LANES (bot vs top)
+        index: optional GameIndex of `df` (see activity_matrix)
+
+    Returns:
+        activity (len(keys) x POSITIONS), shares (len(keys) x LANE_POSITIONS
+        lanes), focus (object array of lane names or None)
+    """
+    minutes = (minute, tiebreak_minute) if all_lanes and tiebreak_minute is not None else (minute,)
+    matrices = activity_matrix(df, keys, minutes, index=index)
+    activity = matrices[0]
+    shares = focus_shares(activity @ lane_weights(LANE_POSITIONS))
+
+    lane_positions = LANE_POSITIONS if all_lanes else BASELINE_LANES
+    weights = lane_weights(lane_positions)
+    tiebreak = matrices[1] @ weights if len(matrices) > 1 else None
+    focus = assign_focus(activity @ weights, jungler_active, list(lane_positions), tiebreak)
+    return activity, shares, focus
+
+
+def trade_mask(gameids, focus, trades=TRADES):
+    """
+    True for the rows of games with exactly two teams whose focus lanes form
+    one of the `trades` pairs (unordered).
+    """
+    for a, b in trades:
+        if a == b:
+            raise ValueError(f"A trade needs two different lanes, got ({a}, {b})")
+    lanes = sorted({lane for pair in trades for lane in pair})
+    # Focus as lane codes; anything outside the trade lanes (and None) is -1
+    focus = np.asarray(focus, dtype=object)
+    code = pd.Categorical(np.where(np.isin(focus, lanes), focus, None), categories=lanes).codes.astype(np.int64)
+    allowed = [min(lanes.index(a), lanes.index(b)) * len(lanes) + max(lanes.index(a), lanes.index(b))
+               for a, b in trades]
+
+    per_game = pd.DataFrame({'gameid': gameids, 'code': code}).groupby('gameid')['code']
+    teams = per_game.transform('size').to_numpy()
+    lo = per_game.transform('min').to_numpy()
+    hi = per_game.transform('max').to_numpy()
+    return (teams == 2) & (lo >= 0) & np.isin(lo * len(lanes) + hi, allowed)
@@ -0,0 +1,241 @@
+"""
+Propensity-Matched Bot vs Top Comparison
+Repeats the bot vs top outcome comparison on covariate-matched team-games,
+so differences in early lane state and team strength between teams that gank
+bot and teams that gank top are not attributed to the gank focus itself.
+
+- The propensity of bot focus is estimated from pre-10-minute covariates
+  (side, top and bot XP difference at 10, pre-game Elo difference) with a
+  logistic regression.
+- Bot-focus team-games are matched greedily, without replacement, to the
+  top-focus team-game nearest in logit propensity, in a seeded random order
+  (a fixed order such as highest propensity first tilts which controls are
+  left for later rows and hurts covariate balance).
+  Candidates come from a KD-tree over the control scores (O(n log n) instead
+  of O(n^2) pairwise distances), and used controls are skipped. Matches
+  further apart than a caliper of CALIPER_SD standard deviations of the
+  logit are dropped.
+- Every game enters the matched sample at most once. Both teams of a trade
+  game are in the data, with mirrored XP/Elo differences and complementary
+  results, so the nearest control is often the opponent in the same game
+  (a pair difference of exactly +-1), and two pairs sharing a game are not
+  independent. Skipping every control whose game is already used makes the
+  pairs disjoint in games.
+- The matched-pair outcome differences are tested with a sign-flip
+  permutation test: under H0 each pair's labels are exchangeable, so each
+  difference is equally likely to have either sign. This needs independent
+  pairs, hence the two rules above. For 0/1 outcomes the sign-flip null is
+  binomial and is computed exactly.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import get_config
+from eda_and_tests import load_processed_data
+from exact_tests import exact_sign_flip_test
+
+COVARIATES = ['side_blue', 'top_xpdiff10', 'bot_xpdiff10', 'elo_diff']
+OUTCOMES = {
+    'result': 'Win Rate',
+    'obj_conversion': 'Objective Conversion Rate',
+}
+# Caliper in standard deviations of the logit propensity
+CALIPER_SD = 0.2
+# Nearest controls fetched per treated row at first (doubled when all are used)
+MATCH_CANDIDATES = 8
+# Upper bound on sign-flip matrix elements held in memory per batch
+BATCH_ELEMENTS = 2_000_000
+# Relative tolerance when comparing permuted against observed statistics
+TIE_TOLERANCE = 1e-9
+
+
+def covariate_matrix(df):
+    """Pre-10-minute covariates (missing values filled with 0, as in modeling)."""
+    X = pd.DataFrame({'side_blue': (df['side'] == 'Blue').astype(float)}, index=df.index)
+    for column in COVARIATES[1:]:
+        X[column] = df[column].astype(float) if column in df.columns else np.nan
+    return X.fillna(0)
+
+
+def fit_propensity(X, treated):
+    """Logit of the estimated probability of bot focus for every row."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    model = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+    model.fit(X, treated)
+    return model.decision_function(X)
+
+
+def match_nearest(treated_scores, control_scores, caliper, treated_groups=None, control_groups=None, seed=42):
+    """
+    Greedy nearest-neighbor matching without replacement, via a KD-tree.
+
+    Treated rows are matched in a random order (seeded), each to the
+    nearest control within the caliper that is still free. With groups
+    (e.g. game ids), a group is used at most once: a treated row whose group
+    is taken is skipped, and so is every control in a taken group.
+
+    Returns:
+        (treated_idx, control_idx) positions of the pairs
+    """
+    from sklearn.neighbors import KDTree
+
+    n_control = len(control_scores)
+    if n_control == 0 or len(treated_scores) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if treated_groups is None:
+        # Every row its own group: only reuse of a control is prevented
+        treated_groups = np.arange(len(treated_scores))
+        control_groups = np.arange(n_control) + len(treated_scores)
+
+    tree = KDTree(control_scores.reshape(-1, 1))
+    k = min(MATCH_CANDIDATES, n_control)
+    distance, nearest = tree.query(treated_scores.reshape(-1, 1), k=k)
+
+    used_groups = set()
+    treated_idx, control_idx = [], []
+    for i in np.random.default_rng(seed).permutation(len(treated_scores)):
+        if treated_groups[i] in used_groups:
+            continue
+        dist, cand = distance[i], nearest[i]
+        match = None
+        while match is None:
+            for d, c in zip(dist, cand):
+                if d > caliper:
+                    break
+                if control_groups[c] not in used_groups and control_groups[c] != treated_groups[i]:
+                    match = c
+                    break
+            else:
+                # Every candidate is within the caliper but taken; widen the search
+                if len(cand) < n_control:
+                    dist, cand = (a[0] for a in tree.query(treated_scores[i:i + 1].reshape(-1, 1),
+                                                           k=min(2 * len(cand), n_control)))
+                    continue
+            break
+        if match is not None:
+            used_groups.update((treated_groups[i], control_groups[match]))
+            treated_idx.append(i)
+            control_idx.append(match)
+
+    order = np.argsort(treated_idx, kind='stable')
+    return np.asarray(treated_idx, dtype=np.int64)[order], np.asarray(control_idx, dtype=np.int64)[order]
+
+
+def standardized_differences(X, treated_idx, control_idx):
+    """Standardized mean difference of each covariate (pooled SD), for balance checks."""
+    treated, control = X[treated_idx], X[control_idx]
+    pooled = np.sqrt((treated.var(axis=0) + control.var(axis=0)) / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smd = (treated.mean(axis=0) - control.mean(axis=0)) / pooled
+    return np.where(pooled > 0, smd, 0.0)
+
+
+def sign_flip_test(diffs, n_permutations=10000, exact='auto', seed=42):
+    """
+    Two-tailed sign-flip permutation test for the mean of paired differences.
+
+    Returns:
+        observed_stat, p_value, method ('exact' or 'permutation')
+    """
+    diffs = np.asarray(diffs, dtype=np.float64)
+    if exact is True or (exact == 'auto' and np.isin(diffs, (-1.0, 0.0, 1.0)).all()):
+        observed, p_value = exact_sign_flip_test(diffs)
+        return observed, p_value, 'exact'
+
+    observed = diffs.mean()
+    rng = np.random.default_rng(seed)
+    per_batch = max(1, BATCH_ELEMENTS // max(len(diffs), 1))
+    extreme = 0
+    for start in range(0, n_permutations, per_batch):
+        rows = min(per_batch, n_permutations - start)
+        signs = rng.integers(0, 2, size=(rows, len(diffs)), dtype=np.int8) * 2 - 1
+        null = signs @ diffs / len(diffs)
+        extreme += int((np.abs(null) >= abs(observed) * (1 - TIE_TOLERANCE) - TIE_TOLERANCE).sum())
+    return observed, extreme / n_permutations, 'permutation'
+
+
+def matched_comparison(df, n_permutations=10000, caliper_sd=CALIPER_SD):
+    """
+    Propensity-match bot-focus to top-focus team-games and test every outcome.
+
+    Returns:
+        dict with match counts, covariate balance before and after matching,
+        and per-outcome matched means and sign-flip test results
+    """
+    df = df[df['gank_focus'].isin(['bot', 'top'])].reset_index(drop=True)
+    treated = (df['gank_focus'] == 'bot').to_numpy()
+    X = covariate_matrix(df)
+
+    scores = fit_propensity(X, treated)
+    caliper = caliper_sd * scores.std()
+    treated_rows, control_rows = np.flatnonzero(treated), np.flatnonzero(~treated)
+    game = pd.factorize(df['gameid'])[0]
+    t_idx, c_idx = match_nearest(scores[treated_rows], scores[control_rows], caliper,
+                                 game[treated_rows], game[control_rows])
+    pairs_t, pairs_c = treated_rows[t_idx], control_rows[c_idx]
+
+    values = X.to_numpy()
+    before = standardized_differences(values, treated_rows, control_rows)
+    after = standardized_differences(values, pairs_t, pairs_c)
+
+    results = {
+        'covariates': COVARIATES,
+        'caliper': float(caliper),
+        'n_bot': int(treated.sum()),
+        'n_top': int((~treated).sum()),
+        'n_pairs': int(len(pairs_t)),
+        'n_games': int(len(np.unique(game))),
+        'balance': [
+            {'covariate': c, 'smd_before': float(b), 'smd_after': float(a)}
+            for c, b, a in zip(COVARIATES, before, after)
+        ],
+        'tests': {},
+    }
+    for outcome, label in OUTCOMES.items():
+        y = df[outcome].to_numpy(dtype=np.float64)
+        observed, p_value, method = sign_flip_test(y[pairs_t] - y[pairs_c], n_permutations)
+        results['tests'][outcome] = {
+            'label': label,
+            'bot_mean': float(y[pairs_t].mean()),
+            'top_mean': float(y[pairs_c].mean()),
+            'observed_stat': float(observed),
+            'p_value': float(p_value),
+            'method': method,
+            'interpretation': 'Significant' if p_value < 0.05 else 'Not significant',
+        }
+    return results
+
+
+def main(config=None):
+    """Run the matched comparison and export it for the frontend."""
+    config = config or get_config()
+    output_dir = Path(config.output_dir)
+
+    print("Loading processed data...")
+    df = load_processed_data(config.processed_data)
+
+    results = matched_comparison(df, config.permutations)
+    print(f"\nMatched {results['n_pairs']} of {results['n_bot']} bot-focus team-games "
+          f"without replacement ({2 * results['n_pairs']} of {results['n_games']} games used)")
+    for row in results['balance']:
+        print(f"  {row['covariate']}: SMD {row['smd_before']:+.3f} -> {row['smd_after']:+.3f}")
+    for test in results['tests'].values():
+        print(f"{test['label']}: bot {test['bot_mean']:.4f} vs top {test['top_mean']:.4f}, "
+              f"p-value = {test['p_value']:.4f} ({test['method']})")
+
+    output_path = output_dir / "matched_tests.json"
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nExported matched comparison to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
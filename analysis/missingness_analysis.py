@@ -3,27 +3,58 @@
 Missingness Analysis for DSC 80 Project
 Step 3: Assessment of Missingness
 """
+import copy
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import json
 from pathlib import Path
 
-# Paths
-DATA_PATH = Path(__file__).parent.parent.parent / "2025_LoL_esports_match_data_from_OraclesElixir.csv"
-OUTPUT_DIR = Path(__file__).parent.parent / "frontend" / "public" / "data"
+from config import DATA_PATH, get_config
+from figure_export import add_vline, export_figures
+from season_ingest import is_pattern, read_csv_files
+from streaming_histogram import StreamingHistogram, diff_in_means_sd, run_null
 
-def load_data():
-    """Load original data to check for missingness."""
-    df = pd.read_csv(DATA_PATH)
+# Permuted statistics computed before each histogram update
+STREAM_BATCH = 1000
+
+def load_raw_data(data_path=DATA_PATH, jobs=None):
+    """Load original data to check for missingness (a glob reads every matching season file)."""
+    if is_pattern(data_path):
+        return read_csv_files(data_path, normalize=False, jobs=jobs)
+    df = pd.read_csv(data_path)
     return df
 
-def permutation_test_missingness(df, col_missing, col_dependent, n_permutations=1000):
+def _missingness_null(n_permutations, seed, values, is_missing, histogram):
+    """
+    Worker: stream |mean(missing) - mean(not missing)| under shuffled values
+    into a copy of the empty `histogram`.
+    """
+    rng = np.random.default_rng(seed)
+    histogram = copy.deepcopy(histogram)
+    n_missing = int(is_missing.sum())
+    n_present = len(values) - n_missing
+    total = values.sum()
+    stats = np.empty(min(STREAM_BATCH, n_permutations))
+    done = 0
+    while done < n_permutations:
+        size = min(STREAM_BATCH, n_permutations - done)
+        for i in range(size):
+            # The sum over a random n_missing rows fixes both group means
+            missing_sum = values[rng.permutation(len(values))[:n_missing]].sum()
+            stats[i] = abs(missing_sum / n_missing - (total - missing_sum) / n_present)
+        histogram.update(stats[:size])
+        done += size
+    return histogram
+
+
+def permutation_test_missingness(df, col_missing, col_dependent, n_permutations=1000, jobs=None):
     """
     Perform permutation test to see if missingness of col_missing depends on col_dependent.
     Test statistic: Difference in mean (or proportion) of col_dependent 
     between 'missing' and 'not missing' groups.
+    
+    Returns observed_stat, p_value and a StreamingHistogram of the null
+    statistics (shares of the permutations run in `jobs` worker processes).
     """
     # Create missing indicator
     is_missing = df[col_missing].isna()
@@ -37,16 +68,14 @@ def permutation_test_missingness(df, col_missing, col_dependent, n_permutations=
         mean_not_missing = df[~df[col_missing].isna()][col_dependent].mean()
         observed_stat = abs(mean_missing - mean_not_missing)
         
-        # Permutation
-        combined = df[col_dependent].values
-        null_stats = []
-        for _ in range(n_permutations):
-            shuffled = np.random.permutation(combined)
-            # Split using observed missing counts
-            shuffled_missing = shuffled[is_missing]
-            shuffled_not_missing = shuffled[~is_missing]
-            stat = abs(shuffled_missing.mean() - shuffled_not_missing.mean())
-            null_stats.append(stat)
+        # Permutation (one-sided on the absolute difference)
+        combined = df[col_dependent].to_numpy(dtype=np.float64)
+        is_missing = is_missing.to_numpy()
+        histogram = StreamingHistogram.around(
+            0.0, diff_in_means_sd(combined, int(is_missing.sum())), observed_stat, two_sided=False
+        )
+        null_hist = run_null(_missingness_null, n_permutations,
+                             args=(combined, is_missing, histogram), jobs=jobs)
             
     else:
         # For categorical, use TVD or similar. 
@@ -56,12 +85,13 @@ def permutation_test_missingness(df, col_missing, col_dependent, n_permutations=
         pass # To implement if needed
         return None, None, None
 
-    p_value = np.mean(np.array(null_stats) >= observed_stat)
-    
-    return observed_stat, p_value, null_stats
+    return observed_stat, null_hist.p_value, null_hist
 
-def analyze_missingness():
-    df = load_data()
+def analyze_missingness(config=None):
+    config = config or get_config()
+    output_dir = Path(config.output_dir)
+    
+    df = load_raw_data(config.data_path, config.jobs)
     print(f"Dataset shape: {df.shape}")
     
     # Check for missing values
@@ -88,7 +118,7 @@ def analyze_missingness():
     # Test 1: Dependency on 'gamelength' (Likely Dependent)
     dep_col_1 = 'gamelength'
     print(f"Testing dependency on: {dep_col_1}")
-    obs1, p_val1, null_dist1 = permutation_test_missingness(df, target_col, dep_col_1)
+    obs1, p_val1, null_dist1 = permutation_test_missingness(df, target_col, dep_col_1, config.missingness_permutations, config.jobs)
     
     # Test 2: Dependency on 'monsterkills' (Likely Independent - pre-game ban vs in-game pve)
     # Use max monsterkills per game (team level proxy)
@@ -101,28 +131,33 @@ def analyze_missingness():
     # Fill NA monsterkills with 0 just in case
     df['monsterkills'] = df['monsterkills'].fillna(0)
     
-    obs2, p_val2, null_dist2 = permutation_test_missingness(df, target_col, dep_col_2)
+    obs2, p_val2, null_dist2 = permutation_test_missingness(df, target_col, dep_col_2, config.missingness_permutations, config.jobs)
     
     # Generate Plots
-    def create_plot(null_dist, obs, p_val, col_name):
-        fig = go.Figure()
-        fig.add_trace(go.Histogram(x=null_dist, name='Null Distribution', marker_color='gray', opacity=0.7))
-        fig.add_vline(x=obs, line_color='red', line_dash='dash', annotation_text='Observed')
-        fig.update_layout(
-            title=f'Missingness Dependency: {target_col} vs {col_name}<br>p-value={p_val:.4f}',
-            template='plotly_white',
-            bargap=0.02,
-            height=400
-        )
-        return fig
+    def create_plot(null_hist, obs, p_val, col_name):
+        fig = {
+            'data': [{
+                **null_hist.trace(),
+                'marker': {'color': 'gray'},
+                'opacity': 0.7,
+            }],
+            'layout': {
+                'title': {'text': f'Missingness Dependency: {target_col} vs {col_name}<br>p-value={p_val:.4f}'},
+                'template': 'plotly_white',
+                'bargap': 0.02,
+                'height': 400,
+            },
+        }
+        return add_vline(fig, obs, text='Observed')
 
     fig1 = create_plot(null_dist1, obs1, p_val1, dep_col_1)
     fig2 = create_plot(null_dist2, obs2, p_val2, dep_col_2)
     
     # Export
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    fig1.write_json(OUTPUT_DIR / "missingness_test_1.json")
-    fig2.write_json(OUTPUT_DIR / "missingness_test_2.json")
+    export_figures({
+        "missingness_test_1.json": fig1,
+        "missingness_test_2.json": fig2,
+    }, output_dir, jobs=config.jobs)
     
     results = {
         'missing_col': target_col,
@@ -139,10 +174,12 @@ def analyze_missingness():
         'missing_count': int(df[target_col].isna().sum())
     }
     
-    with open(OUTPUT_DIR / "missingness_results.json", 'w') as f:
+    with open(output_dir / "missingness_results.json", 'w') as f:
         json.dump(results, f, indent=2)
         
     print("Analysis complete. Results exported.")
+    
+    return results
 
 if __name__ == "__main__":
     analyze_missingness()
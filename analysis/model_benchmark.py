@@ -0,0 +1,134 @@
+"""
+Final Model Benchmark: Random Forest vs Histogram Gradient Boosting
+Compares training time, peak memory, model size and test AUC of the two final
+model families as the training set grows.
+
+The training split is replicated `scale` times (with small noise on the
+continuous features so copies are not exact duplicates) while the test split
+stays the original held-out rows. Each fit runs in a fresh worker process so
+its peak resident memory can be measured in isolation. Because the copies
+also land in boosting's internal validation split, early stopping fires late
+at scales above 1, so those tree counts are upper bounds.
+
+Usage:
+    python analysis/model_benchmark.py                  # scales 1, 10, 100
+    python analysis/model_benchmark.py --scales 1 10 --jobs 4
+"""
+import argparse
+import json
+import pickle
+import resource
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import process_pool
+from config import get_config
+from modeling import MODEL_NAMES, load_data, make_estimator, prepare_features
+
+SCALES = [1, 10, 100]
+
+# One representative setting per family: the largest forest in the full grid,
+# and boosting with early stopping deciding the number of trees
+BENCHMARK_PARAMS = {
+    'forest': {'n_estimators': 300, 'max_depth': None, 'min_samples_leaf': 1, 'random_state': 42},
+    'hist_gb': {'learning_rate': 0.1, 'max_leaf_nodes': 31, 'max_iter': 500, 'random_state': 42},
+}
+
+# Noise added to replicated rows, as a fraction of each column's std
+JITTER = 0.01
+
+
+def replicate(X, y, scale, seed=0):
+    """Stack `scale` jittered copies of the training rows (NaNs stay NaN)."""
+    if scale == 1:
+        return X, y
+    rng = np.random.default_rng(seed)
+    X_big = pd.concat([X] * scale, ignore_index=True)
+    continuous = [c for c in X.columns if X[c].nunique() > 2]
+    noise = rng.normal(0.0, JITTER, size=(len(X_big), len(continuous))) * X[continuous].std().to_numpy()
+    X_big[continuous] = X_big[continuous].to_numpy() + noise
+    return X_big, np.tile(y, scale)
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _fit_and_score(family, params, X_train, y_train, X_test, y_test, n_jobs):
+    """Worker: fit one model and report time, memory, size and AUC."""
+    from sklearn.metrics import roc_auc_score
+
+    model = make_estimator(family).set_params(**params)
+    if family == 'forest':
+        model.set_params(n_jobs=n_jobs)
+
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    return {
+        'fit_seconds': fit_seconds,
+        'peak_rss_increase_mb': _max_rss_mb() - rss_before,
+        'model_size_mb': len(pickle.dumps(model)) / 1e6,
+        'auc': float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+        'n_trees': int(getattr(model, 'n_iter_', params.get('n_estimators', 0))),
+    }
+
+
+def run_benchmark(df, scales=SCALES, families=tuple(BENCHMARK_PARAMS), n_jobs=-1):
+    """Benchmark each model family at each training-set scale."""
+    from sklearn.model_selection import train_test_split
+
+    train_df, test_df = train_test_split(df, test_size=0.25, random_state=42, stratify=df['result'])
+
+    results = []
+    for family in families:
+        fill_missing = family != 'hist_gb'
+        X_train, y_train, _ = prepare_features(train_df, 'advanced', fill_missing)
+        X_test, y_test, _ = prepare_features(test_df, 'advanced', fill_missing)
+
+        for scale in scales:
+            X_big, y_big = replicate(X_train, y_train, scale)
+            # A fresh process per fit keeps peak-memory readings independent
+            with process_pool(1) as pool:
+                row = pool.submit(
+                    _fit_and_score, family, BENCHMARK_PARAMS[family],
+                    X_big, y_big, X_test, y_test, n_jobs
+                ).result()
+            row.update({'family': family, 'scale': scale, 'train_rows': len(X_big)})
+            results.append(row)
+            print(f"{MODEL_NAMES[family]:<28} x{scale:<4} {len(X_big):>9,} rows  "
+                  f"fit {row['fit_seconds']:7.2f} s  peak +{row['peak_rss_increase_mb']:8.1f} MB  "
+                  f"model {row['model_size_mb']:8.2f} MB  AUC {row['auc']:.4f}  trees {row['n_trees']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the final model families at growing data sizes.")
+    parser.add_argument('--data', type=Path, help="processed_data.json to train on")
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help="Training-set replication factors")
+    parser.add_argument('--families', nargs='+', choices=sorted(BENCHMARK_PARAMS), default=list(BENCHMARK_PARAMS))
+    parser.add_argument('--jobs', type=int, help="Worker threads for the forest (default: all cores)")
+    parser.add_argument('--json', type=Path, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    data_path = args.data or get_config().processed_data
+    df = load_data(data_path)
+    print(f"Loaded {len(df)} rows from {data_path}\n")
+
+    results = run_benchmark(df, args.scales, args.families, n_jobs=args.jobs or -1)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBenchmark results written to {args.json}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,52 @@
 """
 Machine Learning Models for Win Prediction
 Baseline: Logistic Regression
-Final: Random Forest with advanced features
+Final: Random Forest (or Histogram Gradient Boosting) with advanced features
 Includes fairness analysis
 """
+import copy
 import pandas as pd
 import numpy as np
 import json
 from pathlib import Path
-
-from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import roc_auc_score, accuracy_score, confusion_matrix, classification_report
 import warnings
 warnings.filterwarnings('ignore')
 
+from config import FULL_HGB_PARAM_GRID, FULL_PARAM_GRID, OUTPUT_DIR, get_config
+from exact_tests import exact_diff_in_means_test
+from feature_importance import permutation_importance
+from streaming_histogram import StreamingHistogram, diff_in_means_sd, run_null
+
+# scikit-learn is imported inside the functions that use it: it is by far the
+# slowest import in the project, and prepare_features/load_data don't need it.
+
 # Paths
-DATA_DIR = Path(__file__).parent.parent / "frontend" / "public" / "data"
-PROCESSED_DATA = DATA_DIR / "processed_data.json"
-OUTPUT_DIR = DATA_DIR
+PROCESSED_DATA = OUTPUT_DIR / "processed_data.json"
 
+# Permuted statistics computed before each histogram update
+STREAM_BATCH = 1000
 
-def load_data():
+MODEL_NAMES = {
+    'forest': 'Random Forest',
+    'hist_gb': 'Histogram Gradient Boosting',
+}
+
+
+def load_data(path=PROCESSED_DATA):
     """Load processed data."""
-    df = pd.read_json(PROCESSED_DATA)
+    df = pd.read_json(path, dtype={'patch': str})
     return df
 
 
-def prepare_features(df, feature_set='baseline'):
+def prepare_features(df, feature_set='baseline', fill_missing=True):
     """
     Prepare features for modeling.
     
     Args:
         df: DataFrame
         feature_set: 'baseline' or 'advanced'
+        fill_missing: fill NaNs with 0 (models without native missing-value
+            support); histogram gradient boosting uses fill_missing=False
     
     Returns:
         X, y, feature_names
@@ -53,7 +62,7 @@ def prepare_features(df, feature_set='baseline'):
         feature_names = ['gank_focus_encoded', 'obj_conversion']
         
     elif feature_set == 'advanced':
-        # Advanced features: LII, objectives, lane stats
+        # Advanced features: LII, objectives, lane stats, team strength
         X = df[[
             'gank_focus',
             'obj_conversion',
@@ -63,7 +72,8 @@ def prepare_features(df, feature_set='baseline'):
             'top_xpdiff10',
             'bot_xpdiff10',
             'dragons',
-            'heralds'
+            'heralds',
+            'elo_diff'
         ]].copy()
         
         # Encode categorical
@@ -71,7 +81,8 @@ def prepare_features(df, feature_set='baseline'):
         X = X.drop('gank_focus', axis=1)
         
         # Fill any NaNs with 0
-        X = X.fillna(0)
+        if fill_missing:
+            X = X.fillna(0)
         
         feature_names = list(X.columns)
     
@@ -85,33 +96,114 @@ def build_baseline_model(X_train, y_train):
     Baseline Model: Simple Logistic Regression
     Features: gank_focus, obj_conversion
     """
+    from sklearn.linear_model import LogisticRegression
+    
     model = LogisticRegression(random_state=42, max_iter=1000)
     model.fit(X_train, y_train)
     
     return model
 
 
-def build_final_model(X_train, y_train):
+def make_estimator(family='forest'):
+    """Untuned estimator for a final model family ('forest' or 'hist_gb')."""
+    if family == 'forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier()
+    if family == 'hist_gb':
+        # Features are binned into at most 255 bins, NaNs get their own bin and
+        # boosting stops once the held-out validation loss stops improving
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+        )
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def make_sparse_estimator(kind='logistic'):
+    """Untuned estimator that trains on sparse (CSR) input: 'logistic' or 'boosting'."""
+    if kind == 'logistic':
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import MaxAbsScaler
+        # MaxAbsScaler scales without centering, so the matrix stays sparse
+        return make_pipeline(MaxAbsScaler(), LogisticRegression(solver='liblinear', max_iter=1000))
+    if kind == 'boosting':
+        # Exact-split gradient boosting reads CSR input directly (histogram
+        # gradient boosting would densify it)
+        from sklearn.ensemble import GradientBoostingClassifier
+        return GradientBoostingClassifier(n_estimators=200, max_depth=3, subsample=0.8, random_state=42)
+    raise ValueError(f"Unknown sparse model: {kind}")
+
+
+def champion_models(config, df, train_df, test_df):
     """
-    Final Model: Random Forest with GridSearch
-    Features: Advanced (LII, objectives, lane stats)
+    Logistic regression and gradient boosting on the advanced features plus
+    sparse champion pick/ban indicators (see champion_features.py).
+    
+    The champion matrix is built from the cleaned CSV rows of the processed
+    team-games and cached as CSR; it is never densified.
     """
-    # Define parameter grid
-    param_grid = {
-        'n_estimators': [100, 300],
-        'max_depth': [5, 10, None],
-        'min_samples_leaf': [1, 5],
-        'random_state': [42]
+    from artifact_cache import ArtifactCache
+    from champion_features import champion_matrix, sparse_nbytes, with_dense
+    from data_processing import load_dataset
+    from season_ingest import expand_paths
+    
+    cache = ArtifactCache(config.cache_dir)
+    keys = pd.MultiIndex.from_arrays([df['gameid'].to_numpy(), df['teamid'].to_numpy()])
+    
+    def build():
+        raw_df, _ = load_dataset(config.data_path, cache, config.jobs)
+        return champion_matrix(raw_df, keys)
+    
+    champions, champion_names = cache.get_or_compute('champion_matrix', build, inputs=[
+        expand_paths(config.data_path), df[['gameid', 'teamid']],
+        Path(__file__).with_name('champion_features.py'),
+    ])
+    X_dense, y, dense_names = prepare_features(df, 'advanced')
+    X = with_dense(X_dense, champions)
+    print(f"Champion features: {champions.shape[1]} columns, {champions.nnz / max(len(df), 1):.1f} non-zeros/row, "
+          f"{sparse_nbytes(X) / 1e6:.1f} MB sparse vs {X.shape[0] * X.shape[1] * 8 / 1e6:.1f} MB dense")
+    
+    train_rows = df.index.get_indexer(train_df.index)
+    test_rows = df.index.get_indexer(test_df.index)
+    results = {
+        'n_features': int(X.shape[1]),
+        'n_champion_features': int(champions.shape[1]),
+        'nnz_per_row': float(X.nnz / max(X.shape[0], 1)),
+        'sparse_bytes': int(sparse_nbytes(X)),
+        'dense_bytes': int(X.shape[0] * X.shape[1] * 8),
     }
+    models = {}
+    for kind, label in (('logistic', 'Logistic Regression'), ('boosting', 'Gradient Boosting')):
+        models[kind] = make_sparse_estimator(kind).fit(X[train_rows], y[train_rows])
+        results[kind] = evaluate_model(models[kind], X[test_rows], y[test_rows], f'Champions + advanced ({label})')
+    
+    # Largest logistic coefficients (on the scaled columns) among the champion features
+    coefs = models['logistic'][-1].coef_[0][len(dense_names):]
+    top = np.argsort(-np.abs(coefs))[:10]
+    results['top_champion_coefficients'] = {champion_names[i]: float(coefs[i]) for i in top}
+    return results
+
+
+def build_final_model(X_train, y_train, param_grid=None, cv=5, n_jobs=-1, family='forest'):
+    """
+    Final Model: Random Forest (or Histogram Gradient Boosting) with GridSearch
+    Features: Advanced (LII, objectives, lane stats, Elo difference)
+    """
+    from sklearn.model_selection import GridSearchCV
+    
+    if param_grid is None:
+        param_grid = FULL_HGB_PARAM_GRID if family == 'hist_gb' else FULL_PARAM_GRID
     
     # GridSearch with cross-validation
-    rf = RandomForestClassifier()
     grid_search = GridSearchCV(
-        rf,
+        make_estimator(family),
         param_grid,
-        cv=5,
+        cv=cv,
         scoring='roc_auc',
-        n_jobs=-1,
+        n_jobs=n_jobs,
         verbose=1
     )
     
@@ -119,12 +211,30 @@ def build_final_model(X_train, y_train):
     
     print(f"Best parameters: {grid_search.best_params_}")
     print(f"Best CV AUC: {grid_search.best_score_:.4f}")
+    if family == 'hist_gb':
+        print(f"Boosting iterations (early stopping): {grid_search.best_estimator_.n_iter_}")
     
     return grid_search.best_estimator_
 
 
+def model_feature_importance(model, feature_names, permutation_result):
+    """
+    Impurity importances for forests; models without them (histogram gradient
+    boosting) report the mean permutation importance instead.
+    """
+    if hasattr(model, 'feature_importances_'):
+        importances = model.feature_importances_
+    else:
+        importances = [permutation_result['features'][name]['mean'] for name in feature_names]
+    
+    feature_importance = dict(zip(feature_names, importances))
+    return dict(sorted(feature_importance.items(), key=lambda x: x[1], reverse=True))
+
+
 def evaluate_model(model, X_test, y_test, model_name='Model'):
     """Evaluate model performance."""
+    from sklearn.metrics import roc_auc_score, accuracy_score
+    
     y_pred = model.predict(X_test)
     y_pred_proba = model.predict_proba(X_test)[:, 1]
     
@@ -142,11 +252,17 @@ def evaluate_model(model, X_test, y_test, model_name='Model'):
     }
 
 
-def fairness_analysis(model, X_test, y_test, df_test):
+def fairness_analysis(model, X_test, y_test, df_test, n_permutations=1000, exact=True, jobs=None):
     """
     Fairness Analysis: Check if model performs equally well
     for bot-focus vs top-focus games.
+    
+    The accuracy difference is a difference in means of 0/1 correctness
+    vectors, so by default the exact (hypergeometric) null is used;
+    exact=False runs the Monte Carlo permutation test instead.
     """
+    from sklearn.metrics import accuracy_score
+    
     # Separate by gank focus
     bot_mask = df_test['gank_focus'] == 'bot'
     top_mask = df_test['gank_focus'] == 'top'
@@ -169,46 +285,67 @@ def fairness_analysis(model, X_test, y_test, df_test):
     # Permutation test for fairness
     observed_diff = acc_bot - acc_top
     
-    # Combine predictions and labels
-    all_preds = np.concatenate([y_pred_bot, y_pred_top])
-    all_true = np.concatenate([y_true_bot, y_true_top])
-    
-    # Create group labels
-    groups = np.array(['bot'] * len(y_pred_bot) + ['top'] * len(y_pred_top))
+    if exact:
+        correct_bot = (y_pred_bot == y_true_bot).astype(int)
+        correct_top = (y_pred_top == y_true_top).astype(int)
+        _, p_value, _, _ = exact_diff_in_means_test(correct_bot, correct_top)
+    else:
+        p_value = _fairness_permutation_pvalue(
+            y_pred_bot, y_pred_top, y_true_bot, y_true_top, observed_diff, n_permutations, jobs
+        )
     
-    n_permutations = 1000
-    null_diffs = []
-    
-    for _ in range(n_permutations):
-        shuffled_groups = np.random.permutation(groups)
-        
-        bot_shuffled = shuffled_groups == 'bot'
-        top_shuffled = shuffled_groups == 'top'
-        
-        perm_acc_bot = accuracy_score(all_true[bot_shuffled], all_preds[bot_shuffled])
-        perm_acc_top = accuracy_score(all_true[top_shuffled], all_preds[top_shuffled])
-        
-        null_diffs.append(perm_acc_bot - perm_acc_top)
-    
-    p_value = np.mean(np.abs(null_diffs) >= np.abs(observed_diff))
-    
-    print(f"  Permutation test p-value: {p_value:.4f}")
+    print(f"  {'Exact' if exact else 'Permutation'} test p-value: {p_value:.4f}")
     
     fairness_result = {
         'bot_accuracy': float(acc_bot),
         'top_accuracy': float(acc_top),
         'accuracy_difference': float(observed_diff),
         'p_value': float(p_value),
+        'method': 'exact' if exact else 'permutation',
         'is_fair': bool(p_value > 0.05)
     }
     
     return fairness_result
 
 
-def main():
+def _fairness_null(n_permutations, seed, correct, n_bot, histogram):
+    """Worker: stream shuffled-label accuracy differences into a copy of the empty `histogram`."""
+    rng = np.random.default_rng(seed)
+    histogram = copy.deepcopy(histogram)
+    n_top = len(correct) - n_bot
+    total = correct.sum()
+    done = 0
+    while done < n_permutations:
+        size = min(STREAM_BATCH, n_permutations - done)
+        # Accuracy of a random n_bot rows fixes both group accuracies
+        bot_correct = np.array([correct[rng.permutation(len(correct))[:n_bot]].sum() for _ in range(size)])
+        histogram.update(bot_correct / n_bot - (total - bot_correct) / n_top)
+        done += size
+    return histogram
+
+
+def _fairness_permutation_pvalue(y_pred_bot, y_pred_top, y_true_bot, y_true_top, observed_diff, n_permutations,
+                                 jobs=None):
+    """Monte Carlo p-value for the accuracy difference by shuffling group labels."""
+    correct = np.concatenate([
+        np.asarray(y_pred_bot) == np.asarray(y_true_bot),
+        np.asarray(y_pred_top) == np.asarray(y_true_top),
+    ]).astype(np.float64)
+    n_bot = len(y_pred_bot)
+    
+    # Null accuracy differences are binned as they are drawn, not kept in a list
+    histogram = StreamingHistogram.around(0.0, diff_in_means_sd(correct, n_bot), observed_diff)
+    return run_null(_fairness_null, n_permutations, args=(correct, n_bot, histogram), jobs=jobs).p_value
+
+
+def main(config=None):
     """Main modeling pipeline."""
+    from sklearn.model_selection import train_test_split
+    
+    config = config or get_config()
+    
     print("Loading data...")
-    df = load_data()
+    df = load_data(config.processed_data)
     
     # Split data (stratified by result)
     train_df, test_df = train_test_split(
@@ -232,40 +369,72 @@ def main():
     baseline_results = evaluate_model(baseline_model, X_test_base, y_test, 'Baseline (Logistic Regression)')
     
     # === FINAL MODEL ===
+    family = config.model_family
+    model_name = MODEL_NAMES[family]
     print("\n" + "="*50)
-    print("FINAL MODEL: Random Forest (with GridSearch)")
+    print(f"FINAL MODEL: {model_name} (with GridSearch)")
     print("="*50)
     
-    X_train_adv, y_train, feature_names = prepare_features(train_df, 'advanced')
-    X_test_adv, y_test, _ = prepare_features(test_df, 'advanced')
-    
-    final_model = build_final_model(X_train_adv, y_train)
-    final_results = evaluate_model(final_model, X_test_adv, y_test, 'Final (Random Forest)')
+    # Histogram gradient boosting handles missing values natively
+    fill_missing = family != 'hist_gb'
+    X_train_adv, y_train, feature_names = prepare_features(train_df, 'advanced', fill_missing)
+    X_test_adv, y_test, _ = prepare_features(test_df, 'advanced', fill_missing)
+    
+    final_model = build_final_model(
+        X_train_adv, y_train,
+        param_grid=config.hgb_param_grid if family == 'hist_gb' else config.param_grid,
+        cv=config.cv_folds,
+        n_jobs=config.jobs or -1,
+        family=family
+    )
+    final_results = evaluate_model(final_model, X_test_adv, y_test, f'Final ({model_name})')
+    final_results['model_family'] = family
     
     # Feature importance
-    feature_importance = dict(zip(feature_names, final_model.feature_importances_))
-    feature_importance = dict(sorted(feature_importance.items(), key=lambda x: x[1], reverse=True))
+    print(f"\nPermutation importance ({config.importance_repeats} repeats)...")
+    permutation_result = permutation_importance(
+        final_model, X_test_adv, y_test, feature_names,
+        n_repeats=config.importance_repeats, jobs=config.jobs
+    )
+    feature_importance = model_feature_importance(final_model, feature_names, permutation_result)
     
     print("\nFeature Importances:")
     for feat, imp in feature_importance.items():
         print(f"  {feat}: {imp:.4f}")
     
+    print("\nPermutation Importance (test AUC drop, 95% CI):")
+    for kind in ('features', 'groups'):
+        for name, imp in permutation_result[kind].items():
+            label = f"{name} (group)" if kind == 'groups' else name
+            print(f"  {label}: {imp['mean']:.4f} [{imp['ci_low']:.4f}, {imp['ci_high']:.4f}]")
+    
     # === FAIRNESS ANALYSIS ===
     print("\n" + "="*50)
     print("FAIRNESS ANALYSIS")
     print("="*50)
     
-    fairness_results = fairness_analysis(final_model, X_test_adv.values, y_test, test_df.reset_index(drop=True))
+    fairness_results = fairness_analysis(
+        final_model, X_test_adv.values, y_test, test_df.reset_index(drop=True),
+        n_permutations=config.fairness_permutations
+    )
     
     # === EXPORT RESULTS ===
     model_results = {
         'baseline': baseline_results,
         'final': final_results,
         'feature_importance': {k: float(v) for k, v in feature_importance.items()},
+        'permutation_importance': permutation_result,
         'fairness': fairness_results
     }
     
-    output_path = OUTPUT_DIR / "model_results.json"
+    # === CHAMPION PICK MODELS (optional) ===
+    if config.champion_features:
+        print("\n" + "="*50)
+        print("CHAMPION PICK MODELS (sparse)")
+        print("="*50)
+        model_results['champions'] = champion_models(config, df, train_df, test_df)
+    
+    output_path = Path(config.output_dir) / "model_results.json"
     with open(output_path, 'w') as f:
         json.dump(model_results, f, indent=2)
     
@@ -0,0 +1,175 @@
+"""
+Mergeable Quantile Sketches
+KLL sketches (Karnin, Lang & Liberty, "Optimal Quantile Approximation in
+Streams", 2016) for the LII columns, kept per gank focus.
+
+A sketch holds a small hierarchy of sorted buffers ("compactors"). An item at
+level h stands for 2**h original values. When a level exceeds its capacity it
+is sorted and every other item (random offset) is promoted to the next level,
+so memory stays O(k log(n / k)) however many values are added. Two sketches
+with the same k merge by concatenating their levels and compacting again,
+which is what lets chunks of the data (or worker processes) be sketched
+independently.
+
+Rank error: with k = K (200) the rank of a quantile estimate is within
+about 1.7% of n of the true rank with 99% probability (the bound published
+for KLL sketches at this k). Memory is about 600 values for a million inputs.
+Level 0 is exact, so fewer than about k values give exact quantiles.
+"""
+import os
+
+import numpy as np
+
+from artifact_cache import process_pool
+
+# Capacity of the top level; controls the rank error (see the module docstring)
+K = 200
+# Capacity decay per level below the top
+C = 2.0 / 3.0
+# Smallest capacity of any level
+MIN_CAPACITY = 2
+# LII columns sketched for every gank focus
+LII_COLUMNS = ('lii_diff', 'lii_top', 'lii_bot')
+# Rows sketched per chunk before merging
+CHUNK_ROWS = 50_000
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch of float values (NaNs ignored)."""
+
+    def __init__(self, k=K, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(MIN_CAPACITY, int(np.ceil(self.k * C ** depth)))
+
+    def _size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for h, items in enumerate(self.levels):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # With an odd count the smallest item stays at this level
+                keep, pairs = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = keep
+                break
+
+    def update(self, values):
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch (same k) into this one."""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """Estimated values at quantiles `qs` (in [0, 1]); NaN for an empty sketch."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        items, cumulative = self._weighted()
+        idx = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        return items[np.clip(idx, 0, len(items) - 1)]
+
+    def rank(self, x):
+        """Estimated fraction of values <= x."""
+        if self.n == 0:
+            return np.nan
+        items, cumulative = self._weighted()
+        idx = np.searchsorted(items, x, side='right')
+        return float(cumulative[idx - 1] / cumulative[-1]) if idx else 0.0
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(data['k'], seed)
+        sketch.n = data['n']
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in data['levels']]
+        return sketch
+
+
+def _sketch_chunk(chunk, columns, by, k, seed):
+    """Worker: one sketch per (column, group) for a chunk of rows."""
+    sketches = {}
+    rng = np.random.default_rng(seed)
+    for group, rows in chunk.groupby(by, sort=False):
+        for column in columns:
+            sketch = KLLSketch(k, rng.integers(2 ** 32))
+            sketches[(column, group)] = sketch.update(rows[column].to_numpy(dtype=np.float64))
+    return sketches
+
+
+def sketch_columns(df, columns=LII_COLUMNS, by='gank_focus', k=K, chunk_rows=CHUNK_ROWS, jobs=None, seed=42):
+    """
+    KLL sketches of `columns` per value of `by`, built chunk by chunk (in
+    worker processes when jobs > 1) and merged.
+
+    Returns:
+        {(column, group): KLLSketch}
+    """
+    chunks = [df.iloc[start:start + chunk_rows][[by, *columns]] for start in range(0, len(df), chunk_rows)]
+    seeds = np.random.SeedSequence(seed).spawn(max(len(chunks), 1))
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(chunks)))
+    if jobs == 1:
+        partials = [_sketch_chunk(c, columns, by, k, s) for c, s in zip(chunks, seeds)]
+    else:
+        with process_pool(jobs) as pool:
+            partials = list(pool.map(_sketch_chunk, chunks, [columns] * len(chunks),
+                                     [by] * len(chunks), [k] * len(chunks), seeds))
+
+    sketches = {}
+    for partial in partials:
+        for key, sketch in partial.items():
+            if key in sketches:
+                sketches[key].merge(sketch)
+            else:
+                sketches[key] = sketch
+    return sketches
+
+
+def pooled(sketches, column, seed=None):
+    """One sketch of `column` over every group (the group sketches merged)."""
+    keys = [key for key in sketches if key[0] == column]
+    if not keys:
+        return KLLSketch(seed=seed)
+    merged = KLLSketch(sketches[keys[0]].k, seed)
+    for key in keys:
+        merged.merge(sketches[key])
+    return merged
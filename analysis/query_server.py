@@ -0,0 +1,338 @@
+"""
+Local Query API for Bot vs Top Jungle Gank Analysis
+Serves filtered aggregate statistics over the processed trade data so new
+slices (e.g. LCK only, patch 25.10+) can be answered without rerunning the
+analysis scripts.
+
+Endpoints (GET, JSON responses):
+    /api/health                  row count and available filter values
+    /api/stats?<filters>         win rate, objective rate and LII stats by gank focus
+    /api/test?metric=<col>&<filters>
+                                 bot vs top permutation test on `result` or `obj_conversion`
+
+Filters: league, split, side, gank_focus (comma-separated values allowed),
+patch_min, patch_max (inclusive, e.g. 25.10).
+"""
+import argparse
+import json
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from config import OUTPUT_DIR
+from eda_and_tests import permutation_test
+from exact_tests import exact_diff_in_means_test, is_binary
+
+# Paths
+PROCESSED_DATA = OUTPUT_DIR / "processed_data.json"
+
+HOST = "127.0.0.1"
+PORT = 8050
+
+# Number of distinct queries whose results are kept in memory
+CACHE_SIZE = 1024
+# Permutations per /api/test query on non-binary data (0/1 metrics use the
+# exact test; the offline scripts use 10,000)
+QUERY_PERMUTATIONS = 1000
+
+CATEGORICAL_COLUMNS = ['league', 'split', 'side', 'gank_focus']
+NUMERIC_COLUMNS = ['result', 'obj_conversion', 'lii_top', 'lii_bot', 'lii_diff']
+TEST_METRICS = ['result', 'obj_conversion']
+
+
+class QueryError(ValueError):
+    """Raised for malformed queries; reported to the client as HTTP 400."""
+
+
+def patch_key(patch):
+    """Turn a patch string like '25.10' into a sortable integer (2510)."""
+    try:
+        major, minor = str(patch).split('.')[:2]
+        return int(major) * 100 + int(minor)
+    except ValueError:
+        raise QueryError(f"Invalid patch: {patch!r}")
+
+
+class ColumnStore:
+    """
+    Column-oriented, in-memory copy of the processed trade data.
+
+    Categorical columns are stored as small integer codes and numeric columns
+    as float64 arrays, so every filter is a handful of vectorized comparisons.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.categories = {}
+        self.codes = {}
+        for col in CATEGORICAL_COLUMNS:
+            if col not in df.columns:
+                continue
+            cat = pd.Categorical(df[col].astype('string'))
+            self.categories[col] = list(cat.categories)
+            self.codes[col] = cat.codes.astype(np.int16)
+
+        self.numeric = {
+            col: df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in NUMERIC_COLUMNS if col in df.columns
+        }
+
+        self.patch = None
+        if 'patch' in df.columns:
+            self.patch = np.array(
+                [patch_key(p) if pd.notna(p) else -1 for p in df['patch']],
+                dtype=np.int32
+            )
+
+    @classmethod
+    def from_json(cls, path=PROCESSED_DATA):
+        # Keep patch as text so that e.g. 25.10 is not read back as 25.1
+        return cls(pd.read_json(path, dtype={'patch': str}))
+
+    def mask(self, filters):
+        """Boolean row mask for a dict of normalized filters."""
+        mask = np.ones(self.n_rows, dtype=bool)
+        for col, values in filters.items():
+            if col in ('patch_min', 'patch_max'):
+                if self.patch is None:
+                    raise QueryError("Processed data has no 'patch' column")
+                bound = patch_key(values)
+                mask &= (self.patch >= bound) if col == 'patch_min' else (self.patch <= bound)
+                continue
+
+            if col not in self.codes:
+                raise QueryError(f"Unknown filter column: {col}")
+            wanted = [self.categories[col].index(v) for v in values if v in self.categories[col]]
+            mask &= np.isin(self.codes[col], wanted)
+        return mask
+
+    def focus_masks(self, mask):
+        """Split a row mask into bot-focus and top-focus rows."""
+        codes = self.codes['gank_focus']
+        cats = self.categories['gank_focus']
+        bot = mask & (codes == cats.index('bot')) if 'bot' in cats else np.zeros_like(mask)
+        top = mask & (codes == cats.index('top')) if 'top' in cats else np.zeros_like(mask)
+        return bot, top
+
+
+def parse_filters(params):
+    """Normalize query-string parameters into a hashable filter dict."""
+    filters = {}
+    for key, raw in params.items():
+        if key == 'metric':
+            continue
+        value = raw[-1] if isinstance(raw, list) else raw
+        if key in ('patch_min', 'patch_max'):
+            patch_key(value)  # validate early
+            filters[key] = value
+        else:
+            filters[key] = tuple(sorted(v.strip() for v in value.split(',') if v.strip()))
+    return filters
+
+
+def _nan_stat(func, values):
+    """Apply a numpy reduction, returning None for empty input."""
+    values = values[~np.isnan(values)]
+    return float(func(values)) if len(values) else None
+
+
+class QueryEngine:
+    """Answers stats/test queries against a ColumnStore with an LRU result cache."""
+
+    def __init__(self, store, n_permutations=QUERY_PERMUTATIONS, cache_size=CACHE_SIZE):
+        self.store = store
+        self.n_permutations = n_permutations
+        self._cached = lru_cache(maxsize=cache_size)(self._run)
+
+    def query(self, kind, filters, metric=None):
+        key = (kind, metric, tuple(sorted(filters.items())))
+        return self._cached(key)
+
+    def cache_info(self):
+        return self._cached.cache_info()._asdict()
+
+    def _run(self, key):
+        kind, metric, filter_items = key
+        filters = dict(filter_items)
+        if kind == 'stats':
+            return self._stats(filters)
+        if kind == 'test':
+            return self._test(filters, metric)
+        raise QueryError(f"Unknown query: {kind}")
+
+    def _group_stats(self, mask):
+        num = self.store.numeric
+        n = int(mask.sum())
+        if n == 0:
+            return {'count': 0}
+        lii_diff = num['lii_diff'][mask]
+        return {
+            'count': n,
+            'winrate': _nan_stat(np.mean, num['result'][mask]),
+            'obj_rate': _nan_stat(np.mean, num['obj_conversion'][mask]),
+            'lii_top_mean': _nan_stat(np.mean, num['lii_top'][mask]),
+            'lii_bot_mean': _nan_stat(np.mean, num['lii_bot'][mask]),
+            'lii_diff_mean': _nan_stat(np.mean, lii_diff),
+            'lii_diff_median': _nan_stat(np.median, lii_diff),
+            'lii_diff_std': _nan_stat(np.std, lii_diff),
+        }
+
+    def _stats(self, filters):
+        mask = self.store.mask(filters)
+        bot, top = self.store.focus_masks(mask)
+        return {
+            'filters': filters,
+            'all': self._group_stats(mask),
+            'bot': self._group_stats(bot),
+            'top': self._group_stats(top),
+        }
+
+    def _test(self, filters, metric):
+        if metric not in TEST_METRICS:
+            raise QueryError(f"metric must be one of {TEST_METRICS}")
+        bot, top = self.store.focus_masks(self.store.mask(filters))
+        values = self.store.numeric[metric]
+        bot_vals = values[bot]
+        top_vals = values[top]
+        if len(bot_vals) == 0 or len(top_vals) == 0:
+            raise QueryError("Both bot and top focus groups must be non-empty")
+
+        result = {
+            'filters': filters,
+            'metric': metric,
+            'bot_count': len(bot_vals),
+            'top_count': len(top_vals),
+        }
+        if is_binary(bot_vals, top_vals):
+            observed, p_value, _, _ = exact_diff_in_means_test(bot_vals, top_vals)
+            result['method'] = 'exact'
+        else:
+            def diff_means(g1, g2):
+                return np.mean(g1) - np.mean(g2)
+
+            # A fixed seed per request, so a repeated query returns the same p-value;
+            # a local generator keeps concurrent requests (and the global RNG) independent
+            rng = np.random.default_rng(0)
+            observed, p_value, _ = permutation_test(bot_vals, top_vals, diff_means, self.n_permutations, rng=rng)
+            result['method'] = 'permutation'
+            result['n_permutations'] = self.n_permutations
+        result['observed_stat'] = float(observed)
+        result['p_value'] = float(p_value)
+        return result
+
+
+def make_handler(engine):
+    """Build a request handler class bound to a QueryEngine."""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            try:
+                if url.path == '/api/health':
+                    body = {
+                        'rows': engine.store.n_rows,
+                        'filters': engine.store.categories,
+                        'cache': engine.cache_info(),
+                    }
+                elif url.path == '/api/stats':
+                    body = engine.query('stats', parse_filters(params))
+                elif url.path == '/api/test':
+                    metric = params.get('metric', ['result'])[-1]
+                    body = engine.query('test', parse_filters(params), metric)
+                else:
+                    self._send(404, {'error': f"Unknown endpoint: {url.path}"})
+                    return
+            except QueryError as e:
+                self._send(400, {'error': str(e)})
+                return
+            self._send(200, body)
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            # The Vite dev server runs on a different port
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def benchmark(engine, n_queries=500, seed=0):
+    """
+    Time a random mix of stats/test queries and report latency percentiles.
+    Filter combinations repeat, so later queries exercise the LRU cache.
+    """
+    rng = np.random.default_rng(seed)
+    store = engine.store
+    latencies = []
+    for _ in range(n_queries):
+        filters = {}
+        for col in ('league', 'side'):
+            if col in store.categories and rng.random() < 0.5:
+                filters[col] = (str(rng.choice(store.categories[col])),)
+        kind = 'test' if rng.random() < 0.25 else 'stats'
+        metric = str(rng.choice(TEST_METRICS)) if kind == 'test' else None
+
+        start = time.perf_counter()
+        try:
+            engine.query(kind, filters, metric)
+        except QueryError:
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = np.array(latencies)
+    result = {
+        'queries': n_queries,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'max_ms': float(latencies.max()),
+        'cache': engine.cache_info(),
+    }
+    print(f"Benchmark over {n_queries} queries ({store.n_rows} rows): "
+          f"p50 = {result['p50_ms']:.2f} ms, p95 = {result['p95_ms']:.2f} ms")
+    return result
+
+
+def serve(data_path=PROCESSED_DATA, host=HOST, port=PORT, run_benchmark=False):
+    """Load the processed data and serve it until interrupted."""
+    print(f"Loading {data_path}...")
+    engine = QueryEngine(ColumnStore.from_json(data_path))
+    print(f"Loaded {engine.store.n_rows} team-game rows")
+
+    if run_benchmark:
+        benchmark(engine)
+        return
+
+    server = ThreadingHTTPServer((host, port), make_handler(engine))
+    print(f"Serving on http://{host}:{port}/api/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve filtered gank statistics over HTTP.")
+    parser.add_argument('--data', type=Path, default=PROCESSED_DATA, help="processed_data.json to serve")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--benchmark', action='store_true', help="Run the latency benchmark and exit")
+    args = parser.parse_args()
+    serve(args.data, args.host, args.port, args.benchmark)
+
+
+if __name__ == "__main__":
+    main()
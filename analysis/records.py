@@ -0,0 +1,146 @@
+"""
+Compact Team-Game Records
+Struct-of-arrays storage for one row per (game, team) used by the data
+processing pipeline.
+
+Text columns (gameid, teamid, side, gank_focus, ...) are stored as integer
+codes into a per-column category table, numeric columns as fixed-width numpy
+arrays. Compared with a list of per-row dicts (or object-dtype DataFrame
+columns) this removes the per-row Python object overhead entirely.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Text columns stored as category codes, in export order
+CATEGORICAL_COLUMNS = ['gameid', 'teamid', 'league', 'split', 'patch', 'date', 'side', 'gank_focus', 'focus_source']
+
+# Fixed-width dtypes for numeric columns. Small counts use float32 (they can be
+# missing); lane diffs stay float64 so exported values are unchanged.
+NUMERIC_DTYPES = {
+    'result': np.int8,
+    'jng_ka10': np.float32,
+    'top_ka10': np.float32,
+    'mid_ka10': np.float32,
+    'bot_ka10': np.float32,
+    'focus_top': np.float32,
+    'focus_mid': np.float32,
+    'focus_bot': np.float32,
+    'dragons': np.float32,
+    'heralds': np.float32,
+    'obj_conversion': np.int8,
+    'top_xpdiff10': np.float64,
+    'bot_xpdiff10': np.float64,
+    'top_csdiff10': np.float64,
+    'bot_csdiff10': np.float64,
+    'lii_top': np.float64,
+    'lii_bot': np.float64,
+    'lii_diff': np.float64,
+}
+
+
+def _code_dtype(n_categories):
+    """Smallest signed integer type that can hold codes (and -1 for missing)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class TeamGameRecords:
+    """
+    Column store of team-game rows.
+
+    Attributes:
+        codes: column -> integer code array (-1 = missing)
+        categories: column -> numpy array of category values
+        numeric: column -> fixed-width numpy array
+    """
+
+    def __init__(self, codes, categories, numeric):
+        self.codes = codes
+        self.categories = categories
+        self.numeric = numeric
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Build records from a mapping of column name -> array-like."""
+        codes = {}
+        categories = {}
+        numeric = {}
+        for name, values in columns.items():
+            arr = np.asarray(values)
+            if name in NUMERIC_DTYPES:
+                numeric[name] = arr.astype(NUMERIC_DTYPES[name])
+            elif arr.dtype.kind in 'biuf':
+                numeric[name] = arr
+            else:
+                col_codes, uniques = pd.factorize(pd.Series(values), sort=False)
+                codes[name] = col_codes.astype(_code_dtype(len(uniques)))
+                categories[name] = np.asarray(uniques, dtype=object)
+        return cls(codes, categories, numeric)
+
+    def __len__(self):
+        for arr in self.codes.values():
+            return len(arr)
+        for arr in self.numeric.values():
+            return len(arr)
+        return 0
+
+    @property
+    def columns(self):
+        ordered = [c for c in CATEGORICAL_COLUMNS if c in self.codes]
+        ordered += [c for c in self.codes if c not in ordered]
+        ordered += [c for c in NUMERIC_DTYPES if c in self.numeric]
+        ordered += [c for c in self.numeric if c not in ordered]
+        return ordered
+
+    def __getitem__(self, name):
+        """Decoded column values (missing categoricals come back as None)."""
+        if name in self.numeric:
+            return self.numeric[name]
+        col_codes = self.codes[name]
+        values = np.empty(len(col_codes), dtype=object)
+        present = col_codes >= 0
+        values[present] = self.categories[name][col_codes[present]]
+        return values
+
+    def take(self, indices):
+        """New records with the selected rows (boolean mask or positions)."""
+        codes = {}
+        categories = {}
+        for name, arr in self.codes.items():
+            # Drop categories no longer referenced so the tables shrink with the rows
+            selected = arr[indices]
+            used, remapped = np.unique(selected, return_inverse=True)
+            if len(used) and used[0] < 0:
+                used, remapped = used[1:], remapped - 1
+            codes[name] = remapped.astype(_code_dtype(len(used)))
+            categories[name] = self.categories[name][used]
+        return TeamGameRecords(
+            codes,
+            categories,
+            {name: arr[indices] for name, arr in self.numeric.items()},
+        )
+
+    def with_columns(self, columns):
+        """New records with extra/replaced columns (same row order)."""
+        extra = TeamGameRecords.from_columns(columns)
+        return TeamGameRecords(
+            {**self.codes, **extra.codes},
+            {**self.categories, **extra.categories},
+            {**self.numeric, **extra.numeric},
+        )
+
+    def to_frame(self):
+        """Expand to a pandas DataFrame (categoricals decoded back to values)."""
+        return pd.DataFrame({name: self[name] for name in self.columns})
+
+    def nbytes(self):
+        """Approximate memory footprint in bytes, including category tables."""
+        total = sum(arr.nbytes for arr in self.codes.values())
+        total += sum(arr.nbytes for arr in self.numeric.values())
+        for cats in self.categories.values():
+            total += cats.nbytes + sum(sys.getsizeof(v) for v in cats)
+        return total
@@ -0,0 +1,117 @@
+"""
+Multi-Season CSV Ingestion
+Reads several Oracle's Elixir CSVs (one per season, optionally compressed)
+given as a glob pattern, e.g. `--data 'data/*_LoL_esports_match_data*.csv*'`.
+
+- Files are decompressed and parsed concurrently, one thread per file, with
+  pyarrow's multithreaded CSV reader. Compression is detected from the file
+  extension (.gz, .bz2, .zst, ...).
+- Position names are normalized per file on the Arrow table (vectorized
+  Arrow compute kernels, in the same worker thread), and rows without a
+  position are dropped there.
+- The per-file Arrow tables are concatenated, with schemas unified across
+  seasons, and converted to pandas once, so no intermediate full-width
+  pandas frame is built per file.
+
+pyarrow is optional: without it each file is read with pandas instead
+(still one thread per file).
+"""
+import glob
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+POSITION_MAPPING = {
+    'top': 'TOP',
+    'jng': 'JNG',
+    'jungle': 'JNG',
+    'mid': 'MID',
+    'bot': 'ADC',
+    'adc': 'ADC',
+    'sup': 'SUP',
+    'support': 'SUP'
+}
+# Columns kept as text: patch (25.10 must not become 25.1) and date (as in
+# the single-file pandas reader)
+TEXT_COLUMNS = ('patch', 'date')
+# Bytes per Arrow CSV parse block (blocks are parsed in parallel)
+BLOCK_SIZE = 16 << 20
+
+
+def is_pattern(path):
+    """True if `path` is a glob pattern rather than a single file."""
+    return any(ch in str(path) for ch in '*?[')
+
+
+def expand_paths(path):
+    """Files matched by a glob pattern (sorted), or the single path itself."""
+    if not is_pattern(path):
+        return [Path(path)]
+    paths = sorted(Path(p) for p in glob.glob(str(path)))
+    if not paths:
+        raise FileNotFoundError(f"No files match {path}")
+    return paths
+
+
+def _read_arrow(path, normalize):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+
+    with pa.input_stream(str(path), compression='detect') as stream:
+        table = pacsv.read_csv(
+            stream,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(
+                column_types={c: pa.string() for c in TEXT_COLUMNS},
+                strings_can_be_null=True,
+            ),
+        )
+
+    if normalize and 'position' in table.column_names:
+        position = table['position']
+        if not pa.types.is_string(position.type):
+            position = position.cast(pa.string())
+        keys = pa.array(list(POSITION_MAPPING))
+        values = pa.array(list(POSITION_MAPPING.values()))
+        mapped = pc.take(values, pc.index_in(pc.utf8_lower(position), value_set=keys))
+        position = pc.coalesce(mapped, position)
+        table = table.set_column(table.column_names.index('position'), 'position', position)
+        table = table.filter(pc.is_valid(position))
+    return table
+
+
+def _read_pandas(path, normalize):
+    df = pd.read_csv(path, dtype={c: str for c in TEXT_COLUMNS})
+    if normalize and 'position' in df.columns:
+        df['position'] = df['position'].str.lower().map(POSITION_MAPPING).fillna(df['position'])
+        df = df[df['position'].notna()]
+    return df
+
+
+def read_csv_files(path, normalize=True, jobs=None):
+    """
+    Read every file matched by `path` into one DataFrame, files in parallel.
+
+    Args:
+        normalize: map position names to TOP/JNG/MID/ADC/SUP and drop rows
+            without a position
+        jobs: reader threads (None = one per file)
+    """
+    paths = expand_paths(path)
+    try:
+        import pyarrow as pa
+        reader = _read_arrow
+    except ImportError:
+        pa = None
+        reader = _read_pandas
+
+    workers = max(1, min(jobs or len(paths), len(paths)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(lambda p: reader(p, normalize), paths))
+
+    if pa is None:
+        return pd.concat(parts, ignore_index=True)
+    table = pa.concat_tables(parts, promote_options='permissive')
+    return table.to_pandas()
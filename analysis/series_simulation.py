@@ -0,0 +1,333 @@
+"""
+Series and Bracket Simulation
+Monte Carlo Bo3/Bo5 series and single-elimination brackets driven by the
+final win model's per-game probabilities, split by gank-focus scenario.
+
+- Matchup probabilities: for every ordered pair of teams and both scenarios
+  (the row team's jungler focuses bot and the opponent's top, or the
+  reverse), the final model scores the row team's average feature profile in
+  that scenario with the pair's current Elo difference. Each probability is
+  averaged with one minus the opponent's mirrored probability, so
+  P[bot, i, j] + P[top, j, i] = 1. The "observed" scenario mixes the two by
+  how often each team actually focused bot.
+- Series: each batch draws a (sims x matchups x games) uniform matrix. The
+  series winner is whoever wins the majority of all best_of games: with
+  independent games that is the same team as first to ceil(best_of / 2), so
+  no sequential stopping is needed.
+- Brackets: every round pairs adjacent slots of a (sims x variants x teams)
+  slot matrix and draws one uniform per series against the exact series
+  probability. Variants are the observed bracket plus, for every team, the
+  bracket in which that team always focuses bot (or top).
+- Simulations are split across worker processes (jobs) and run in batches
+  of at most BATCH_ELEMENTS random numbers; counts are summed.
+
+Every probability comes with its Monte Carlo standard error
+sqrt(p (1 - p) / n) and a 95% interval.
+"""
+import json
+import os
+import time
+from math import comb
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import process_pool
+from config import get_config
+from modeling import build_final_model, load_data, prepare_features
+
+# Gank-focus scenarios, from the row team's point of view
+SCENARIOS = ('bot', 'top')
+# Teams in the simulated bracket (a power of two), picked by current Elo
+BRACKET_SIZE = 8
+# Best-of per bracket round, first round first
+BRACKET_BEST_OF = (5, 5, 5)
+# Series formats in the pairwise table
+SERIES_FORMATS = (3, 5)
+# Trade games a team needs to be considered for the bracket
+MIN_GAMES = 5
+# Upper bound on random numbers drawn per batch
+BATCH_ELEMENTS = 20_000_000
+# z for the 95% Monte Carlo interval
+Z_95 = 1.959963984540054
+
+
+def series_win_probability(p, best_of):
+    """Exact probability of winning a best-of series with per-game win probability p."""
+    p = np.asarray(p, dtype=np.float64)
+    need = best_of // 2 + 1
+    return sum(comb(best_of, k) * p ** k * (1 - p) ** (best_of - k) for k in range(need, best_of + 1))
+
+
+def mc_interval(p, n):
+    """Monte Carlo standard error and 95% interval of an estimated probability."""
+    se = np.sqrt(p * (1 - p) / n)
+    return se, np.clip(p - Z_95 * se, 0, 1), np.clip(p + Z_95 * se, 0, 1)
+
+
+def _run_parallel(worker, n_sims, args, jobs=None, seed=42):
+    """
+    Run `worker(n, seed, *args) -> counts` over shares of `n_sims` (in worker
+    processes when jobs > 1) and sum the count arrays.
+    """
+    jobs = max(1, min(jobs or os.cpu_count() or 1, n_sims))
+    shares = [n_sims // jobs + (i < n_sims % jobs) for i in range(jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(jobs)
+    if jobs == 1:
+        return worker(shares[0], seeds[0], *args)
+    with process_pool(jobs) as pool:
+        return sum(pool.map(worker, shares, seeds, *[[a] * jobs for a in args]))
+
+
+def _series_worker(n_sims, seed, p, best_of):
+    """Series wins of the first team per matchup over n_sims simulations."""
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(len(p), dtype=np.int64)
+    per_batch = max(1, BATCH_ELEMENTS // (len(p) * best_of))
+    for start in range(0, n_sims, per_batch):
+        rows = min(per_batch, n_sims - start)
+        games = rng.random((rows, len(p), best_of)) < p[None, :, None]
+        wins += np.count_nonzero(2 * games.sum(axis=2) > best_of, axis=0)
+    return wins
+
+
+def simulate_series(p, best_of=5, n_sims=1_000_000, jobs=None, seed=42):
+    """
+    Monte Carlo series win probability for per-game win probabilities `p`.
+
+    Returns:
+        dict of arrays shaped like p: p (estimate), se, lo, hi (95% interval)
+    """
+    p = np.asarray(p, dtype=np.float64)
+    wins = _run_parallel(_series_worker, n_sims, (p.ravel(), best_of), jobs, seed)
+    estimate = (wins / n_sims).reshape(p.shape)
+    se, lo, hi = mc_interval(estimate, n_sims)
+    return {'p': estimate, 'se': se, 'lo': lo, 'hi': hi}
+
+
+def _bracket_worker(n_sims, seed, series_probs):
+    """
+    Teams reaching each round per variant over n_sims brackets.
+
+    series_probs: (variants, rounds, teams, teams) series win probabilities,
+    teams in bracket slot order. Returns (variants, rounds, teams) counts of
+    round wins.
+    """
+    rng = np.random.default_rng(seed)
+    n_variants, n_rounds, n_teams, _ = series_probs.shape
+    counts = np.zeros((n_variants, n_rounds, n_teams), dtype=np.int64)
+    variant = np.arange(n_variants)[None, :, None]
+    per_batch = max(1, BATCH_ELEMENTS // (n_variants * n_teams))
+    for start in range(0, n_sims, per_batch):
+        rows = min(per_batch, n_sims - start)
+        slots = np.broadcast_to(np.arange(n_teams), (rows, n_variants, n_teams))
+        for r in range(n_rounds):
+            a, b = slots[:, :, 0::2], slots[:, :, 1::2]
+            q = series_probs[variant, r, a, b]
+            slots = np.where(rng.random(q.shape) < q, a, b)
+            winners = (slots + variant * n_teams).ravel()
+            counts[:, r] += np.bincount(winners, minlength=n_variants * n_teams).reshape(n_variants, n_teams)
+    return counts
+
+
+def simulate_bracket(game_probs, best_of=BRACKET_BEST_OF, n_sims=1_000_000, jobs=None, seed=42):
+    """
+    Single-elimination bracket over teams in slot order (slot 0 plays 1,
+    2 plays 3, ...).
+
+    Args:
+        game_probs: (teams, teams) per-game win probabilities, or
+            (variants, teams, teams) to simulate several brackets at once
+        best_of: best-of per round (one entry per round)
+
+    Returns:
+        dict of (variants, rounds, teams) arrays (variant axis dropped for a
+        single matrix): p (probability of winning that round), se, lo, hi
+    """
+    game_probs = np.asarray(game_probs, dtype=np.float64)
+    single = game_probs.ndim == 2
+    if single:
+        game_probs = game_probs[None]
+    n_teams = game_probs.shape[-1]
+    if n_teams < 2 or n_teams & (n_teams - 1) or 2 ** len(best_of) != n_teams:
+        raise ValueError(f"A bracket of {n_teams} teams needs {int(np.log2(max(n_teams, 1)))} rounds "
+                         f"and a power-of-two size; got best_of={best_of}")
+
+    series_probs = np.stack([series_win_probability(game_probs, bo) for bo in best_of], axis=1)
+    counts = _run_parallel(_bracket_worker, n_sims, (series_probs,), jobs, seed)
+    estimate = counts / n_sims
+    se, lo, hi = mc_interval(estimate, n_sims)
+    result = {'p': estimate, 'se': se, 'lo': lo, 'hi': hi}
+    return {k: v[0] for k, v in result.items()} if single else result
+
+
+def team_table(df, min_games=MIN_GAMES):
+    """Current Elo, bot-focus rate and trade-game count per team, best first."""
+    df = df.sort_values('date', kind='stable')
+    teams = df.groupby('teamid').agg(
+        elo=('elo', 'last'),
+        games=('result', 'size'),
+        bot_rate=('gank_focus', lambda s: (s == 'bot').mean()),
+    )
+    teams = teams[teams['games'] >= min_games]
+    return teams.sort_values('elo', ascending=False)
+
+
+def matchup_probabilities(model, df, teams, fill_missing=True):
+    """
+    Per-game win probabilities for every ordered pair of `teams`.
+
+    Returns:
+        (len(SCENARIOS), T, T) array; [s, i, j] is the probability that team
+        i beats team j when i's jungler focuses SCENARIOS[s] and j's the other
+        side
+    """
+    X, _, feature_names = prepare_features(df, 'advanced', fill_missing)
+    X = X.assign(teamid=df['teamid'].to_numpy())
+    profile_columns = [c for c in feature_names if c not in ('elo_diff', 'gank_focus_encoded')]
+
+    # Average feature profile per team and scenario (the scenario average
+    # over all teams where a team never played that side)
+    raw = np.empty((len(SCENARIOS), len(teams), len(teams)))
+    elo = teams['elo'].to_numpy()
+    for s, focus in enumerate(SCENARIOS):
+        rows = X[X['gank_focus_encoded'] == int(focus == 'bot')]
+        profiles = rows.groupby('teamid')[profile_columns].mean().reindex(teams.index)
+        profiles = profiles.fillna(rows[profile_columns].mean())
+
+        grid = pd.DataFrame(np.repeat(profiles.to_numpy(), len(teams), axis=0), columns=profile_columns)
+        grid['elo_diff'] = np.subtract.outer(elo, elo).ravel()
+        grid['gank_focus_encoded'] = int(focus == 'bot')
+        raw[s] = model.predict_proba(grid[feature_names])[:, 1].reshape(len(teams), len(teams))
+
+    # Make the two sides of each matchup agree: P[s, i, j] = 1 - P[other, j, i]
+    probs = (raw + 1 - raw[::-1].transpose(0, 2, 1)) / 2
+    for s in range(len(SCENARIOS)):
+        np.fill_diagonal(probs[s], 0.5)
+    return probs
+
+
+def observed_probabilities(probs, bot_rate):
+    """Per-game probabilities with each side's focus drawn from its bot-focus rate."""
+    b = np.clip(np.asarray(bot_rate, dtype=np.float64), 1e-6, 1 - 1e-6)
+    i_bot = np.outer(b, 1 - b)
+    w = i_bot / (i_bot + i_bot.T)
+    return w * probs[SCENARIOS.index('bot')] + (1 - w) * probs[SCENARIOS.index('top')]
+
+
+def bracket_variants(probs, observed):
+    """
+    The observed bracket, then for every team k and scenario s the bracket in
+    which k always plays s (everyone else as observed).
+    """
+    variants = [observed]
+    for s in range(len(SCENARIOS)):
+        for k in range(observed.shape[0]):
+            variant = observed.copy()
+            variant[k, :] = probs[s, k, :]
+            variant[:, k] = 1 - probs[s, k, :]
+            variant[k, k] = 0.5
+            variants.append(variant)
+    return np.stack(variants)
+
+
+def seeding_order(n_teams):
+    """Bracket slots for seeds 0..n-1 so the top seeds meet last (1v8, 4v5, 2v7, 3v6)."""
+    order = [0]
+    while len(order) < n_teams:
+        size = 2 * len(order)
+        order = [s for seed in order for s in (seed, size - 1 - seed)]
+    return np.array(order)
+
+
+def _interval_dict(result, index):
+    return {key: float(result[key][index]) for key in ('p', 'se', 'lo', 'hi')}
+
+
+def main(config=None):
+    """Simulate series and a seeded bracket from the final model and export them."""
+    config = config or get_config()
+    n_sims = config.series_simulations
+
+    print("Loading data...")
+    df = load_data(config.processed_data)
+    fill_missing = config.model_family != 'hist_gb'
+    X, y, _ = prepare_features(df, 'advanced', fill_missing)
+    model = build_final_model(
+        X, y,
+        param_grid=config.hgb_param_grid if config.model_family == 'hist_gb' else config.param_grid,
+        cv=config.cv_folds,
+        n_jobs=config.jobs or -1,
+        family=config.model_family,
+    )
+
+    teams = team_table(df).head(BRACKET_SIZE)
+    if len(teams) < BRACKET_SIZE:
+        print(f"Need {BRACKET_SIZE} teams with {MIN_GAMES}+ trade games, found {len(teams)}; skipping simulation")
+        return None
+    probs = matchup_probabilities(model, df, teams, fill_missing)
+    observed = observed_probabilities(probs, teams['bot_rate'])
+    scenario_probs = {'observed': observed, **{s: probs[i] for i, s in enumerate(SCENARIOS)}}
+    team_ids = teams.index.tolist()
+
+    # Pairwise series table: every scenario and format in one simulation each
+    started = time.perf_counter()
+    pairs = np.triu_indices(len(teams), k=1)
+    series = []
+    for best_of in SERIES_FORMATS:
+        game_p = np.stack([p[pairs] for p in scenario_probs.values()])
+        result = simulate_series(game_p, best_of, n_sims, config.jobs)
+        exact = series_win_probability(game_p, best_of)
+        for s, scenario in enumerate(scenario_probs):
+            for m, (i, j) in enumerate(zip(*pairs)):
+                series.append({
+                    'team': team_ids[i], 'opponent': team_ids[j], 'best_of': best_of, 'scenario': scenario,
+                    'game_p': float(game_p[s, m]), 'exact': float(exact[s, m]),
+                    **_interval_dict(result, (s, m)),
+                })
+    print(f"Simulated {n_sims:,} series for {len(series)} matchup/format/scenario combinations "
+          f"in {time.perf_counter() - started:.1f} s")
+
+    # Seeded bracket: observed plus each team's always-bot / always-top variant
+    started = time.perf_counter()
+    slots = seeding_order(len(teams))
+    variants = bracket_variants(probs, observed)[:, slots][:, :, slots]
+    result = simulate_bracket(variants, BRACKET_BEST_OF, n_sims, config.jobs)
+    print(f"Simulated {n_sims:,} brackets x {len(variants)} variants in {time.perf_counter() - started:.1f} s")
+
+    rounds = [f"Won round {r + 1}" for r in range(len(BRACKET_BEST_OF) - 1)] + ['Champion']
+    bracket = []
+    for slot, seed in enumerate(slots):
+        entry = {'team': team_ids[seed], 'seed': int(seed) + 1, 'elo': float(teams['elo'].iloc[seed]),
+                 'bot_rate': float(teams['bot_rate'].iloc[seed])}
+        variant_of = {'observed': 0, **{s: 1 + i * len(teams) + seed for i, s in enumerate(SCENARIOS)}}
+        for scenario, v in variant_of.items():
+            entry[scenario] = [_interval_dict(result, (v, r, slot)) for r in range(len(rounds))]
+        bracket.append(entry)
+    bracket.sort(key=lambda entry: entry['seed'])
+
+    print("\nChampionship probability (observed | always bot | always top):")
+    for entry in bracket:
+        print(f"  {entry['seed']}. {entry['team']}: " + " | ".join(
+            f"{entry[s][-1]['p']:.3f} ± {Z_95 * entry[s][-1]['se']:.3f}" for s in ('observed', *SCENARIOS)
+        ))
+
+    results = {
+        'n_simulations': n_sims,
+        'scenarios': list(scenario_probs),
+        'bracket_best_of': list(BRACKET_BEST_OF),
+        'rounds': rounds,
+        'series': series,
+        'bracket': bracket,
+    }
+    output_path = Path(config.output_dir) / "series_simulation.json"
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nExported series simulation to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
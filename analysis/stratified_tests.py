@@ -0,0 +1,249 @@
+"""
+Stratified Hypothesis Tests (per league / split)
+Repeats the bot vs top comparison of eda_and_tests within every league-split
+slice, with family-wise error control across slices.
+
+Each permutation draw shuffles gank-focus labels within every stratum at once,
+and that single draw is scored for all slices together (a batched version of
+eda_and_tests.permutation_test). The Westfall-Young step-down max-T procedure
+then turns the shared draws into adjusted p-values. Batches of draws are
+spread across worker processes.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import process_pool
+from config import get_config
+from eda_and_tests import load_processed_data
+
+STRATA_COLUMNS = ['league', 'split']
+METRICS = {
+    'result': 'Win Rate',
+    'obj_conversion': 'Objective Conversion Rate',
+}
+# Slices need at least this many bot-focus and top-focus rows to be tested
+MIN_GROUP_SIZE = 5
+# Upper bound on permutation-matrix elements held in memory per batch
+BATCH_ELEMENTS = 2_000_000
+# Relative tolerance when comparing permuted against observed statistics
+TIE_TOLERANCE = 1e-9
+
+
+def prepare_strata(df, metric, strata_columns=STRATA_COLUMNS):
+    """
+    Sort rows by stratum and compute per-stratum constants.
+
+    Returns a dict with the row arrays (values, is_bot, stratum codes), the
+    start offset of each stratum, and a DataFrame describing each slice.
+    """
+    missing = [c for c in strata_columns if c not in df.columns]
+    if missing:
+        raise ValueError(
+            f"Processed data has no {missing} column(s); rerun the 'process' stage to add them."
+        )
+
+    df = df[df['gank_focus'].isin(['bot', 'top'])].dropna(subset=strata_columns + [metric])
+    is_bot = df['gank_focus'] == 'bot'
+    sizes = pd.DataFrame({
+        'n_bot': is_bot.groupby([df[c] for c in strata_columns]).sum(),
+        'n_top': (~is_bot).groupby([df[c] for c in strata_columns]).sum(),
+        'spread': df.groupby(strata_columns)[metric].std(ddof=0),
+    })
+    keep = sizes[
+        (sizes['n_bot'] >= MIN_GROUP_SIZE) & (sizes['n_top'] >= MIN_GROUP_SIZE) & (sizes['spread'] > 0)
+    ]
+
+    if keep.empty:
+        # No testable slice; reduceat cannot take an empty array
+        return {
+            'values': np.empty(0),
+            'is_bot': np.empty(0, dtype=bool),
+            'stratum': np.empty(0, dtype=np.int64),
+            'starts': np.empty(0, dtype=np.int64),
+            'slices': pd.DataFrame(columns=strata_columns + ['n', 'n_bot', 'n_top', 'total', 'se']),
+        }
+
+    df = df.set_index(strata_columns).loc[keep.index].reset_index()
+    stratum = df.groupby(strata_columns, sort=True).ngroup().to_numpy()
+    order = np.argsort(stratum, kind='stable')
+    df = df.iloc[order].reset_index(drop=True)
+    stratum = stratum[order]
+
+    values = df[metric].to_numpy(dtype=np.float64)
+    is_bot = (df['gank_focus'] == 'bot').to_numpy()
+    starts = np.flatnonzero(np.r_[True, stratum[1:] != stratum[:-1]])
+
+    slices = pd.DataFrame({c: df[c] for c in strata_columns}).assign(is_bot=is_bot)
+    slices = slices.groupby(strata_columns, sort=True).agg(
+        n=('is_bot', 'size'),
+        n_bot=('is_bot', 'sum'),
+    ).reset_index()
+    slices['n_top'] = slices['n'] - slices['n_bot']
+    slices['total'] = np.add.reduceat(values, starts)
+    # Permutation standard error of the difference in means within each slice:
+    # Var = sigma^2 * N / (N - 1) * (1/n_bot + 1/n_top), sigma^2 the population variance
+    sq = np.add.reduceat(values ** 2, starts)
+    n = slices['n'].to_numpy()
+    sigma2 = sq / n - (slices['total'].to_numpy() / n) ** 2
+    slices['se'] = np.sqrt(
+        sigma2 * n / (n - 1) * (1 / slices['n_bot'].to_numpy() + 1 / slices['n_top'].to_numpy())
+    )
+
+    return {
+        'values': values,
+        'is_bot': is_bot,
+        'stratum': stratum,
+        'starts': starts,
+        'slices': slices,
+    }
+
+
+def slice_statistics(values, labels, starts, n_bot, n_top, totals, se):
+    """
+    Standardized bot-minus-top difference in means for every slice.
+
+    Args:
+        labels: (n_draws, n_rows) boolean bot-focus labels (or a single row)
+
+    Returns:
+        diff, t: arrays of shape (n_draws, n_slices)
+    """
+    labels = np.atleast_2d(labels)
+    bot_sums = np.add.reduceat(labels * values, starts, axis=1)
+    diff = bot_sums / n_bot - (totals - bot_sums) / n_top
+    return diff, diff / se
+
+
+def _count_exceedances(strata, n_permutations, seed, observed_abs):
+    """
+    Worker: run `n_permutations` within-stratum shuffles and count, per slice,
+    how often the raw |T| and the step-down max-T reach the observed |T|.
+    """
+    values = strata['values']
+    is_bot = strata['is_bot']
+    stratum = strata['stratum'].astype(np.float64)
+    starts = strata['starts']
+    slices = strata['slices']
+    n_bot = slices['n_bot'].to_numpy()
+    n_top = slices['n_top'].to_numpy()
+    totals = slices['total'].to_numpy()
+    se = slices['se'].to_numpy()
+
+    threshold = observed_abs * (1 - TIE_TOLERANCE) - TIE_TOLERANCE
+    # Slices in decreasing order of observed |T| for the step-down procedure
+    order = np.argsort(-observed_abs)
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_ELEMENTS // len(values))
+    raw_counts = np.zeros(len(slices), dtype=np.int64)
+    adj_counts = np.zeros(len(slices), dtype=np.int64)
+
+    done = 0
+    while done < n_permutations:
+        size = min(batch, n_permutations - done)
+        # Rows are sorted by stratum, so sorting (stratum + uniform noise)
+        # shuffles positions within each stratum block only
+        perm = np.argsort(stratum + rng.random((size, len(values))), axis=1)
+        _, t = slice_statistics(values, is_bot[perm], starts, n_bot, n_top, totals, se)
+        t = np.abs(t)
+
+        raw_counts += (t >= threshold).sum(axis=0)
+        # Successive maxima over slices with smaller observed |T|
+        t_ordered = t[:, order]
+        successive_max = np.maximum.accumulate(t_ordered[:, ::-1], axis=1)[:, ::-1]
+        adj_counts[order] += (successive_max >= threshold[order]).sum(axis=0)
+        done += size
+
+    return raw_counts, adj_counts
+
+
+def stratified_test(df, metric, n_permutations=10000, strata_columns=STRATA_COLUMNS, jobs=None, seed=42):
+    """
+    Per-slice bot vs top permutation tests with Westfall-Young max-T adjustment.
+
+    Returns:
+        DataFrame with one row per slice: sizes, group means, observed
+        difference, raw p-value and family-wise adjusted p-value.
+    """
+    strata = prepare_strata(df, metric, strata_columns)
+    slices = strata['slices']
+    if slices.empty:
+        return slices
+
+    diff, t = slice_statistics(
+        strata['values'], strata['is_bot'], strata['starts'],
+        slices['n_bot'].to_numpy(), slices['n_top'].to_numpy(),
+        slices['total'].to_numpy(), slices['se'].to_numpy()
+    )
+    observed_abs = np.abs(t[0])
+
+    jobs = jobs or os.cpu_count() or 1
+    jobs = max(1, min(jobs, n_permutations))
+    counts_per_job = [n_permutations // jobs + (i < n_permutations % jobs) for i in range(jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(jobs)
+
+    if jobs == 1:
+        results = [_count_exceedances(strata, n_permutations, seeds[0], observed_abs)]
+    else:
+        with process_pool(jobs) as pool:
+            results = list(pool.map(
+                _count_exceedances,
+                [strata] * jobs, counts_per_job, seeds, [observed_abs] * jobs
+            ))
+    raw_counts = sum(r[0] for r in results)
+    adj_counts = sum(r[1] for r in results)
+
+    # Step-down adjusted p-values must not decrease as observed |T| decreases
+    order = np.argsort(-observed_abs)
+    p_adjusted = adj_counts / n_permutations
+    p_adjusted[order] = np.maximum.accumulate(p_adjusted[order])
+
+    table = slices[strata_columns + ['n_bot', 'n_top']].copy()
+    bot_sums = np.add.reduceat(strata['values'] * strata['is_bot'], strata['starts'])
+    table['bot_mean'] = bot_sums / table['n_bot']
+    table['top_mean'] = (slices['total'].to_numpy() - bot_sums) / table['n_top']
+    table['observed_stat'] = diff[0]
+    table['t_stat'] = t[0]
+    table['p_value'] = raw_counts / n_permutations
+    table['p_adjusted'] = p_adjusted
+    table['significant'] = table['p_adjusted'] < 0.05
+    return table
+
+
+def main(config=None):
+    """Run the stratified tests for every metric and export the per-league table."""
+    config = config or get_config()
+    output_dir = Path(config.output_dir)
+
+    print("Loading processed data...")
+    df = load_processed_data(config.processed_data)
+
+    results = {
+        'strata': STRATA_COLUMNS,
+        'n_permutations': config.permutations,
+        'adjustment': 'Westfall-Young step-down max-T',
+        'tests': {},
+    }
+    for metric, label in METRICS.items():
+        table = stratified_test(df, metric, config.permutations, jobs=config.jobs)
+        print(f"\n{label}: {len(table)} slices, "
+              f"{int(table['significant'].sum()) if len(table) else 0} significant after adjustment")
+        results['tests'][metric] = {
+            'label': label,
+            'slices': json.loads(table.to_json(orient='records')),
+        }
+
+    output_path = output_dir / "stratified_tests.json"
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nExported stratified tests to {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Streaming Histograms for Permutation Null Distributions
+Constant-memory accumulator for permuted test statistics.
+
+Permutation tests used to keep every permuted statistic in a list, and the
+exported figures embedded the whole array. A StreamingHistogram instead:
+
+- bins statistics into a fixed number of equal-width bins as batches arrive
+  (values outside the range go to underflow/overflow counters),
+- counts the tail (|stat| >= |observed|, or stat >= observed for one-sided
+  tests) exactly on the raw values, so the p-value has no binning error,
+- merges with other histograms over the same bins, so workers can each run
+  a share of the permutations and return a partial histogram,
+- exports only the bin counts as a plotly bar trace.
+"""
+import os
+
+import numpy as np
+
+from artifact_cache import process_pool
+
+# Bins across the histogram range
+BINS = 200
+# Default half-width of the range, in standard deviations of the null
+RANGE_SD = 6.0
+# Relative tolerance when comparing permuted against observed statistics
+TIE_TOLERANCE = 1e-9
+
+
+class StreamingHistogram:
+    """
+    Fixed-bin histogram of permuted statistics plus an exact tail count.
+
+    Attributes:
+        edges: bin edges (len(counts) + 1)
+        counts: statistics per bin; below/above count values outside the edges
+        n: statistics seen
+        extreme: statistics at least as extreme as `observed`
+    """
+
+    def __init__(self, lo, hi, observed, bins=BINS, two_sided=True):
+        if not hi > lo:
+            hi = lo + 1.0
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.observed = float(observed)
+        self.two_sided = two_sided
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.below = 0
+        self.above = 0
+        self.n = 0
+        self.extreme = 0
+
+    @classmethod
+    def around(cls, center, sd, observed, bins=BINS, two_sided=True, range_sd=RANGE_SD):
+        """
+        Histogram spanning `range_sd` null standard deviations either side of
+        `center` (from `center` upwards for one-sided, non-negative statistics),
+        widened if needed so the observed statistic falls inside.
+        """
+        lo = center - range_sd * sd if two_sided else center
+        hi = center + range_sd * sd
+        return cls(min(lo, observed), max(hi, observed), observed, bins, two_sided)
+
+    def update(self, values):
+        """Add a batch of permuted statistics."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.n += len(values)
+        if self.two_sided:
+            threshold = abs(self.observed) * (1 - TIE_TOLERANCE) - TIE_TOLERANCE
+            self.extreme += int(np.count_nonzero(np.abs(values) >= threshold))
+        else:
+            threshold = self.observed - abs(self.observed) * TIE_TOLERANCE - TIE_TOLERANCE
+            self.extreme += int(np.count_nonzero(values >= threshold))
+
+        lo, hi = self.edges[0], self.edges[-1]
+        inside = (values >= lo) & (values <= hi)
+        self.below += int(np.count_nonzero(values < lo))
+        self.above += int(np.count_nonzero(values > hi))
+        bins = len(self.counts)
+        idx = np.minimum(((values[inside] - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+        self.counts += np.bincount(idx, minlength=bins)
+        return self
+
+    def merge(self, other):
+        """Add another histogram over the same bins and observed statistic."""
+        if not (np.array_equal(self.edges, other.edges) and self.observed == other.observed
+                and self.two_sided == other.two_sided):
+            raise ValueError("Only histograms with identical bins and observed statistic can be merged")
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        self.n += other.n
+        self.extreme += other.extreme
+        return self
+
+    @property
+    def p_value(self):
+        return self.extreme / self.n if self.n else float('nan')
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    def trace(self, name='Null Distribution'):
+        """Plotly bar trace of the bin counts (no raw statistics)."""
+        return {
+            'type': 'bar',
+            'x': self.centers,
+            'y': self.counts,
+            'width': float(self.edges[1] - self.edges[0]),
+            'name': name,
+        }
+
+
+def diff_in_means_sd(values, n1):
+    """
+    Permutation standard deviation of mean(group1) - mean(group2) when the
+    pooled `values` are randomly split into n1 and len(values) - n1 rows.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    n2 = n - n1
+    if n < 2 or n1 == 0 or n2 == 0:
+        return 0.0
+    return float(np.sqrt(values.var() * n / (n - 1) * (1 / n1 + 1 / n2)))
+
+
+def run_null(worker, n_permutations, args=(), jobs=None, seed=42):
+    """
+    Run `worker(n, seed, *args) -> StreamingHistogram` over shares of
+    `n_permutations` (in worker processes when jobs > 1) and merge the
+    partial histograms. `worker` must be a module-level function.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    jobs = max(1, min(jobs, n_permutations))
+    counts = [n_permutations // jobs + (i < n_permutations % jobs) for i in range(jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(jobs)
+
+    if jobs == 1:
+        partials = [worker(counts[0], seeds[0], *args)]
+    else:
+        with process_pool(jobs) as pool:
+            partials = list(pool.map(worker, counts, seeds, *[[a] * jobs for a in args]))
+
+    merged = partials[0]
+    for partial in partials[1:]:
+        merged.merge(partial)
+    return merged
@@ -0,0 +1,94 @@
+"""
+Regression tests for the bot vs top gank focus classification.
+
+Run from the repository root:
+    python -m pytest analysis/tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data_processing import identify_gank_trades  # noqa: E402
+from jungle_focus import score_focus  # noqa: E402
+
+POSITIONS = ['TOP', 'JNG', 'MID', 'ADC', 'SUP']
+
+# (gameid, teamid, result, {position: killsat10 + assistsat10}); positions left out have 0
+TEAMS = [
+    # Bot beats top; the mid lane leading must not change the label
+    ('G1', 'A', 1, {'JNG': 1, 'ADC': 2, 'MID': 5}),
+    ('G1', 'B', 0, {'JNG': 2, 'TOP': 1}),
+    # Support activity is not bot activity: ADC and TOP tie
+    ('G2', 'A', 0, {'JNG': 1, 'ADC': 1, 'TOP': 1, 'SUP': 3}),
+    ('G2', 'B', 1, {'JNG': 1, 'TOP': 2}),
+    # Inactive jungler
+    ('G3', 'A', 1, {'ADC': 3}),
+    ('G3', 'B', 0, {'JNG': 1, 'ADC': 1}),
+    # Both teams bot: no trade
+    ('G4', 'A', 0, {'JNG': 3, 'ADC': 2, 'TOP': 1}),
+    ('G4', 'B', 1, {'JNG': 1, 'ADC': 1}),
+    # Top vs bot trade
+    ('G5', 'A', 1, {'JNG': 1, 'TOP': 2, 'ADC': 1}),
+    ('G5', 'B', 0, {'JNG': 1, 'ADC': 4, 'MID': 4}),
+]
+FOCUS = ['bot', 'top', None, 'top', None, 'bot', 'bot', 'bot', 'top', 'bot']
+
+
+def player_rows(teams=TEAMS):
+    rows = []
+    for gameid, teamid, result, activity in teams:
+        for position in POSITIONS:
+            rows.append({
+                'gameid': gameid, 'teamid': teamid, 'position': position, 'result': result,
+                'side': 'Blue' if teamid == 'A' else 'Red',
+                'killsat10': activity.get(position, 0), 'assistsat10': 0,
+            })
+    return pd.DataFrame(rows)
+
+
+def team_keys(df):
+    keys = df[['gameid', 'teamid']].drop_duplicates()
+    return pd.MultiIndex.from_frame(keys)
+
+
+def test_baseline_focus_labels():
+    df = player_rows()
+    jng = df[df['position'] == 'JNG']
+    _, shares, focus = score_focus(df, team_keys(df), jng['killsat10'].to_numpy() > 0)
+    assert list(focus) == FOCUS
+    # Mid is reported as a share only
+    assert shares[0].tolist() == [0.0, 5 / 6, 1 / 6]
+
+
+def test_baseline_trade_games():
+    trades = identify_gank_trades(player_rows()).to_frame()
+    assert len(trades) // 2 == 2
+    labels = dict(zip(zip(trades['gameid'], trades['teamid']), trades['gank_focus']))
+    assert labels == {('G1', 'A'): 'bot', ('G1', 'B'): 'top', ('G5', 'A'): 'top', ('G5', 'B'): 'bot'}
+    # bot_ka10 is the ADC's early kills + assists
+    assert trades['bot_ka10'].tolist() == [2, 0, 1, 4]
+
+
+def test_baseline_matches_adc_vs_top_rule():
+    rng = np.random.default_rng(0)
+    teams = [(f'G{i // 2}', 'AB'[i % 2], i % 2, {p: int(rng.integers(0, 3)) for p in POSITIONS})
+             for i in range(400)]
+    df = player_rows(teams)
+    by_position = df.pivot_table(index=['gameid', 'teamid'], columns='position', values='killsat10', sort=False)
+    active = by_position['JNG'] > 0
+    expected = np.select(
+        [active & (by_position['ADC'] > by_position['TOP']), active & (by_position['TOP'] > by_position['ADC'])],
+        ['bot', 'top'], default=None,
+    )
+    _, _, focus = score_focus(df, by_position.index, active.to_numpy())
+    assert list(focus) == list(expected)
+
+
+def test_all_lane_focus_is_opt_in():
+    trades = identify_gank_trades(player_rows(), all_lanes=True).to_frame()
+    # G1's and G5's bot teams led in mid; G2's support activity now counts toward bot
+    assert set(trades['gameid']) == {'G2'}
@@ -0,0 +1,36 @@
+"""
+Regression tests for stratified_tests.
+
+Run from the repository root:
+    python -m pytest analysis/tests
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from stratified_tests import prepare_strata, stratified_test  # noqa: E402
+
+
+def small_frame():
+    """Six rows: no league-split slice reaches MIN_GROUP_SIZE per group."""
+    return pd.DataFrame({
+        'league': ['LCK', 'LCK', 'LCK', 'LEC', 'LEC', 'LEC'],
+        'split': ['Spring'] * 6,
+        'gank_focus': ['bot', 'top', 'bot', 'top', 'bot', 'top'],
+        'result': [1, 0, 0, 1, 1, 0],
+    })
+
+
+def test_prepare_strata_without_testable_slices():
+    strata = prepare_strata(small_frame(), 'result')
+    assert strata['slices'].empty
+    assert len(strata['values']) == 0
+    assert len(strata['starts']) == 0
+
+
+def test_stratified_test_without_testable_slices():
+    table = stratified_test(small_frame(), 'result', n_permutations=10, jobs=1)
+    assert table.empty
@@ -0,0 +1,120 @@
+"""
+Tests for the streamed timeline parser and the timeline gank focus override.
+
+Run from the repository root:
+    python -m pytest analysis/tests
+"""
+import io
+import json
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data_processing import identify_gank_trades  # noqa: E402
+from json_stream import CHUNK_SIZE, ChunkReader  # noqa: E402
+from timeline_ingest import EARLY_WINDOW_MS, ingest_timelines, parse_timeline  # noqa: E402
+
+# Lane positions on Summoner's Rift (see timeline_ingest.classify_region)
+TOP = {'x': 1000, 'y': 10000}
+BOT = {'x': 10000, 'y': 1000}
+MID = {'x': 7400, 'y': 7400}
+# Junglers: the participant with the most jungle minions on each side
+BLUE_JUNGLER, RED_JUNGLER = 2, 7
+
+
+def kill(timestamp, killer, position, assists=()):
+    return {'type': 'CHAMPION_KILL', 'timestamp': timestamp, 'killerId': killer,
+            'assistingParticipantIds': list(assists), 'position': position}
+
+
+def timeline(match_id, kills, padding=''):
+    """Match-v5 timeline: one frame per minute, kills in the frame they precede."""
+    frames = []
+    for minute in range(EARLY_WINDOW_MS // 60000 + 2):
+        timestamp = minute * 60000
+        frames.append({
+            'timestamp': timestamp,
+            'participantFrames': {
+                str(pid): {'jungleMinionsKilled': 4 * minute if pid in (BLUE_JUNGLER, RED_JUNGLER) else 0}
+                for pid in range(1, 11)
+            },
+            'events': [k for k in kills if timestamp - 60000 <= k['timestamp'] < timestamp],
+        })
+    return {'metadata': {'matchId': match_id, 'padding': padding}, 'info': {'frames': frames}}
+
+
+# Blue's jungler ganks top twice and bot once; Red's jungler assists two bot kills
+G1_KILLS = [
+    kill(150000, BLUE_JUNGLER, TOP),
+    kill(200000, 6, BOT, assists=[RED_JUNGLER]),
+    kill(260000, 3, TOP, assists=[BLUE_JUNGLER]),
+    kill(330000, 9, BOT, assists=[RED_JUNGLER, 10]),
+    kill(400000, BLUE_JUNGLER, BOT),
+    # Not counted: a laner's kill, a jungler kill in mid, a kill after the window
+    kill(420000, 4, BOT),
+    kill(450000, RED_JUNGLER, MID),
+    kill(EARLY_WINDOW_MS + 30000, RED_JUNGLER, TOP),
+]
+
+
+def write_timeline(path, data):
+    text = json.dumps(data)
+    path.write_text(text, encoding='utf-8')
+    return text
+
+
+def test_chunk_reader_every_boundary():
+    items = [{'id': 123456, 'name': 'jungleMinionsKilled', 'xs': [1.5, -20, True, None]}, 98765, 'tail']
+    text = 'header ' + json.dumps({'items': items})
+    for chunk_size in range(1, len(text) + 1):
+        reader = ChunkReader(io.StringIO(text), chunk_size)
+        reader.skip_past(re.compile(r'"items"\s*:\s*\['))
+        assert list(reader.iter_array()) == items, chunk_size
+
+
+def test_parse_timeline_across_chunks(tmp_path):
+    # Pad the metadata so the first chunk ends inside the first frame's "participantFrames" key
+    unpadded = json.dumps(timeline('G1', G1_KILLS))
+    token = unpadded.index('"participantFrames"')
+    padding = 'x' * (CHUNK_SIZE - token - 5)
+    text = write_timeline(tmp_path / 'G1.json', timeline('G1', G1_KILLS, padding))
+    assert text[CHUNK_SIZE - 5:].startswith('"participantFrames"')
+
+    parsed = parse_timeline(tmp_path / 'G1.json')
+    assert parsed['gameid'] == 'G1'
+    teams = {team['side']: team for team in parsed['teams']}
+    assert teams['Blue'] == {'gameid': 'G1', 'side': 'Blue', 'jungler': BLUE_JUNGLER,
+                             'top_ganks': 2, 'bot_ganks': 1, 'gank_focus': 'top'}
+    assert teams['Red'] == {'gameid': 'G1', 'side': 'Red', 'jungler': RED_JUNGLER,
+                            'top_ganks': 0, 'bot_ganks': 2, 'gank_focus': 'bot'}
+    # The mid kill is an event without a region; the late kill is not read
+    assert [e['region'] for e in parsed['events'] if e['side'] == 'Red'] == ['bot', 'bot', None]
+
+
+def player_rows():
+    """Stats rows for G1 (Blue bot vs Red top by killsat10) and G2 (the same, no timeline)."""
+    rows = []
+    for gameid in ('G1', 'G2'):
+        for side, teamid, activity in (('Blue', 'A', {'JNG': 1, 'ADC': 2}), ('Red', 'B', {'JNG': 1, 'TOP': 2})):
+            for position in ('TOP', 'JNG', 'MID', 'ADC', 'SUP'):
+                rows.append({'gameid': gameid, 'teamid': teamid, 'side': side, 'position': position,
+                             'result': int(side == 'Blue'), 'killsat10': activity.get(position, 0),
+                             'assistsat10': 0})
+    return pd.DataFrame(rows)
+
+
+def test_timeline_focus_overrides_stats(tmp_path):
+    write_timeline(tmp_path / 'G1.json', timeline('G1', G1_KILLS))
+    timeline_focus, _ = ingest_timelines([tmp_path / 'G1.json'], jobs=1)
+
+    trades = identify_gank_trades(player_rows(), timeline_focus=timeline_focus).to_frame()
+    labels = {(row.gameid, row.side): (row.gank_focus, row.focus_source) for row in trades.itertuples()}
+    assert labels == {
+        # The timeline swaps G1's killsat10-based labels
+        ('G1', 'Blue'): ('top', 'timeline'), ('G1', 'Red'): ('bot', 'timeline'),
+        ('G2', 'Blue'): ('bot', 'stats'), ('G2', 'Red'): ('top', 'stats'),
+    }
@@ -0,0 +1,218 @@
+"""
+Match Timeline Ingestion
+Detects early jungle ganks from Riot match-v5 timeline JSON dumps and turns
+them into a per-team gank focus that replaces the killsat10/assistsat10
+heuristic in data_processing.identify_gank_trades.
+
+A gank is a CHAMPION_KILL before the early-game window in which the team's
+jungler is the killer or an assister, located in the top or bot lane region.
+The jungler is the player on each team with the most jungle minions killed at
+the end of the window.
+
+Timeline files are parsed incrementally (json_stream.ChunkReader decodes one
+frame at a time) and reading stops at the first frame past the early window,
+so a whole timeline is never held in memory. Files are spread across worker
+processes.
+
+Usage:
+    python analysis/timeline_ingest.py <timeline dir>
+    python analysis/cli.py process --timelines <timeline dir>
+"""
+import os
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from artifact_cache import process_pool
+from config import EARLY_WINDOW_MIN
+from json_stream import ChunkReader, open_text
+
+EARLY_WINDOW_MS = EARLY_WINDOW_MIN * 60 * 1000
+
+# Summoner's Rift coordinates run from 0 to about MAP_SIZE on both axes, with
+# the blue base at (0, 0) and the red base at (MAP_SIZE, MAP_SIZE).
+MAP_SIZE = 14870
+# Distance from the map edge still counted as part of a side lane
+LANE_BAND = 2500
+# Both coordinates within this distance of a corner count as a base, not a lane
+BASE_SIZE = 4500
+
+# Participants 1-5 play on blue side (teamId 100), 6-10 on red side (teamId 200)
+SIDES = {100: 'Blue', 200: 'Red'}
+
+_MATCH_ID = re.compile(r'"matchId"\s*:\s*"([^"]+)"')
+_FRAMES_KEY = re.compile(r'"frames"\s*:\s*\[')
+
+
+def classify_region(x, y):
+    """Map position -> 'top', 'bot' or None (mid, jungle, river or base)."""
+    if (x < BASE_SIZE and y < BASE_SIZE) or (x > MAP_SIZE - BASE_SIZE and y > MAP_SIZE - BASE_SIZE):
+        return None
+    # Top lane runs along the left and top edges, bot lane along the bottom
+    # and right edges; the diagonal splits the two shared corners
+    if y > x and (x < LANE_BAND or y > MAP_SIZE - LANE_BAND):
+        return 'top'
+    if x > y and (y < LANE_BAND or x > MAP_SIZE - LANE_BAND):
+        return 'bot'
+    return None
+
+
+def side_of(participant_id):
+    return SIDES[100] if participant_id <= 5 else SIDES[200]
+
+
+def parse_timeline(path, window_ms=EARLY_WINDOW_MS):
+    """
+    Extract early jungler kill/assist events and per-side gank counts from one
+    timeline file.
+
+    Returns:
+        dict with 'gameid' (metadata.matchId, or the file name if absent),
+        'events' (one dict per jungler kill/assist: side, participant,
+        involvement, timestamp, x, y, region) and 'teams' (one dict per side:
+        jungler, top_ganks, bot_ganks, gank_focus)
+    """
+    kills = []
+    jungle_cs = {}
+    with open_text(path) as f:
+        reader = ChunkReader(f)
+        header = reader.skip_past(_FRAMES_KEY)
+        match_id = _MATCH_ID.search(header)
+        gameid = match_id.group(1) if match_id else Path(path).name.split('.')[0]
+
+        for frame in reader.iter_array():
+            for event in frame.get('events', []):
+                if event.get('type') == 'CHAMPION_KILL' and event.get('timestamp', 0) < window_ms:
+                    kills.append(event)
+            if frame.get('timestamp', 0) <= window_ms:
+                for pid, stats in frame.get('participantFrames', {}).items():
+                    jungle_cs[int(pid)] = stats.get('jungleMinionsKilled', 0)
+            # Events in a frame precede its timestamp, so nothing later matters
+            if frame.get('timestamp', 0) >= window_ms:
+                break
+
+    # Jungler: most jungle minions on each side at the end of the window
+    junglers = {}
+    for pid, cs in sorted(jungle_cs.items()):
+        side = side_of(pid)
+        if side not in junglers or cs > jungle_cs[junglers[side]]:
+            junglers[side] = pid
+
+    events = []
+    counts = {side: {'top': 0, 'bot': 0} for side in SIDES.values()}
+    for kill in kills:
+        position = kill.get('position') or {}
+        x, y = position.get('x'), position.get('y')
+        region = classify_region(x, y) if x is not None and y is not None else None
+        involved = [('kill', kill.get('killerId'))]
+        involved += [('assist', pid) for pid in kill.get('assistingParticipantIds', [])]
+        for involvement, pid in involved:
+            if not pid or junglers.get(side_of(pid)) != pid:
+                continue
+            side = side_of(pid)
+            events.append({
+                'gameid': gameid,
+                'side': side,
+                'participant': pid,
+                'involvement': involvement,
+                'timestamp': kill.get('timestamp'),
+                'x': x,
+                'y': y,
+                'region': region,
+            })
+            if region is not None:
+                counts[side][region] += 1
+
+    teams = []
+    for side, count in counts.items():
+        if count['bot'] > count['top']:
+            focus = 'bot'
+        elif count['top'] > count['bot']:
+            focus = 'top'
+        else:
+            focus = None
+        teams.append({
+            'gameid': gameid,
+            'side': side,
+            'jungler': junglers.get(side),
+            'top_ganks': count['top'],
+            'bot_ganks': count['bot'],
+            'gank_focus': focus,
+        })
+    return {'gameid': gameid, 'events': events, 'teams': teams}
+
+
+def _parse_or_error(path):
+    """Worker wrapper: a bad file is reported instead of failing the batch."""
+    try:
+        return parse_timeline(path)
+    except (OSError, ValueError) as e:
+        return {'error': f"{path}: {e}"}
+
+
+def find_timeline_files(directory):
+    """Timeline dumps (*.json and *.json.gz) under `directory`, sorted."""
+    directory = Path(directory)
+    return sorted(set(directory.rglob('*.json')) | set(directory.rglob('*.json.gz')))
+
+
+def ingest_timelines(paths, jobs=None):
+    """
+    Parse timeline files in parallel.
+
+    Returns:
+        teams: DataFrame with one row per (gameid, side) and its gank_focus
+        events: DataFrame of the jungler kill/assist events behind the counts
+    """
+    paths = [str(p) for p in paths]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths) or 1))
+    if jobs == 1:
+        results = [_parse_or_error(p) for p in paths]
+    else:
+        with process_pool(jobs) as pool:
+            results = list(pool.map(_parse_or_error, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+
+    errors = [r['error'] for r in results if 'error' in r]
+    for error in errors[:5]:
+        print(f"  Skipped {error}")
+    if len(errors) > 5:
+        print(f"  ... and {len(errors) - 5} more unreadable timelines")
+
+    parsed = [r for r in results if 'error' not in r]
+    teams = pd.DataFrame(
+        [t for r in parsed for t in r['teams']],
+        columns=['gameid', 'side', 'jungler', 'top_ganks', 'bot_ganks', 'gank_focus'],
+    )
+    events = pd.DataFrame(
+        [e for r in parsed for e in r['events']],
+        columns=['gameid', 'side', 'participant', 'involvement', 'timestamp', 'x', 'y', 'region'],
+    )
+    # Duplicate dumps of the same match keep the first copy
+    teams = teams.drop_duplicates(['gameid', 'side'], keep='first').reset_index(drop=True)
+    print(f"Parsed {len(parsed)} timelines ({len(errors)} skipped), "
+          f"{len(events)} early jungler kill/assist events")
+    return teams, events
+
+
+def load_timeline_focus(directory, jobs=None):
+    """Per-team gank focus for every timeline under `directory`."""
+    paths = find_timeline_files(directory)
+    print(f"Found {len(paths)} timeline files in {directory}")
+    teams, _ = ingest_timelines(paths, jobs)
+    return teams
+
+
+def main(directory=None, jobs=None):
+    directory = directory or (sys.argv[1] if len(sys.argv) > 1 else None)
+    if directory is None:
+        print("Usage: python timeline_ingest.py <timeline dir>")
+        return None
+    teams = load_timeline_focus(directory, jobs)
+    print(teams['gank_focus'].value_counts(dropna=False).to_string())
+    return teams
+
+
+if __name__ == "__main__":
+    main()
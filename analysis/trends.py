@@ -0,0 +1,218 @@
+"""
+Trends over Patches and Weeks
+Rolling win rate, objective conversion rate and LII difference by gank focus
+over consecutive patches and calendar weeks, exported for the EDA page.
+
+Each period's rows are reduced once to per-focus sums (rows, wins,
+objectives, LII sum and LII count). A window then slides over the periods:
+the entering period's sums are added to the running totals and the leaving
+period's sums subtracted, so each window costs O(1) instead of regrouping the
+rows it covers.
+
+Uncertainty bands use a Poisson bootstrap: every row gets B independent
+Poisson(1) weights, so each period's sums become length-B vectors that slide
+through the window exactly like the point estimates.
+"""
+import json
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import get_config
+
+# Window sizes (in periods)
+PATCH_WINDOW = 3
+WEEK_WINDOW = 4
+FOCUSES = ('bot', 'top')
+# Percentiles of the bootstrap distribution shown as the band
+BAND = (2.5, 97.5)
+# Upper bound on (row, replicate) weights drawn at once
+BATCH_WEIGHTS = 4_000_000
+# Decimal places kept in the export
+DECIMALS = 4
+
+# Per-period sums, last axis of the sums arrays
+N, WINS, OBJS, LII_SUM, LII_N = range(5)
+N_STATS = 5
+
+
+class SlidingWindow:
+    """Running sums over the most recent `size` periods."""
+
+    def __init__(self, size, shape):
+        self.size = size
+        self.total = np.zeros(shape)
+        self.members = deque()
+
+    def push(self, sums):
+        """Add a period; evict the oldest one once the window is full."""
+        self.total += sums
+        self.members.append(sums)
+        if len(self.members) > self.size:
+            self.total -= self.members.popleft()
+
+    @property
+    def full(self):
+        return len(self.members) == self.size
+
+
+def period_sums(df, period_codes, n_periods, n_bootstrap, seed=42):
+    """
+    Per-period, per-focus sums for the point estimate and every bootstrap
+    replicate.
+
+    Returns:
+        array of shape (n_periods, len(FOCUSES), n_bootstrap + 1, N_STATS);
+        replicate 0 has unit weights (the point estimate)
+    """
+    focus = pd.Series(df['gank_focus']).map({f: i for i, f in enumerate(FOCUSES)}).to_numpy()
+    keep = ~np.isnan(focus.astype(float)) & (period_codes >= 0)
+    group = (period_codes[keep] * len(FOCUSES) + focus[keep].astype(int)).astype(np.int64)
+
+    lii = df['lii_diff'].to_numpy(dtype=np.float64)[keep]
+    lii_present = ~np.isnan(lii)
+    stats = np.column_stack([
+        np.ones(len(group)),
+        df['result'].to_numpy(dtype=np.float64)[keep],
+        df['obj_conversion'].to_numpy(dtype=np.float64)[keep],
+        np.where(lii_present, lii, 0.0),
+        lii_present.astype(np.float64),
+    ])
+
+    # Rows sorted by group, so each batch reduces contiguous runs with reduceat
+    order = np.argsort(group, kind='stable')
+    group, stats = group[order], stats[order]
+
+    n_groups = n_periods * len(FOCUSES)
+    sums = np.zeros((n_groups, n_bootstrap + 1, N_STATS))
+    rng = np.random.default_rng(seed)
+    batch_rows = max(1, BATCH_WEIGHTS // (n_bootstrap + 1))
+    for start in range(0, len(group), batch_rows):
+        batch_group = group[start:start + batch_rows]
+        batch_stats = stats[start:start + batch_rows]
+        weights = np.ones((len(batch_group), n_bootstrap + 1))
+        weights[:, 1:] = rng.poisson(1.0, size=(len(batch_group), n_bootstrap))
+        run_starts = np.flatnonzero(np.r_[True, batch_group[1:] != batch_group[:-1]])
+        run_groups = batch_group[run_starts]
+        for k in range(N_STATS):
+            sums[run_groups, :, k] += np.add.reduceat(weights * batch_stats[:, k, None], run_starts, axis=0)
+    return sums.reshape(n_periods, len(FOCUSES), n_bootstrap + 1, N_STATS)
+
+
+def _ratio(num, den):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+
+def _point_and_band(values):
+    """Point estimate (replicate 0) and percentile band over the replicates."""
+    point = values[0]
+    replicates = values[1:]
+    replicates = replicates[~np.isnan(replicates)]
+    if np.isnan(point) or len(replicates) == 0:
+        return None, None, None
+    lo, hi = np.percentile(replicates, BAND)
+    return round(float(point), DECIMALS), round(float(lo), DECIMALS), round(float(hi), DECIMALS)
+
+
+def rolling_trends(sums, labels, window):
+    """
+    Slide a `window`-period window over per-period sums.
+
+    Returns:
+        dict with the window labels and, per focus, columns of counts and
+        point/low/high values for win rate, objective rate and LII difference
+    """
+    series = {
+        'labels': [],
+        'start': [],
+        **{f: {key: [] for key in (
+            'n',
+            'winrate', 'winrate_lo', 'winrate_hi',
+            'obj_rate', 'obj_rate_lo', 'obj_rate_hi',
+            'lii_diff', 'lii_diff_lo', 'lii_diff_hi',
+        )} for f in FOCUSES},
+    }
+    sliding = SlidingWindow(window, sums.shape[1:])
+    for i, period in enumerate(sums):
+        sliding.push(period)
+        if not sliding.full:
+            continue
+        series['labels'].append(labels[i])
+        series['start'].append(labels[i - window + 1])
+        for f, focus in enumerate(FOCUSES):
+            total = sliding.total[f]
+            out = series[focus]
+            out['n'].append(int(round(total[0, N])))
+            for key, num, den in (('winrate', WINS, N), ('obj_rate', OBJS, N), ('lii_diff', LII_SUM, LII_N)):
+                point, lo, hi = _point_and_band(_ratio(total[:, num], total[:, den]))
+                out[key].append(point)
+                out[f'{key}_lo'].append(lo)
+                out[f'{key}_hi'].append(hi)
+    series['window'] = window
+    return series
+
+
+def patch_order(patch):
+    """Release-order sort key for a patch string like '25.10' (unparseable ones last)."""
+    try:
+        return tuple(int(part) for part in str(patch).split('.')[:2])
+    except ValueError:
+        return (float('inf'), str(patch))
+
+
+def patch_periods(df):
+    """Period code per row over patches in release order, plus the patch labels."""
+    patches = df['patch'].dropna().astype(str).unique()
+    ordered = sorted(patches, key=patch_order)
+    lookup = {p: i for i, p in enumerate(ordered)}
+    codes = df['patch'].astype('string').map(lookup).fillna(-1).to_numpy(dtype=np.int64)
+    return codes, ordered
+
+
+def week_periods(df):
+    """Period code per row over calendar weeks (Monday start, empty weeks kept), plus labels."""
+    dates = pd.to_datetime(df['date'], errors='coerce')
+    weeks = dates.dt.to_period('W-SUN').dt.start_time
+    first, last = weeks.min(), weeks.max()
+    if pd.isna(first):
+        return np.full(len(df), -1, dtype=np.int64), []
+    codes = ((weeks - first).dt.days // 7).fillna(-1).to_numpy(dtype=np.int64)
+    labels = [d.strftime('%Y-%m-%d') for d in pd.date_range(first, last, freq='7D')]
+    return codes, labels
+
+
+def compute_trends(df, n_bootstrap=1000, patch_window=PATCH_WINDOW, week_window=WEEK_WINDOW, seed=42):
+    """Rolling trend series over patches and weeks."""
+    result = {'n_bootstrap': n_bootstrap, 'band': list(BAND)}
+    for name, periods, window in (('patch', patch_periods, patch_window), ('week', week_periods, week_window)):
+        codes, labels = periods(df)
+        sums = period_sums(df, codes, len(labels), n_bootstrap, seed)
+        result[name] = rolling_trends(sums, labels, window)
+    return result
+
+
+def main(config=None):
+    """Compute the rolling trends and export them for the frontend."""
+    config = config or get_config()
+
+    print("Loading processed data...")
+    df = pd.read_json(config.processed_data, dtype={'patch': str})
+
+    trends = compute_trends(df, config.trend_bootstrap)
+    for name, unit in (('patch', 'patches'), ('week', 'weeks')):
+        series = trends[name]
+        print(f"{name.capitalize()} trends: {len(series['labels'])} windows of {series['window']} {unit}")
+
+    output_path = Path(config.output_dir) / "trends.json"
+    with open(output_path, 'w') as f:
+        json.dump(trends, f, separators=(',', ':'))
+    print(f"Exported trends to {output_path}")
+
+    return trends
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+// Local bundle and load-time benchmark.
+//
+//   npm run bench                         build, then report bundle sizes
+//   npm run bench -- --lighthouse         also run Lighthouse against `vite preview`
+//   npm run bench -- --out before.json    save the results
+//   npm run bench -- --compare before.json
+//
+// Bundle sizes are read from the build output: "initial" is everything
+// dist/index.html loads up front (entry script, modulepreloads, stylesheets),
+// "lazy" is every other chunk. Sizes are deterministic for a given lockfile.
+//
+// Lighthouse timings use its simulated (throttled) mobile profile and report
+// the median of --runs runs (default 5), which keeps them comparable between
+// machines. Lighthouse is not a dependency: it runs through `npx lighthouse`
+// and needs a local Chrome.
+import { execFileSync, spawn } from "node:child_process";
+import { readFileSync, readdirSync, statSync, writeFileSync } from "node:fs";
+import { join, relative } from "node:path";
+import { gzipSync } from "node:zlib";
+import { fileURLToPath } from "node:url";
+
+const root = fileURLToPath(new URL("..", import.meta.url));
+const dist = join(root, "dist");
+const BASE = "/leagueresearch/";
+const PORT = 4173;
+const METRICS = {
+  "first-contentful-paint": "FCP",
+  "largest-contentful-paint": "LCP",
+  interactive: "TTI",
+  "total-blocking-time": "TBT",
+};
+
+const args = process.argv.slice(2);
+const flag = name => args.includes(name);
+const option = (name, fallback) => {
+  const i = args.indexOf(name);
+  return i >= 0 ? args[i + 1] : fallback;
+};
+
+function files(dir) {
+  return readdirSync(dir).flatMap(name => {
+    const path = join(dir, name);
+    return statSync(path).isDirectory() ? files(path) : [path];
+  });
+}
+
+function size(path) {
+  const bytes = readFileSync(path);
+  return { bytes: bytes.length, gzip: gzipSync(bytes, { level: 9 }).length };
+}
+
+function bundleSizes() {
+  const html = readFileSync(join(dist, "index.html"), "utf8");
+  const referenced = [...html.matchAll(/(?:src|href)="([^"]+\.(?:js|css))"/g)]
+    .map(([, url]) => join(dist, url.replace(BASE, "")));
+  const assets = files(join(dist, "assets")).filter(p => /\.(js|css)$/.test(p));
+
+  const summarize = list => {
+    const sizes = list.map(p => ({ file: relative(dist, p), ...size(p) }));
+    return {
+      bytes: sizes.reduce((sum, s) => sum + s.bytes, 0),
+      gzip: sizes.reduce((sum, s) => sum + s.gzip, 0),
+      files: sizes.sort((a, b) => b.bytes - a.bytes),
+    };
+  };
+  return {
+    initial: summarize(assets.filter(p => referenced.includes(p))),
+    lazy: summarize(assets.filter(p => !referenced.includes(p))),
+  };
+}
+
+async function waitForServer(url, timeoutMs = 15000) {
+  const start = Date.now();
+  while (Date.now() - start < timeoutMs) {
+    try {
+      if ((await fetch(url)).ok) return;
+    } catch {
+      // not listening yet
+    }
+    await new Promise(resolve => setTimeout(resolve, 250));
+  }
+  throw new Error(`Preview server did not start at ${url}`);
+}
+
+function median(values) {
+  const sorted = [...values].sort((a, b) => a - b);
+  const mid = Math.floor(sorted.length / 2);
+  return sorted.length % 2 ? sorted[mid] : (sorted[mid - 1] + sorted[mid]) / 2;
+}
+
+async function lighthouse(runs) {
+  const url = `http://localhost:${PORT}${BASE}`;
+  const server = spawn("npx", ["vite", "preview", "--port", String(PORT), "--strictPort"], {
+    cwd: root,
+    stdio: "ignore",
+  });
+  try {
+    await waitForServer(url);
+    const samples = Object.fromEntries(Object.values(METRICS).map(m => [m, []]));
+    for (let run = 0; run < runs; run++) {
+      const report = JSON.parse(execFileSync("npx", [
+        "--yes", "lighthouse", url,
+        "--only-categories=performance",
+        "--throttling-method=simulate",
+        "--output=json", "--output-path=stdout", "--quiet",
+        "--chrome-flags=--headless=new --no-sandbox",
+      ], { cwd: root, maxBuffer: 256 << 20 }).toString());
+      for (const [audit, name] of Object.entries(METRICS)) {
+        samples[name].push(report.audits[audit].numericValue);
+      }
+      console.log(`  run ${run + 1}/${runs} done`);
+    }
+    return Object.fromEntries(Object.entries(samples).map(([name, values]) => [name, median(values)]));
+  } finally {
+    server.kill();
+  }
+}
+
+const kb = bytes => `${(bytes / 1024).toFixed(1)} kB`;
+
+function delta(now, before) {
+  if (before === undefined) return "";
+  const pct = before ? ((now - before) / before) * 100 : 0;
+  return ` (${pct >= 0 ? "+" : ""}${pct.toFixed(1)}%)`;
+}
+
+if (!flag("--no-build")) {
+  execFileSync("npx", ["vite", "build"], { cwd: root, stdio: "inherit" });
+}
+
+const results = { bundle: bundleSizes() };
+if (flag("--lighthouse")) {
+  console.log("\nRunning Lighthouse...");
+  results.timings = await lighthouse(Number(option("--runs", 5)));
+}
+
+const comparePath = option("--compare");
+const before = comparePath ? JSON.parse(readFileSync(comparePath, "utf8")) : {};
+
+console.log("\nBundle (raw / gzip)");
+for (const kind of ["initial", "lazy"]) {
+  const now = results.bundle[kind];
+  const was = before.bundle?.[kind];
+  console.log(`  ${kind.padEnd(8)} ${kb(now.bytes).padStart(10)}${delta(now.bytes, was?.bytes)} / `
+    + `${kb(now.gzip)}${delta(now.gzip, was?.gzip)}  in ${now.files.length} files`);
+}
+console.log("  largest chunks:");
+for (const file of [...results.bundle.initial.files, ...results.bundle.lazy.files]
+  .sort((a, b) => b.bytes - a.bytes).slice(0, 5)) {
+  console.log(`    ${file.file.padEnd(48)} ${kb(file.bytes).padStart(10)}`);
+}
+
+if (results.timings) {
+  console.log("\nLighthouse (median, simulated mobile)");
+  for (const [name, value] of Object.entries(results.timings)) {
+    console.log(`  ${name.padEnd(4)} ${`${Math.round(value)} ms`.padStart(10)}${delta(value, before.timings?.[name])}`);
+  }
+}
+
+const outPath = option("--out");
+if (outPath) {
+  writeFileSync(outPath, JSON.stringify(results, null, 2));
+  console.log(`\nSaved results to ${outPath}`);
+}
@@ -1,9 +1,12 @@
+import { lazy, Suspense } from "react";
 import { Link, Routes, Route } from "react-router-dom";
-import Introduction from "./pages/Introduction.jsx";
-import EDA from "./pages/EDA.jsx";
-import HypothesisTesting from "./pages/HypothesisTesting.jsx";
-import Modeling from "./pages/Modeling.jsx";
-import Missingness from "./pages/Missingness.jsx";
+
+// Each page is its own chunk, downloaded the first time its route is visited
+const Introduction = lazy(() => import("./pages/Introduction.jsx"));
+const EDA = lazy(() => import("./pages/EDA.jsx"));
+const HypothesisTesting = lazy(() => import("./pages/HypothesisTesting.jsx"));
+const Modeling = lazy(() => import("./pages/Modeling.jsx"));
+const Missingness = lazy(() => import("./pages/Missingness.jsx"));
 
 function App() {
   return (
@@ -98,13 +101,15 @@ function App() {
         padding: "2rem",
         boxShadow: "0 1px 3px rgba(0,0,0,0.1)"
       }}>
-        <Routes>
-          <Route path="/" element={<Introduction />} />
-          <Route path="/eda" element={<EDA />} />
-          <Route path="/missingness" element={<Missingness />} />
-          <Route path="/hypothesis" element={<HypothesisTesting />} />
-          <Route path="/modeling" element={<Modeling />} />
-        </Routes>
+        <Suspense fallback={<div>Loading...</div>}>
+          <Routes>
+            <Route path="/" element={<Introduction />} />
+            <Route path="/eda" element={<EDA />} />
+            <Route path="/missingness" element={<Missingness />} />
+            <Route path="/hypothesis" element={<HypothesisTesting />} />
+            <Route path="/modeling" element={<Modeling />} />
+          </Routes>
+        </Suspense>
       </main>
     </div>
   );
@@ -0,0 +1,110 @@
+import { lazy, Suspense, useEffect, useRef, useState } from "react";
+
+// Plotly is only downloaded when the first figure is rendered, and only the
+// cartesian bundle (bar, scatter, histogram, box, heatmap, ...) that the
+// exported figures use, instead of the full plotly.js build.
+const LazyPlotComponent = lazy(() =>
+  Promise.all([
+    import("react-plotly.js/factory"),
+    import("plotly.js/dist/plotly-cartesian.min.js"),
+  ]).then(([factory, plotly]) => {
+    const createPlotlyComponent = factory.default || factory;
+    return { default: createPlotlyComponent(plotly.default || plotly) };
+  })
+);
+
+export function Plot(props) {
+  return (
+    <Suspense fallback={<div>Loading Plot...</div>}>
+      <LazyPlotComponent {...props} />
+    </Suspense>
+  );
+}
+
+// One shared worker parses every figure; falls back to the main thread
+// where module workers are unavailable.
+let worker = null;
+let nextId = 0;
+const pending = new Map();
+
+function getWorker() {
+  if (worker === null) {
+    try {
+      worker = new Worker(new URL("../workers/figureParser.js", import.meta.url), { type: "module" });
+      worker.onmessage = ({ data: { id, data, error } }) => {
+        const { resolve, reject } = pending.get(id);
+        pending.delete(id);
+        if (error) reject(new Error(error));
+        else resolve(data);
+      };
+    } catch {
+      worker = false;
+    }
+  }
+  return worker;
+}
+
+const cache = new Map();
+
+function loadFigure(path) {
+  const url = new URL(import.meta.env.BASE_URL + path, window.location.href).href;
+  if (!cache.has(url)) {
+    const w = getWorker();
+    const request = w
+      ? new Promise((resolve, reject) => {
+          const id = nextId++;
+          pending.set(id, { resolve, reject });
+          w.postMessage({ id, url });
+        })
+      : fetch(url).then(res => res.json());
+    // Failed requests are not cached, so revisiting the page retries them
+    request.catch(() => cache.delete(url));
+    cache.set(url, request);
+  }
+  return cache.get(url);
+}
+
+// Fetches a plotly figure JSON (relative to the site base, e.g.
+// "data/plot_univariate.json") once its placeholder scrolls near the viewport.
+export default function LazyFigure({ src, layout, style, rootMargin = "200px" }) {
+  const ref = useRef(null);
+  // Without IntersectionObserver every figure loads straight away
+  const [visible, setVisible] = useState(() => !("IntersectionObserver" in window));
+  const [figure, setFigure] = useState(null);
+
+  useEffect(() => {
+    if (visible || !ref.current) return;
+    const observer = new IntersectionObserver(entries => {
+      if (entries.some(entry => entry.isIntersecting)) {
+        setVisible(true);
+        observer.disconnect();
+      }
+    }, { rootMargin });
+    observer.observe(ref.current);
+    return () => observer.disconnect();
+  }, [visible, rootMargin]);
+
+  useEffect(() => {
+    if (!visible) return;
+    let active = true;
+    loadFigure(src)
+      .then(data => { if (active) setFigure(data); })
+      .catch(err => console.error(`Error loading ${src}:`, err));
+    return () => { active = false; };
+  }, [visible, src]);
+
+  return (
+    <div ref={ref} style={{ minHeight: style?.height || "450px" }}>
+      {figure ? (
+        <Plot
+          data={figure.data}
+          layout={{ ...figure.layout, ...layout }}
+          useResizeHandler={true}
+          style={style}
+        />
+      ) : (
+        <div>Loading Plot...</div>
+      )}
+    </div>
+  );
+}
@@ -1,14 +1,11 @@
 import { useState, useEffect } from "react";
-import Plotly from "react-plotly.js";
-
-// Handle Vite/Rollup default export interop
-const Plot = Plotly.default || Plotly;
+import LazyFigure, { Plot } from "../components/LazyPlot.jsx";
 
 export default function EDA() {
   const [stats, setStats] = useState(null);
-  const [plots, setPlots] = useState({});
   const [headData, setHeadData] = useState([]);
   const [pivotData, setPivotData] = useState([]);
+  const [trends, setTrends] = useState(null);
 
   useEffect(() => {
     // Load summary stats
@@ -28,13 +25,11 @@ export default function EDA() {
       .then(data => setPivotData(data))
       .catch(err => console.error("Error loading pivot data:", err));
 
-    // Load plots
-    ["plot_obj_conversion.json", "plot_winrate.json", "plot_lii_scatter.json", "plot_univariate.json"].forEach(filename => {
-      fetch(import.meta.env.BASE_URL + `data/${filename}`)
-        .then(res => res.json())
-        .then(data => setPlots(prev => ({ ...prev, [filename]: data })))
-        .catch(err => console.error(`Error loading ${filename}:`, err));
-    });
+    // Rolling trends are optional (written by `cli.py trends`)
+    fetch(import.meta.env.BASE_URL + "data/trends.json")
+      .then(res => res.json())
+      .then(data => setTrends(data))
+      .catch(() => setTrends(null));
   }, []);
 
   if (!stats) return <div>Loading...</div>;
@@ -110,16 +105,11 @@ export default function EDA() {
           </p>
         </div>
         <div style={{ border: "1px solid #e5e7eb", borderRadius: "8px", padding: "1rem", backgroundColor: "#fff" }}>
-          {plots["plot_univariate.json"] ? (
-            <Plot
-              data={plots["plot_univariate.json"].data}
-              layout={{ ...plots["plot_univariate.json"].layout, width: undefined, height: undefined, autosize: true }}
-              useResizeHandler={true}
-              style={{ width: "100%", height: "400px" }}
-            />
-          ) : (
-            <div>Loading Plot...</div>
-          )}
+          <LazyFigure
+            src="data/plot_univariate.json"
+            layout={{ width: undefined, height: undefined, autosize: true }}
+            style={{ width: "100%", height: "400px" }}
+          />
         </div>
       </section>
 
@@ -132,19 +122,17 @@ export default function EDA() {
           </p>
         </div>
         <div style={{ border: "1px solid #e5e7eb", borderRadius: "8px", padding: "1rem", backgroundColor: "#fff" }}>
-          {plots["plot_obj_conversion.json"] ? (
-            <Plot
-              data={plots["plot_obj_conversion.json"].data}
-              layout={{ ...plots["plot_obj_conversion.json"].layout, width: undefined, height: undefined, autosize: true }}
-              useResizeHandler={true}
-              style={{ width: "100%", height: "400px" }}
-            />
-          ) : (
-            <div>Loading Plot...</div>
-          )}
+          <LazyFigure
+            src="data/plot_obj_conversion.json"
+            layout={{ width: undefined, height: undefined, autosize: true }}
+            style={{ width: "100%", height: "400px" }}
+          />
         </div>
       </section>
 
+      {/* Trends over Patches and Weeks */}
+      {trends && <TrendsSection trends={trends} />}
+
       {/* Key Stats Summary */}
       <section style={{ marginBottom: "2rem", padding: "1.5rem", backgroundColor: "#f9fafb", borderRadius: "8px" }}>
         <h3 style={{ color: "#667eea", marginBottom: "1rem" }}>Overall Dataset Stats</h3>
@@ -158,6 +146,95 @@ export default function EDA() {
   );
 }
 
+const TREND_METRICS = {
+  winrate: "Win Rate",
+  obj_rate: "Objective Conversion Rate",
+  lii_diff: "Mean LII Difference",
+};
+const TREND_COLORS = { bot: "#636efa", top: "#EF553B" };
+const TREND_FILLS = { bot: "rgba(99, 110, 250, 0.2)", top: "rgba(239, 85, 59, 0.2)" };
+
+function TrendsSection({ trends }) {
+  const [period, setPeriod] = useState("patch");
+  const [metric, setMetric] = useState("winrate");
+  const series = trends[period];
+
+  // One shaded bootstrap band (upper edge forward, lower edge back) and one line per focus
+  const data = ["bot", "top"].flatMap(focus => {
+    const values = series[focus];
+    return [
+      {
+        x: [...series.labels, ...[...series.labels].reverse()],
+        y: [...values[`${metric}_hi`], ...[...values[`${metric}_lo`]].reverse()],
+        fill: "toself",
+        fillcolor: TREND_FILLS[focus],
+        line: { width: 0 },
+        hoverinfo: "skip",
+        showlegend: false,
+        type: "scatter",
+      },
+      {
+        x: series.labels,
+        y: values[metric],
+        customdata: values.n,
+        name: `${focus} focus`,
+        mode: "lines+markers",
+        line: { color: TREND_COLORS[focus] },
+        hovertemplate: "%{y:.3f} (n = %{customdata})<extra>%{fullData.name}</extra>",
+        type: "scatter",
+      },
+    ];
+  });
+
+  const buttonStyle = active => ({
+    padding: "0.4rem 0.9rem",
+    marginRight: "0.5rem",
+    borderRadius: "6px",
+    border: "1px solid #667eea",
+    backgroundColor: active ? "#667eea" : "#fff",
+    color: active ? "#fff" : "#667eea",
+    cursor: "pointer",
+  });
+
+  return (
+    <section style={{ marginBottom: "3rem" }}>
+      <h3 style={{ color: "#667eea", marginBottom: "1rem" }}>Trends over Patches and Weeks</h3>
+      <div style={{ backgroundColor: "#f9fafb", padding: "1.5rem", borderRadius: "8px", marginBottom: "1.5rem", lineHeight: "1.7" }}>
+        <p>
+          Each point covers a rolling window of the last {series.window} {period === "patch" ? "patches" : "weeks"} and
+          is labeled by the window's final {period}. Shaded bands are {trends.band[0]}–{trends.band[1]} percentile
+          intervals from {trends.n_bootstrap} Poisson bootstrap replicates.
+        </p>
+      </div>
+      <div style={{ display: "flex", flexWrap: "wrap", alignItems: "center", gap: "1rem", marginBottom: "1rem" }}>
+        <div>
+          <button style={buttonStyle(period === "patch")} onClick={() => setPeriod("patch")}>By Patch</button>
+          <button style={buttonStyle(period === "week")} onClick={() => setPeriod("week")}>By Week</button>
+        </div>
+        <select value={metric} onChange={e => setMetric(e.target.value)} style={{ padding: "0.4rem", borderRadius: "6px", border: "1px solid #e5e7eb" }}>
+          {Object.entries(TREND_METRICS).map(([key, label]) => (
+            <option key={key} value={key}>{label}</option>
+          ))}
+        </select>
+      </div>
+      <div style={{ border: "1px solid #e5e7eb", borderRadius: "8px", padding: "1rem", backgroundColor: "#fff" }}>
+        <Plot
+          data={data}
+          layout={{
+            autosize: true,
+            xaxis: { title: { text: period === "patch" ? "Patch" : "Week starting" }, type: "category" },
+            yaxis: { title: { text: TREND_METRICS[metric] } },
+            legend: { orientation: "h", y: 1.1 },
+            margin: { t: 40 },
+          }}
+          useResizeHandler={true}
+          style={{ width: "100%", height: "400px" }}
+        />
+      </div>
+    </section>
+  );
+}
+
 function StatCard({ title, value }) {
   return (
     <div style={{ padding: "1rem", backgroundColor: "#fff", borderRadius: "8px", textAlign: "center", border: "1px solid #e5e7eb" }}>
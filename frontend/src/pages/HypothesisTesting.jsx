@@ -1,12 +1,10 @@
 import { useState, useEffect } from "react";
-import Plotly from "react-plotly.js";
-
-// Handle Vite/Rollup default export interop
-const Plot = Plotly.default || Plotly;
+import LazyFigure from "../components/LazyPlot.jsx";
 
 export default function HypothesisTesting() {
     const [testResults, setTestResults] = useState(null);
-    const [plots, setPlots] = useState({});
+    const [stratified, setStratified] = useState(null);
+    const [matched, setMatched] = useState(null);
 
     useEffect(() => {
         // Load test results
@@ -15,13 +13,17 @@ export default function HypothesisTesting() {
             .then(data => setTestResults(data))
             .catch(err => console.error("Error loading test results:", err));
 
-        // Load plots
-        ["test1_objectives.json", "test2_winrate.json"].forEach(filename => {
-            fetch(import.meta.env.BASE_URL + `data/${filename}`)
-                .then(res => res.json())
-                .then(data => setPlots(prev => ({ ...prev, [filename]: data })))
-                .catch(err => console.error(`Error loading ${filename}:`, err));
-        });
+        // Per-league results are optional (produced by the `stratified` stage)
+        fetch(import.meta.env.BASE_URL + "data/stratified_tests.json")
+            .then(res => (res.ok ? res.json() : null))
+            .then(data => setStratified(data))
+            .catch(() => setStratified(null));
+
+        // Propensity-matched results are optional (produced by the `matching` stage)
+        fetch(import.meta.env.BASE_URL + "data/matched_tests.json")
+            .then(res => (res.ok ? res.json() : null))
+            .then(data => setMatched(data))
+            .catch(() => setMatched(null));
     }, []);
 
     if (!testResults) {
@@ -29,6 +31,8 @@ export default function HypothesisTesting() {
     }
 
     const { test1, test2 } = testResults;
+    // Present only for tests run by random relabeling (not the exact test)
+    const permutations = test1.n_permutations ?? test2.n_permutations;
 
     return (
         <div>
@@ -36,8 +40,11 @@ export default function HypothesisTesting() {
 
             <section style={{ marginBottom: "2rem" }}>
                 <p style={{ lineHeight: "1.75", color: "#4b5563" }}>
-                    We conducted two <strong>permutation tests with 1,000 simulations</strong> to determine if there's a statistically significant difference
+                    We conducted two <strong>permutation tests</strong> to determine if there's a statistically significant difference
                     between bot-focused and top-focused gank strategies.
+                    {test1.method === "exact" && test2.method === "exact"
+                        ? " Both outcomes are binary (0/1), so the null distribution over every possible relabeling is computed exactly from the hypergeometric distribution instead of by random simulation."
+                        : ` The null distributions were simulated with ${permutations ? permutations.toLocaleString("en-US") + " " : ""}random relabelings.`}
                 </p>
             </section>
 
@@ -81,16 +88,13 @@ export default function HypothesisTesting() {
                         : " — We fail to reject the null hypothesis. No significant difference in objective conversion rates."}
                 </div>
 
-                {plots["test1_objectives.json"] && (
-                    <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
-                        <Plot
-                            data={plots["test1_objectives.json"].data}
-                            layout={{ ...plots["test1_objectives.json"].layout, autosize: true }}
-                            useResizeHandler={true}
-                            style={{ width: "100%" }}
-                        />
-                    </div>
-                )}
+                <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
+                    <LazyFigure
+                        src="data/test1_objectives.json"
+                        layout={{ autosize: true }}
+                        style={{ width: "100%" }}
+                    />
+                </div>
             </section>
 
             {/* Test 2: Win Rate */}
@@ -133,18 +137,45 @@ export default function HypothesisTesting() {
                         : " — We fail to reject the null hypothesis. No significant difference in win rates."}
                 </div>
 
-                {plots["test2_winrate.json"] && (
-                    <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
-                        <Plot
-                            data={plots["test2_winrate.json"].data}
-                            layout={{ ...plots["test2_winrate.json"].layout, autosize: true }}
-                            useResizeHandler={true}
-                            style={{ width: "100%" }}
-                        />
-                    </div>
-                )}
+                <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
+                    <LazyFigure
+                        src="data/test2_winrate.json"
+                        layout={{ autosize: true }}
+                        style={{ width: "100%" }}
+                    />
+                </div>
             </section>
 
+            {/* Per-League Results */}
+            {stratified && (
+                <section style={{ marginTop: "3rem", marginBottom: "3rem" }}>
+                    <h3 style={{ color: "#667eea", marginBottom: "1rem" }}>Results by League and Split</h3>
+                    <p style={{ lineHeight: "1.75", color: "#4b5563", marginBottom: "1rem" }}>
+                        The same bot vs top comparisons repeated within each league and split, using {stratified.n_permutations.toLocaleString()} shared
+                        permutations (labels shuffled within each league). Adjusted p-values use the <strong>{stratified.adjustment}</strong> procedure,
+                        which controls the chance of any false positive across all leagues.
+                    </p>
+                    {Object.entries(stratified.tests).map(([metric, test]) => (
+                        <StratifiedTable key={metric} label={test.label} slices={test.slices} />
+                    ))}
+                </section>
+            )}
+
+            {/* Propensity-Matched Comparison */}
+            {matched && (
+                <section style={{ marginTop: "3rem", marginBottom: "3rem" }}>
+                    <h3 style={{ color: "#667eea", marginBottom: "1rem" }}>Matched Comparison</h3>
+                    <p style={{ lineHeight: "1.75", color: "#4b5563", marginBottom: "1rem" }}>
+                        Teams that gank bot may already differ in early lane state or strength. Bot-focus team-games are matched, without
+                        replacement, to the top-focus team-game with the closest estimated propensity of bot focus (from side, <code>top_xpdiff10</code>,
+                        <code> bot_xpdiff10</code> and <code>elo_diff</code>), giving {matched.n_pairs.toLocaleString()} pairs
+                        from {matched.n_bot.toLocaleString()} bot-focus team-games. Each game contributes at most one team, so a team is never
+                        paired with its own opponent and the pairs are independent. Pair differences are tested with a sign-flip permutation test.
+                    </p>
+                    <MatchedTables matched={matched} />
+                </section>
+            )}
+
             {/* Framing Wrap-Up */}
             <section style={{ marginBottom: "3rem" }}>
                 <h3 style={{ color: "#667eea", marginBottom: "1rem" }}>Strategic Insight</h3>
@@ -158,6 +189,102 @@ export default function HypothesisTesting() {
     );
 }
 
+function StratifiedTable({ label, slices }) {
+    const cell = { padding: "0.5rem 0.75rem", textAlign: "right" };
+    const pct = (v) => (v * 100).toFixed(1) + "%";
+
+    return (
+        <div style={{ marginBottom: "1.5rem", overflowX: "auto" }}>
+            <h4 style={{ color: "#4b5563", marginBottom: "0.5rem" }}>{label}</h4>
+            <table style={{ width: "100%", borderCollapse: "collapse", fontSize: "0.875rem" }}>
+                <thead>
+                    <tr style={{ backgroundColor: "#f9fafb", borderBottom: "2px solid #e5e7eb" }}>
+                        <th style={{ ...cell, textAlign: "left" }}>League</th>
+                        <th style={{ ...cell, textAlign: "left" }}>Split</th>
+                        <th style={cell}>Bot n</th>
+                        <th style={cell}>Top n</th>
+                        <th style={cell}>Bot</th>
+                        <th style={cell}>Top</th>
+                        <th style={cell}>Difference</th>
+                        <th style={cell}>p-value</th>
+                        <th style={cell}>Adjusted p</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {slices.map((row) => (
+                        <tr
+                            key={`${row.league}-${row.split}`}
+                            style={{ borderBottom: "1px solid #e5e7eb", backgroundColor: row.significant ? "#e8f5e9" : "transparent" }}
+                        >
+                            <td style={{ ...cell, textAlign: "left", fontWeight: "600" }}>{row.league}</td>
+                            <td style={{ ...cell, textAlign: "left" }}>{row.split}</td>
+                            <td style={cell}>{row.n_bot}</td>
+                            <td style={cell}>{row.n_top}</td>
+                            <td style={cell}>{pct(row.bot_mean)}</td>
+                            <td style={cell}>{pct(row.top_mean)}</td>
+                            <td style={cell}>{(row.observed_stat * 100).toFixed(2)}%</td>
+                            <td style={cell}>{row.p_value.toFixed(4)}</td>
+                            <td style={{ ...cell, fontWeight: row.significant ? "700" : "400" }}>{row.p_adjusted.toFixed(4)}</td>
+                        </tr>
+                    ))}
+                </tbody>
+            </table>
+        </div>
+    );
+}
+
+function MatchedTables({ matched }) {
+    const cell = { padding: "0.5rem 0.75rem", textAlign: "right" };
+    const pct = (v) => (v * 100).toFixed(1) + "%";
+    const header = { backgroundColor: "#f9fafb", borderBottom: "2px solid #e5e7eb" };
+
+    return (
+        <div style={{ overflowX: "auto" }}>
+            <table style={{ width: "100%", borderCollapse: "collapse", fontSize: "0.875rem", marginBottom: "1.5rem" }}>
+                <thead>
+                    <tr style={header}>
+                        <th style={{ ...cell, textAlign: "left" }}>Outcome</th>
+                        <th style={cell}>Bot (matched)</th>
+                        <th style={cell}>Top (matched)</th>
+                        <th style={cell}>Difference</th>
+                        <th style={cell}>p-value</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {Object.entries(matched.tests).map(([outcome, test]) => (
+                        <tr key={outcome} style={{ borderBottom: "1px solid #e5e7eb", backgroundColor: test.p_value < 0.05 ? "#e8f5e9" : "transparent" }}>
+                            <td style={{ ...cell, textAlign: "left", fontWeight: "600" }}>{test.label}</td>
+                            <td style={cell}>{pct(test.bot_mean)}</td>
+                            <td style={cell}>{pct(test.top_mean)}</td>
+                            <td style={cell}>{(test.observed_stat * 100).toFixed(2)}%</td>
+                            <td style={cell}>{test.p_value.toFixed(4)} ({test.method})</td>
+                        </tr>
+                    ))}
+                </tbody>
+            </table>
+            <h4 style={{ color: "#4b5563", marginBottom: "0.5rem" }}>Covariate Balance (standardized mean difference)</h4>
+            <table style={{ width: "100%", borderCollapse: "collapse", fontSize: "0.875rem" }}>
+                <thead>
+                    <tr style={header}>
+                        <th style={{ ...cell, textAlign: "left" }}>Covariate</th>
+                        <th style={cell}>Before matching</th>
+                        <th style={cell}>After matching</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {matched.balance.map((row) => (
+                        <tr key={row.covariate} style={{ borderBottom: "1px solid #e5e7eb" }}>
+                            <td style={{ ...cell, textAlign: "left" }}><code>{row.covariate}</code></td>
+                            <td style={cell}>{row.smd_before.toFixed(3)}</td>
+                            <td style={cell}>{row.smd_after.toFixed(3)}</td>
+                        </tr>
+                    ))}
+                </tbody>
+            </table>
+        </div>
+    );
+}
+
 function ResultCard({ title, value, color }) {
     return (
         <div style={{
@@ -1,13 +1,8 @@
 import { useState, useEffect } from "react";
-import Plotly from "react-plotly.js";
-
-// Handle Vite/Rollup default export interop
-const Plot = Plotly.default || Plotly;
+import LazyFigure from "../components/LazyPlot.jsx";
 
 export default function Missingness() {
   const [results, setResults] = useState(null);
-  const [plot1, setPlot1] = useState(null);
-  const [plot2, setPlot2] = useState(null);
 
   useEffect(() => {
     // Load results
@@ -15,18 +10,6 @@ export default function Missingness() {
       .then(res => res.json())
       .then(data => setResults(data))
       .catch(err => console.error("Error loading missingness results:", err));
-
-    // Load plot 1
-    fetch(import.meta.env.BASE_URL + "data/missingness_test_1.json")
-      .then(res => res.json())
-      .then(data => setPlot1(data))
-      .catch(err => console.error("Error loading missingness plot 1:", err));
-
-    // Load plot 2
-    fetch(import.meta.env.BASE_URL + "data/missingness_test_2.json")
-      .then(res => res.json())
-      .then(data => setPlot2(data))
-      .catch(err => console.error("Error loading missingness plot 2:", err));
   }, []);
 
   if (!results) return <div>Loading analysis...</div>;
@@ -74,16 +57,13 @@ export default function Missingness() {
           <Card title="Result" value={results.test1.interpretation} color="#2196F3" />
         </div>
 
-        {plot1 && (
-          <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
-            <Plot
-              data={plot1.data}
-              layout={{ ...plot1.layout, autosize: true }}
-              useResizeHandler={true}
-              style={{ width: "100%" }}
-            />
-          </div>
-        )}
+        <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
+          <LazyFigure
+            src="data/missingness_test_1.json"
+            layout={{ autosize: true }}
+            style={{ width: "100%" }}
+          />
+        </div>
       </section>
 
       {/* Test 2: Independent */}
@@ -102,16 +82,13 @@ export default function Missingness() {
           <Card title="Result" value={results.test2.interpretation} color="#FF9800" />
         </div>
 
-        {plot2 && (
-          <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
-            <Plot
-              data={plot2.data}
-              layout={{ ...plot2.layout, autosize: true }}
-              useResizeHandler={true}
-              style={{ width: "100%" }}
-            />
-          </div>
-        )}
+        <div style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
+          <LazyFigure
+            src="data/missingness_test_2.json"
+            layout={{ autosize: true }}
+            style={{ width: "100%" }}
+          />
+        </div>
         <div style={{ marginTop: "1rem", padding: "1rem", backgroundColor: "#e8f5e9", borderRadius: "8px", border: "1px solid #4CAF50" }}>
           <strong>Conclusion:</strong> {results.test2.p_value > 0.05
             ? "Since the p-value is large (> 0.05), we fail to reject the null hypothesis. The missingness of bans does NOT appear to depend on monster kills, supporting the idea that it is not universally dependent on all gaming metrics."
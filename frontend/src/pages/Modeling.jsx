@@ -1,22 +1,26 @@
 import { useState, useEffect } from "react";
-import Plotly from "react-plotly.js";
-
-// Handle Vite/Rollup default export interop
-const Plot = Plotly.default || Plotly;
+import { Plot } from "../components/LazyPlot.jsx";
 
 export default function Modeling() {
     const [modelResults, setModelResults] = useState(null);
+    const [drift, setDrift] = useState(null);
 
     useEffect(() => {
         fetch(import.meta.env.BASE_URL + "data/model_results.json")
             .then(res => res.json())
             .then(data => setModelResults(data))
             .catch(err => console.error("Error loading model results:", err));
+
+        // Optional: only present once `cli.py drift` has run
+        fetch(import.meta.env.BASE_URL + "data/drift.json")
+            .then(res => (res.ok ? res.json() : null))
+            .then(data => setDrift(data))
+            .catch(() => setDrift(null));
     }, []);
 
     if (!modelResults) return <div>Loading model results...</div>;
 
-    const { baseline, final, fairness, feature_importance } = modelResults;
+    const { baseline, final, fairness, feature_importance, permutation_importance } = modelResults;
 
     const Divider = () => <div style={{ height: "1px", backgroundColor: "#e5e7eb", margin: "3rem 0" }} />;
 
@@ -77,7 +81,11 @@ export default function Modeling() {
                 <h2 style={{ marginBottom: "1.5rem", fontSize: "2rem" }}>Final Model</h2>
                 <div style={{ marginBottom: "1.5rem", lineHeight: "1.7" }}>
                     <p>
-                        Our final model uses a <strong>Random Forest Classifier</strong>, tuned via GridSearchCV (optimizing <code>max_depth</code> and <code>n_estimators</code>).
+                        {final.model_family === "hist_gb" ? (
+                            <>Our final model uses a <strong>Histogram Gradient Boosting Classifier</strong>, tuned via GridSearchCV (optimizing <code>learning_rate</code> and <code>max_leaf_nodes</code>, with early stopping choosing the number of trees).</>
+                        ) : (
+                            <>Our final model uses a <strong>Random Forest Classifier</strong>, tuned via GridSearchCV (optimizing <code>max_depth</code> and <code>n_estimators</code>).</>
+                        )}
                         We maintained the same <strong>80/20 train/test split</strong> as the baseline for a fair comparison.
                     </p>
                     <p style={{ marginTop: "1rem" }}><strong>New Features Added:</strong></p>
@@ -85,6 +93,7 @@ export default function Modeling() {
                         <li><strong>lii_diff (Quantitative):</strong> Standardized. Measures lane impact/dominance. A higher LII diff implies our bot/top laners are outperforming their opponents early.</li>
                         <li><strong>dragons, heralds (Quantitative):</strong> Counts of early objectives secured.</li>
                         <li><strong>gold_diff10, xp_diff10 (Quantitative):</strong> Standardized. Early economic leads are strong predictors of snowballing to a win.</li>
+                        <li><strong>elo_diff (Quantitative):</strong> Pre-game Elo rating difference between the two teams, computed over every game in date order. Controls for team strength, so gank focus is not credited for simply being the stronger team's habit.</li>
                     </ul>
                     <p style={{ marginTop: "1rem" }}>
                         The Random Forest captures non-linear interactions between these lane stats and the gank focus strategy.
@@ -115,6 +124,35 @@ export default function Modeling() {
                         </table>
                     </div>
                 </div>
+
+                {/* Permutation Importance Table */}
+                {permutation_importance && (
+                    <div style={{ marginTop: "2rem" }}>
+                        <h3 style={{ fontSize: "1.25rem", color: "#4b5563", marginBottom: "0.5rem" }}>Permutation Importance</h3>
+                        <p style={{ color: "#6b7280", marginBottom: "1rem", lineHeight: "1.6" }}>
+                            Drop in test ROC-AUC (baseline {permutation_importance.baseline_score.toFixed(3)}) when a feature is randomly shuffled,
+                            averaged over {permutation_importance.n_repeats} shuffles with a 95% confidence interval. Correlated features are also
+                            shuffled together as groups, since shuffling one of them alone understates their shared signal.
+                        </p>
+                        <div style={{ backgroundColor: "#fff", borderRadius: "8px", border: "1px solid #e5e7eb", overflow: "hidden" }}>
+                            <table style={{ width: "100%", borderCollapse: "collapse" }}>
+                                <tbody>
+                                    {[
+                                        ...Object.entries(permutation_importance.groups).map(([name, imp]) => [`${name} group (${imp.members.join(", ")})`, imp, true]),
+                                        ...Object.entries(permutation_importance.features).map(([name, imp]) => [name, imp, false]),
+                                    ].map(([label, imp, isGroup]) => (
+                                        <tr key={label} style={{ borderBottom: "1px solid #e5e7eb", backgroundColor: isGroup ? "#f9fafb" : "transparent" }}>
+                                            <td style={{ padding: "0.75rem", fontWeight: "600" }}>{label}</td>
+                                            <td style={{ padding: "0.75rem", textAlign: "right", color: "#6b7280" }}>
+                                                {imp.mean.toFixed(4)} [{imp.ci_low.toFixed(4)}, {imp.ci_high.toFixed(4)}]
+                                            </td>
+                                        </tr>
+                                    ))}
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+                )}
             </section>
 
             <Divider />
@@ -176,6 +214,13 @@ export default function Modeling() {
                         : `The p-value is ${fairness.p_value.toFixed(3)}, suggesting a significant difference in model performance between groups.`}
                 </div>
             </section >
+
+            {drift && drift.patches.length > 0 && (
+                <>
+                    <Divider />
+                    <DriftSection drift={drift} />
+                </>
+            )}
         </div >
     );
 }
@@ -194,3 +239,82 @@ function MetricCard({ title, value, color }) {
         </div>
     );
 }
+
+const DRIFT_GROUPS = [
+    { key: "all", name: "All Games", color: "#667eea" },
+    { key: "bot", name: "Bot Focus", color: "#2196F3" },
+    { key: "top", name: "Top Focus", color: "#FF9800" },
+];
+
+const DRIFT_METRICS = [
+    { key: "auc", title: "ROC-AUC" },
+    { key: "accuracy", title: "Accuracy" },
+    { key: "brier", title: "Brier Score" },
+    { key: "ece", title: "Expected Calibration Error" },
+];
+
+function DriftSection({ drift }) {
+    const patches = drift.patches.map(p => p.patch);
+    const alarmed = drift.patches.filter(p => p.alarms > 0);
+    const { reference, page_hinkley: ph } = drift;
+
+    return (
+        <section>
+            <h2 style={{ marginBottom: "1.5rem", fontSize: "2rem" }}>Drift Monitoring</h2>
+            <div style={{ padding: "1.5rem", backgroundColor: "#f9fafb", borderRadius: "8px", lineHeight: "1.7", marginBottom: "1.5rem" }}>
+                <p style={{ marginBottom: "1rem" }}>
+                    The model is fitted once on patches <strong>{reference.patches.join(", ")}</strong> ({reference.rows} team-games).
+                    Each later patch is scored as its games arrive, without refitting and without rescoring earlier patches.
+                </p>
+                <p>
+                    <strong>Drift test:</strong> a Page-Hinkley test on the per-game {ph.statistic} score (δ = {ph.delta}, threshold {ph.threshold})
+                    raises an alarm when prediction error climbs steadily above the reference model's own Brier score on held-out
+                    reference games ({reference.baseline.all.brier.toFixed(4)} overall). Patches with alarms are marked in red.
+                </p>
+            </div>
+
+            <div style={{ display: "grid", gridTemplateColumns: "repeat(auto-fit, minmax(200px, 1fr))", gap: "1rem", marginBottom: "1.5rem" }}>
+                <MetricCard title="Patches Monitored" value={patches.length} color="#667eea" />
+                <MetricCard title="Team-Games Scored" value={drift.rows_scored} color="#2196F3" />
+                <MetricCard title="Drift Alarms" value={drift.alarms.length} color={drift.alarms.length ? "#F44336" : "#4CAF50"} />
+            </div>
+
+            <div style={{ display: "grid", gridTemplateColumns: "repeat(auto-fit, minmax(400px, 1fr))", gap: "1rem" }}>
+                {DRIFT_METRICS.map(metric => (
+                    <div key={metric.key} style={{ backgroundColor: "#fff", borderRadius: "8px", padding: "1rem" }}>
+                        <h4 style={{ marginBottom: "0.5rem", color: "#667eea" }}>{metric.title} by Patch</h4>
+                        <Plot
+                            data={[
+                                ...DRIFT_GROUPS.map(group => ({
+                                    x: patches,
+                                    y: drift.patches.map(p => p[group.key][metric.key]),
+                                    name: group.name,
+                                    type: "scatter",
+                                    mode: "lines+markers",
+                                    line: { color: group.color },
+                                })),
+                                {
+                                    x: alarmed.map(p => p.patch),
+                                    y: alarmed.map(p => p.all[metric.key]),
+                                    name: "Drift Alarm",
+                                    type: "scatter",
+                                    mode: "markers",
+                                    marker: { color: "#F44336", size: 12, symbol: "x" },
+                                },
+                            ]}
+                            layout={{
+                                xaxis: { title: "Patch", type: "category" },
+                                yaxis: { title: metric.title },
+                                autosize: true,
+                                margin: { l: 50, r: 20, t: 20, b: 40 },
+                                legend: { orientation: "h", y: -0.25 },
+                            }}
+                            useResizeHandler={true}
+                            style={{ width: "100%", height: "320px" }}
+                        />
+                    </div>
+                ))}
+            </div>
+        </section>
+    );
+}
@@ -0,0 +1,12 @@
+// Fetches and parses figure JSON off the main thread.
+// Messages in: { id, url }. Messages out: { id, data } or { id, error }.
+self.onmessage = async ({ data: { id, url } }) => {
+  try {
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
+    const text = await res.text();
+    self.postMessage({ id, data: JSON.parse(text) });
+  } catch (err) {
+    self.postMessage({ id, error: String(err) });
+  }
+};